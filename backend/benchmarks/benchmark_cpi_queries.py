@@ -0,0 +1,185 @@
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow imports from the parent directory
+dir_abspath = os.path.dirname(__file__)
+backend_dir_abspath = os.path.dirname(dir_abspath)
+sys.path.append(os.path.dirname(backend_dir_abspath))
+
+from shared.environments_utils import get_env_var, load_env_from_dir
+from shared.psql_connector import AsyncPsqlConnector, create_async_psql_engine
+
+
+N_CORRECTION_QUERIES = 2000
+CORRECTION_MODES = ["copy", "formatted", "prepared"]
+N_SERIES_QUERIES = 20
+SERIES_MODES = ["copy", "prepared"]
+
+# Hot point query of get_cpi_correction, formatted as the route used to, or with bound parameters
+CORRECTION_QUERY = """
+    SELECT
+        countries.currency_symbol,
+        metrics_a.log_index AS log_index_a,
+        metrics_b.log_index AS log_index_b
+    FROM
+        enriched.dim_cpis AS cpis
+    JOIN
+        enriched.dim_countries AS countries ON countries.id = cpis.country_id
+    LEFT JOIN
+        enriched.fact_cpi_metrics AS metrics_a ON metrics_a.cpi_id = cpis.id AND metrics_a.year = {year_a}
+    LEFT JOIN
+        enriched.fact_cpi_metrics AS metrics_b ON metrics_b.cpi_id = cpis.id AND metrics_b.year = {year_b}
+    WHERE
+        cpis.id = {cpi_id}
+"""
+# Large query of get_cpis_series, for all the CPIs and years
+SERIES_QUERY = """
+    SELECT
+        cpis.id AS cpi_id,
+        cpis.name AS cpi_name,
+        countries.name AS country_name,
+        cpis.institution_name,
+        countries.currency_symbol,
+        cpis.documentation_link,
+        cpis.legal_mentions,
+        metrics.year,
+        metrics.value,
+        metrics.yoy_rate
+    FROM
+        enriched.dim_cpis AS cpis
+    JOIN
+        enriched.dim_countries AS countries ON countries.id = cpis.country_id
+    LEFT JOIN
+        enriched.fact_cpi_metrics AS metrics ON metrics.cpi_id = cpis.id
+        AND metrics.year BETWEEN :first_year AND :last_year
+    WHERE
+        cpis.id = ANY(:cpi_ids)
+    ORDER BY
+        cpis.id,
+        metrics.year
+"""
+
+
+async def run_correction_queries(
+    engine, mode: str, requests: list[dict]
+) -> list[float]:
+    """
+    Run the correction query for each of the <requests> with the given mode, one connector (hence one transaction on
+    one pooled connection) per request as the route does, and return their durations in ms.
+    """
+    durations_ms = []
+    for request in requests:
+        start_time = time.perf_counter()
+        async with AsyncPsqlConnector(engine=engine) as psql_conn:
+            if mode == "copy":
+                # A new statement text for each request, read through COPY
+                await psql_conn.execute_query_return_df(
+                    CORRECTION_QUERY.format(**request)
+                )
+            elif mode == "formatted":
+                # A new statement text for each request, prepared but never reused (the former route)
+                await psql_conn.execute_query_return_df(
+                    CORRECTION_QUERY.format(**request), prepared=True
+                )
+            else:
+                await psql_conn.execute_query_return_df(
+                    CORRECTION_QUERY.format(
+                        cpi_id=":cpi_id", year_a=":year_a", year_b=":year_b"
+                    ),
+                    params=request,
+                    prepared=True,
+                )
+        durations_ms.append((time.perf_counter() - start_time) * 1000)
+    return durations_ms
+
+
+async def run_series_queries(
+    engine, mode: str, params: dict
+) -> tuple[list[float], int]:
+    """
+    Run the series query N_SERIES_QUERIES times with the given mode, both with bound <params>, and return their
+    durations in ms and the number of rows read.
+    """
+    durations_ms = []
+    for _ in range(N_SERIES_QUERIES):
+        start_time = time.perf_counter()
+        async with AsyncPsqlConnector(engine=engine) as psql_conn:
+            df = await psql_conn.execute_query_return_df(
+                SERIES_QUERY, params=params, prepared=mode == "prepared"
+            )
+        durations_ms.append((time.perf_counter() - start_time) * 1000)
+    return durations_ms, df.height
+
+
+def print_durations(mode: str, n_rows: int, durations_ms: list[float]) -> None:
+    print(
+        f"{mode:<12}{n_rows:>10}{len(durations_ms):>10}{statistics.mean(durations_ms):>12.3f}"
+        f"{statistics.median(durations_ms):>12.3f}{max(durations_ms):>12.3f}"
+    )
+
+
+async def main() -> None:
+    """
+    Print the latency of the queries of the CPI routes against the database of the backend:
+    - the get_cpi_correction point query, formatted (read through COPY, or prepared anew each time) and prepared once
+    on the pooled connection with bound parameters. The (cpi_id, year_a, year_b) are drawn from fact_cpi_metrics.
+    - the get_cpis_series query of all the CPIs and years, read through COPY and as a prepared statement, both with
+    bound parameters, which is why the large results of the routes are read through COPY.
+    """
+    load_env_from_dir(backend_dir_abspath)
+    environment_name = get_env_var("ENVIRONMENT_NAME")
+    # A single connection, so that all the requests share its cache of prepared statements
+    engine = create_async_psql_engine(
+        dbname=get_env_var("PSQL_DB_NAME", environment_name),
+        user=get_env_var("PSQL_DB_READ_ONLY_USER", environment_name),
+        password=get_env_var("PSQL_DB_READ_ONLY_PASSWORD", environment_name),
+        host=get_env_var("PSQL_DB_HOST", environment_name),
+        port=get_env_var("PSQL_DB_PORT", environment_name),
+        pool_size=1,
+        max_overflow=0,
+    )
+    try:
+        async with AsyncPsqlConnector(engine=engine) as psql_conn:
+            cpi_years_df = await psql_conn.execute_query_return_df(
+                "SELECT cpi_id, year FROM enriched.fact_cpi_metrics"
+            )
+        cpi_years = cpi_years_df.rows()
+        random.seed(0)
+        requests = []
+        for _ in range(N_CORRECTION_QUERIES):
+            cpi_id, year_a = random.choice(cpi_years)
+            _, year_b = random.choice(
+                [cpi_year for cpi_year in cpi_years if cpi_year[0] == cpi_id]
+            )
+            requests.append(
+                {"cpi_id": cpi_id, "year_a": year_a, "year_b": year_b}
+            )
+        series_params = {
+            "cpi_ids": cpi_years_df["cpi_id"].unique().to_list(),
+            "first_year": cpi_years_df["year"].min(),
+            "last_year": cpi_years_df["year"].max(),
+        }
+
+        header = f"{'rows':>10}{'queries':>10}{'mean (ms)':>12}{'p50 (ms)':>12}{'max (ms)':>12}"
+        print(f"{'correction':<12}{header}")
+        for mode in CORRECTION_MODES:
+            durations_ms = await run_correction_queries(
+                engine, mode, requests
+            )
+            print_durations(mode, 1, durations_ms)
+        print(f"{'series':<12}{header}")
+        for mode in SERIES_MODES:
+            durations_ms, n_rows = await run_series_queries(
+                engine, mode, series_params
+            )
+            print_durations(mode, n_rows, durations_ms)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import os
+import sys
+import timeit
+
+# Allow imports from the parent directory
+dir_abspath = os.path.dirname(__file__)
+grandparent_dir_abspath = os.path.dirname(os.path.dirname(dir_abspath))
+sys.path.append(grandparent_dir_abspath)
+
+from backend.routers.project_personal_finances import PersonalFinanceProject
+
+
+DURATIONS_YRS = [1, 5, 10, 25, 50, 100]
+N_REPEATS = 5
+
+
+def build_project(
+    investment_duration_yrs: int, recurring_investment_frequency: str
+) -> PersonalFinanceProject:
+    return PersonalFinanceProject(
+        initial_amount_invested=1000,
+        recurring_investment_frequency=recurring_investment_frequency,
+        recurring_investment_amount=100,
+        investment_duration_yrs=investment_duration_yrs,
+        annual_gross_yield=8,
+        annual_inflation_rate=2,
+        investment_buy_in_fee_pct=0.35,
+        annual_custody_fee_pct=0.2,
+        investment_sell_out_fee_pct=0.5,
+        tax_on_gains_pct=17.2,
+    )
+
+
+def best_time_ms(function) -> float:
+    return min(timeit.repeat(function, number=1, repeat=N_REPEATS)) * 1000
+
+
+def main() -> None:
+    """
+    Print the latency of a /project_personal_finances request (i.e. of a PersonalFinanceProject instantiation) across
+    durations, the share of it spent projecting the closing prices and the number of projected prices compared to the
+    number of days a daily price table would hold.
+    """
+    print(
+        f"{'frequency':<10}{'years':>6}{'request (ms)':>15}{'closing prices (ms)':>22}{'prices':>8}{'days':>8}"
+    )
+    for recurring_investment_frequency in ["weekly", "monthly", "yearly"]:
+        for investment_duration_yrs in DURATIONS_YRS:
+            project = build_project(
+                investment_duration_yrs, recurring_investment_frequency
+            )
+            request_ms = best_time_ms(
+                lambda: build_project(
+                    investment_duration_yrs, recurring_investment_frequency
+                )
+            )
+            closing_prices_ms = best_time_ms(project.project_closing_prices)
+            # Reference: the size of the former daily price table
+            n_days = (
+                project.closing_prices["date"].max()
+                - project.closing_prices["date"].min()
+            ).days + 1
+            print(
+                f"{recurring_investment_frequency:<10}{investment_duration_yrs:>6}"
+                f"{request_ms:>15.2f}{closing_prices_ms:>22.2f}"
+                f"{project.closing_prices.height:>8}{n_days:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import itertools
+import os
+import sys
+import timeit
+
+# Allow imports from the parent directory
+dir_abspath = os.path.dirname(__file__)
+grandparent_dir_abspath = os.path.dirname(os.path.dirname(dir_abspath))
+sys.path.append(grandparent_dir_abspath)
+
+from backend.routers.project_personal_finances import (
+    PersonalFinanceProject,
+    PersonalFinanceProjectBatch,
+)
+
+
+N_REPEATS = 3
+
+
+def build_scenarios(n_scenarios: int) -> list[dict]:
+    # Sensitivity analysis-like grid: the scenarios share a few frequencies,
+    # durations and yields, and vary the fees and inflation rates
+    grid = itertools.product(
+        ["weekly", "monthly", "yearly"],
+        [10, 25, 40],
+        [4, 6, 8],
+        [0, 0.35, 1],
+        [0, 0.2, 0.5],
+        [1, 2, 3],
+    )
+    return [
+        {
+            "initial_amount_invested": 1000,
+            "recurring_investment_frequency": recurring_investment_frequency,
+            "recurring_investment_amount": 100,
+            "investment_duration_yrs": investment_duration_yrs,
+            "annual_gross_yield": annual_gross_yield,
+            "annual_inflation_rate": annual_inflation_rate,
+            "investment_buy_in_fee_pct": investment_buy_in_fee_pct,
+            "annual_custody_fee_pct": annual_custody_fee_pct,
+            "investment_sell_out_fee_pct": 0.5,
+            "tax_on_gains_pct": 17.2,
+        }
+        for (
+            recurring_investment_frequency,
+            investment_duration_yrs,
+            annual_gross_yield,
+            investment_buy_in_fee_pct,
+            annual_custody_fee_pct,
+            annual_inflation_rate,
+        ) in itertools.islice(grid, n_scenarios)
+    ]
+
+
+def best_time_ms(function) -> float:
+    return min(timeit.repeat(function, number=1, repeat=N_REPEATS)) * 1000
+
+
+def main() -> None:
+    """
+    Print the latency of projecting n scenarios with one PersonalFinanceProjectBatch compared to one
+    PersonalFinanceProject per scenario (i.e. one /project_personal_finances request per scenario).
+    """
+    print(
+        f"{'scenarios':<10}{'one by one (ms)':>18}{'batch (ms)':>13}{'speedup':>10}"
+    )
+    for n_scenarios in [1, 10, 100, 250, 500]:
+        scenarios = build_scenarios(n_scenarios)
+        one_by_one_ms = best_time_ms(
+            lambda: [
+                PersonalFinanceProject(**scenario) for scenario in scenarios
+            ]
+        )
+        batch_ms = best_time_ms(lambda: PersonalFinanceProjectBatch(scenarios))
+        print(
+            f"{n_scenarios:<10}{one_by_one_ms:>18.2f}{batch_ms:>13.2f}"
+            f"{one_by_one_ms / batch_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import datetime
+import os
+import sys
+import timeit
+import polars as pl
+
+# Allow imports from the parent directory
+dir_abspath = os.path.dirname(__file__)
+grandparent_dir_abspath = os.path.dirname(os.path.dirname(dir_abspath))
+sys.path.append(grandparent_dir_abspath)
+
+from backend.routers.project_personal_finances import (
+    PersonalFinanceProject,
+    get_projection_years,
+)
+
+
+DURATIONS_YRS = [10, 25, 40, 50, 75, 100]
+N_REPEATS = 5
+
+
+def build_project(investment_duration_yrs: int) -> PersonalFinanceProject:
+    return PersonalFinanceProject(
+        initial_amount_invested=1000,
+        recurring_investment_frequency="weekly",
+        recurring_investment_amount=100,
+        investment_duration_yrs=investment_duration_yrs,
+        annual_gross_yield=8,
+        annual_inflation_rate=2,
+        investment_buy_in_fee_pct=0.35,
+        annual_custody_fee_pct=0.2,
+        investment_sell_out_fee_pct=0.5,
+        tax_on_gains_pct=17.2,
+    )
+
+
+def project_custodian_fees_per_year(
+    project: PersonalFinanceProject, transactions: pl.DataFrame
+) -> pl.DataFrame:
+    """
+    Former computation (without its early return): one year-end price lookup and one rewrite of the whole transactions
+    frame per year.
+    """
+    transactions = transactions.with_columns(total_custodian_fee=0)
+    for year in get_projection_years(project.investment_duration_yrs):
+        closing_price_year = (
+            project.closing_prices.filter(
+                pl.col("date") == datetime.date(year, 12, 31)
+            )
+            .select("price")
+            .item()
+        )
+        transactions = transactions.with_columns(
+            total_custodian_fee=pl.when(pl.col("date").dt.year() <= year)
+            .then(
+                pl.col("total_custodian_fee")
+                + pl.col("n_assets_acquired")
+                * closing_price_year
+                * project.annual_custody_fee_pct
+                / 100,
+            )
+            .otherwise(pl.col("total_custodian_fee")),
+        )
+    return transactions
+
+
+def best_time_ms(function) -> float:
+    return min(timeit.repeat(function, number=1, repeat=N_REPEATS)) * 1000
+
+
+def main() -> None:
+    """
+    Print the time spent computing the custodian fees of weekly contributions across durations, per year (former
+    computation) and in a single pass (PersonalFinanceProject.project_transactions_custodian_fees).
+    """
+    print(
+        f"{'years':<6}{'transactions':>14}{'per year (ms)':>16}{'single pass (ms)':>19}{'speedup':>10}"
+    )
+    for investment_duration_yrs in DURATIONS_YRS:
+        project = build_project(investment_duration_yrs)
+        transactions = project.project_transactions_buy_ins()
+        per_year_ms = best_time_ms(
+            lambda: project_custodian_fees_per_year(project, transactions)
+        )
+        single_pass_ms = best_time_ms(
+            lambda: project.project_transactions_custodian_fees(transactions)
+        )
+        print(
+            f"{investment_duration_yrs:<6}{transactions.height:>14}"
+            f"{per_year_ms:>16.2f}{single_pass_ms:>19.2f}"
+            f"{per_year_ms / single_pass_ms:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import asyncio
+import contextlib
+import datetime
+import logging
+import polars as pl
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from shared.psql_connector import AsyncPsqlConnector
+from backend.dataset_version import (
+    fetch_dataset_version,
+    listen_for_refresh_notifications,
+)
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+
+class CpiSnapshot:
+    """
+    In-memory copy of the enriched schema, indexed by cpi_id, used to answer the CPI routes without querying the database.
+    """
+
+    def __init__(self, engine: AsyncEngine | None):
+        self.engine = engine
+        self.cpis_df = pl.DataFrame()
+        self.cpi_dfs = {}
+        self.cpi_values_dfs = {}
+        self.cpi_log_indexes = {}
+        self.cpi_log_indexes_df = pl.DataFrame()
+        self.dataset_version = None
+        self.loaded_at = None
+        self._refresh_requested = asyncio.Event()
+
+    async def load(self) -> None:
+        logger.info("Loading the CPI snapshot")
+        # Read before the data so that a concurrent enrichment can only make the version older than the data, never newer
+        dataset_version = await fetch_dataset_version(self.engine)
+        async with AsyncPsqlConnector(engine=self.engine) as psql_conn:
+            cpis_df = await psql_conn.execute_query_return_df(
+                query="""
+                    SELECT
+                        cpis.id AS cpi_id,
+                        cpis.name AS cpi_name,
+                        countries.name AS country_name,
+                        cpis.institution_name,
+                        countries.currency_symbol,
+                        cpis.documentation_link,
+                        cpis.legal_mentions
+                    FROM
+                        enriched.dim_cpis AS cpis
+                    JOIN
+                        enriched.dim_countries AS countries ON countries.id = cpis.country_id
+                """,
+            )
+            cpi_values_df = await psql_conn.execute_query_return_df(
+                query="""
+                    SELECT
+                        cpi_id,
+                        year,
+                        value,
+                        yoy_rate,
+                        log_index
+                    FROM
+                        enriched.fact_cpi_metrics
+                """,
+            )
+        self.update(cpis_df, cpi_values_df, dataset_version)
+        logger.info(
+            f"CPI snapshot loaded: {cpis_df.height} CPIs, {cpi_values_df.height} values"
+        )
+
+    def update(
+        self,
+        cpis_df: pl.DataFrame,
+        cpi_values_df: pl.DataFrame,
+        dataset_version: str | None = None,
+    ) -> None:
+        # The indexes are built aside and swapped in at the end so that requests never see a partially updated snapshot
+        cpi_dfs = {
+            key[0]: df
+            for key, df in cpis_df.partition_by("cpi_id", as_dict=True).items()
+        }
+        # One (year, value, yoy_rate) frame per cpi_id, sorted by year
+        cpi_values_dfs = {
+            key[0]: df
+            for key, df in cpi_values_df.sort(["cpi_id", "year"])
+            .select("cpi_id", "year", "value", "yoy_rate")
+            .partition_by("cpi_id", as_dict=True, include_key=False)
+            .items()
+        }
+        # The log-indexes by (cpi_id, year), so that a correction is two lookups
+        cpi_log_indexes = dict(
+            zip(
+                zip(cpi_values_df["cpi_id"], cpi_values_df["year"]),
+                cpi_values_df["log_index"],
+            )
+        )
+        # And as a frame, with the currency of their CPI, for the batch corrections
+        cpi_log_indexes_df = cpi_values_df.select(
+            "cpi_id", "year", "log_index"
+        ).join(
+            cpis_df.select("cpi_id", "currency_symbol"),
+            on="cpi_id",
+            how="left",
+        )
+        (
+            self.cpis_df,
+            self.cpi_dfs,
+            self.cpi_values_dfs,
+            self.cpi_log_indexes,
+            self.cpi_log_indexes_df,
+            self.dataset_version,
+        ) = (
+            cpis_df,
+            cpi_dfs,
+            cpi_values_dfs,
+            cpi_log_indexes,
+            cpi_log_indexes_df,
+            dataset_version,
+        )
+        self.loaded_at = datetime.datetime.now(datetime.timezone.utc)
+
+    def get_cpi_df(self, cpi_id: int) -> pl.DataFrame:
+        return self.cpi_dfs.get(cpi_id, self.cpis_df.clear())
+
+    def get_cpi_values_df(self, cpi_id: int) -> pl.DataFrame:
+        return self.cpi_values_dfs.get(
+            cpi_id,
+            pl.DataFrame(
+                schema={
+                    "year": pl.Int64,
+                    "value": pl.Float64,
+                    "yoy_rate": pl.Float64,
+                }
+            ),
+        )
+
+    def get_cpi_log_index(self, cpi_id: int, year: int) -> float | None:
+        return self.cpi_log_indexes.get((cpi_id, year))
+
+    def get_cpi_log_indexes_df(self, cpi_ids: list[int]) -> pl.DataFrame:
+        return self.cpi_log_indexes_df.filter(pl.col("cpi_id").is_in(cpi_ids))
+
+    async def listen_for_refresh_notifications(self) -> None:
+        await listen_for_refresh_notifications(
+            self.engine, self._refresh_requested
+        )
+
+    async def refresh_forever(self, refresh_interval_seconds: float) -> None:
+        """
+        Reload the snapshot every <refresh_interval_seconds> or as soon as the enrichment notifies its end, whichever comes first.
+        """
+        listener = asyncio.create_task(self.listen_for_refresh_notifications())
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        self._refresh_requested.wait(),
+                        timeout=refresh_interval_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._refresh_requested.clear()
+                try:
+                    await self.load()
+                except Exception:
+                    # Keep serving the previous snapshot until the next refresh
+                    logger.exception("Failed to refresh the CPI snapshot")
+        finally:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
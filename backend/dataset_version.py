@@ -0,0 +1,141 @@
+import asyncio
+import contextlib
+import logging
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from shared.psql_connector import AsyncPsqlConnector
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+# Channel notified at the end of the enrichment (cf. enrichment/pure_sql/queries/notify_backend.sql)
+REFRESH_CHANNEL = "enriched_refreshed"
+# Bounds of the exponential backoff between two attempts to (re)connect the listener
+LISTEN_RETRY_MIN_SECONDS = 1
+LISTEN_RETRY_MAX_SECONDS = 300
+
+
+async def fetch_dataset_version(engine: AsyncEngine) -> str | None:
+    """
+    Return the version of the enriched dataset recorded at the end of the enrichment (cf.
+    enrichment/pure_sql/queries/dataset_version.sql), None if none was recorded yet.
+    """
+    async with AsyncPsqlConnector(engine=engine) as psql_conn:
+        df = await psql_conn.execute_query_return_df(
+            query="""
+                SELECT
+                    version
+                FROM
+                    enriched.dataset_version
+            """,
+        )
+    return df[0, "version"] if df.height else None
+
+
+async def listen_for_refresh_notifications(
+    engine: AsyncEngine, refresh_requested: asyncio.Event
+) -> None:
+    """
+    Set <refresh_requested> whenever the enrichment notifies its end, and when reconnecting, as notifications may have
+    been missed in the meantime.
+    """
+    # LISTEN runs on a dedicated connection, outside the pool serving the requests, and is reopened with an
+    # exponential backoff whenever it fails or is lost (e.g. on a failover of the database)
+    url = engine.url
+    retry_seconds = LISTEN_RETRY_MIN_SECONDS
+    has_listened = False
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(
+                host=url.host,
+                port=url.port,
+                user=url.username,
+                password=url.password,
+                database=url.database,
+            )
+            connection_lost = asyncio.Event()
+            connection.add_termination_listener(
+                lambda *args: connection_lost.set()
+            )
+            await connection.add_listener(
+                REFRESH_CHANNEL,
+                lambda *args: refresh_requested.set(),
+            )
+            logger.info(f"Listening to the {REFRESH_CHANNEL} channel")
+            if has_listened:
+                # Notifications may have been missed while disconnected
+                refresh_requested.set()
+            has_listened = True
+            retry_seconds = LISTEN_RETRY_MIN_SECONDS
+            await connection_lost.wait()
+            logger.warning(
+                f"Lost the connection listening to the {REFRESH_CHANNEL} channel"
+            )
+        except Exception:
+            # The periodic refresh still applies in the meantime
+            logger.exception(
+                f"Failed to listen to the {REFRESH_CHANNEL} channel, retrying in {retry_seconds}s"
+            )
+        finally:
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+        await asyncio.sleep(retry_seconds)
+        retry_seconds = min(retry_seconds * 2, LISTEN_RETRY_MAX_SECONDS)
+
+
+class DatasetVersion:
+    """
+    In-memory copy of the version of the enriched dataset, used to answer the conditional requests of the CPI routes
+    without querying the database. In snapshot mode, the version of the snapshot is used instead.
+    """
+
+    def __init__(self, engine: AsyncEngine | None):
+        self.engine = engine
+        self.value = None
+        self._refresh_requested = asyncio.Event()
+
+    async def load(self) -> None:
+        try:
+            value = await fetch_dataset_version(self.engine)
+        except Exception:
+            # Without a known version, the CPI routes aren't cached rather than validated by a stale one
+            logger.exception(
+                "Failed to read the dataset version, the conditional requests are disabled until it's read"
+            )
+            value = None
+        if value != self.value:
+            logger.info(f"Dataset version: {value}")
+        self.value = value
+
+    async def refresh_forever(self, refresh_interval_seconds: float) -> None:
+        """
+        Reload the version every <refresh_interval_seconds> or as soon as the enrichment notifies its end, whichever
+        comes first, as CpiSnapshot.refresh_forever does.
+        """
+        listener = asyncio.create_task(
+            listen_for_refresh_notifications(
+                self.engine, self._refresh_requested
+            )
+        )
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        self._refresh_requested.wait(),
+                        timeout=refresh_interval_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._refresh_requested.clear()
+                await self.load()
+        finally:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
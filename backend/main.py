@@ -1,6 +1,9 @@
 import os
 import sys
+import asyncio
+import contextlib
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -12,14 +15,20 @@ parent_dir_abspath = os.path.dirname(dir_abspath)
 sys.path.append(parent_dir_abspath)
 
 from shared.environments_utils import load_env_from_dir, get_env_var
+from shared.psql_connector import PoolStats, create_async_psql_engine
+from backend.cpi_snapshot import CpiSnapshot
+from backend.dataset_version import DatasetVersion
+from backend.projection_cache import ProjectionCache
 
 # Load the .env of the current service of the monorepo
 load_env_from_dir(dir_abspath)
 
 from backend.routers import (
     get_cpis,
+    get_cpis_series,
     get_cpi,
     get_cpi_correction,
+    get_metrics,
     project_personal_finances,
 )
 
@@ -33,7 +42,115 @@ logger = logging.getLogger(__name__)
 logger.info(f"Running in {get_env_var('ENVIRONMENT_NAME')} environment")
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A single pooled engine is shared by all the requests handled by this process
+    environment_name = get_env_var("ENVIRONMENT_NAME")
+    app.state.psql_engine = create_async_psql_engine(
+        dbname=get_env_var("PSQL_DB_NAME", environment_name),
+        user=get_env_var("PSQL_DB_READ_ONLY_USER", environment_name),
+        password=get_env_var("PSQL_DB_READ_ONLY_PASSWORD", environment_name),
+        host=get_env_var("PSQL_DB_HOST", environment_name),
+        port=get_env_var("PSQL_DB_PORT", environment_name),
+        pool_size=int(
+            get_env_var("PSQL_POOL_SIZE", environment_name, default="5")
+        ),
+        max_overflow=int(
+            get_env_var(
+                "PSQL_POOL_MAX_OVERFLOW", environment_name, default="10"
+            )
+        ),
+        pool_timeout=float(
+            get_env_var(
+                "PSQL_POOL_TIMEOUT_SECONDS", environment_name, default="30"
+            )
+        ),
+        pool_pre_ping=get_env_var(
+            "PSQL_POOL_PRE_PING", environment_name, default="true"
+        ).lower()
+        == "true",
+        pool_recycle=int(
+            get_env_var(
+                "PSQL_POOL_RECYCLE_SECONDS", environment_name, default="1800"
+            )
+        ),
+    )
+    app.state.psql_pool_stats = PoolStats()
+
+    # Results of /project_personal_finances, optionally shared between the workers through Redis
+    app.state.projection_cache = ProjectionCache(
+        max_size=int(
+            get_env_var(
+                "PROJECTION_CACHE_MAX_SIZE", environment_name, default="1024"
+            )
+        ),
+        ttl_seconds=float(
+            get_env_var(
+                "PROJECTION_CACHE_TTL_SECONDS",
+                environment_name,
+                default="3600",
+            )
+        ),
+        shared_backend_url=get_env_var(
+            "PROJECTION_CACHE_REDIS_URL", environment_name, default=""
+        ),
+    )
+
+    # In snapshot mode, the CPI routes are answered from memory
+    app.state.cpi_snapshot = None
+    snapshot_refresh_task = None
+    if (
+        get_env_var(
+            "CPI_SNAPSHOT_ENABLED", environment_name, default="false"
+        ).lower()
+        == "true"
+    ):
+        app.state.cpi_snapshot = CpiSnapshot(app.state.psql_engine)
+        await app.state.cpi_snapshot.load()
+        snapshot_refresh_task = asyncio.create_task(
+            app.state.cpi_snapshot.refresh_forever(
+                float(
+                    get_env_var(
+                        "CPI_SNAPSHOT_REFRESH_SECONDS",
+                        environment_name,
+                        default="3600",
+                    )
+                )
+            )
+        )
+
+    # Otherwise, the version of the enriched dataset, which validates the HTTP caches of the CPI routes, is kept in
+    # memory (the snapshot has its own)
+    app.state.dataset_version = None
+    dataset_version_refresh_task = None
+    if app.state.cpi_snapshot is None:
+        app.state.dataset_version = DatasetVersion(app.state.psql_engine)
+        await app.state.dataset_version.load()
+        dataset_version_refresh_task = asyncio.create_task(
+            app.state.dataset_version.refresh_forever(
+                float(
+                    get_env_var(
+                        "DATASET_VERSION_REFRESH_SECONDS",
+                        environment_name,
+                        default="60",
+                    )
+                )
+            )
+        )
+
+    yield
+
+    for refresh_task in [snapshot_refresh_task, dataset_version_refresh_task]:
+        if refresh_task is not None:
+            # The refresh must be over before the engine it queries is disposed
+            refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await refresh_task
+    await app.state.projection_cache.close()
+    await app.state.psql_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -48,8 +165,11 @@ app.add_middleware(
 
 
 app.include_router(get_cpis.router)
+# Before get_cpi, whose /cpis/{cpi_id} path would match /cpis/series
+app.include_router(get_cpis_series.router)
 app.include_router(get_cpi.router)
 app.include_router(get_cpi_correction.router)
+app.include_router(get_metrics.router)
 app.include_router(project_personal_finances.router)
 
 
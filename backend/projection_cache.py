@@ -0,0 +1,122 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+# Prefix of the keys of the shared backend, which may be used by other applications
+SHARED_KEY_PREFIX = "purchasing_power:project_personal_finances:"
+
+
+class ProjectionCache:
+    """
+    Bounded in-process cache of /project_personal_finances results, evicting the least recently used entry beyond
+    <max_size> entries and expiring the entries after <ttl_seconds>.
+
+    If a Redis-compatible <shared_backend_url> is given, the results are also stored there so that the uvicorn workers
+    share their hits. The shared backend is best-effort: when it's unavailable, the in-process cache keeps working alone.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600,
+        shared_backend_url: str | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # key -> (expiry time, result), from the least to the most recently used
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.shared_backend = None
+        if shared_backend_url:
+            # Optional dependency, only needed with a shared backend
+            try:
+                import redis.asyncio
+            except ImportError as exception:
+                raise ImportError(
+                    "A shared projection cache requires the redis package, "
+                    "install the redis extra of the backend "
+                    "(poetry install --extras redis)"
+                ) from exception
+
+            self.shared_backend = redis.asyncio.from_url(shared_backend_url)
+
+    @staticmethod
+    def make_key(**parameters) -> str:
+        """
+        Build the key of a projection from its parameters, normalized so that equivalent requests (e.g. 8 and 8.0 as
+        annual_gross_yield, or parameters in a different order) share the same key.
+        """
+        return json.dumps(
+            [
+                [name, float(value) if isinstance(value, int) else value]
+                for name, value in sorted(parameters.items())
+            ]
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expiry_time, result = entry
+            if expiry_time > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+            self.expirations += 1
+
+        if self.shared_backend is not None:
+            try:
+                shared_result = await self.shared_backend.get(
+                    SHARED_KEY_PREFIX + key
+                )
+            except Exception:
+                logger.exception("Failed to read the shared projection cache")
+                shared_result = None
+            if shared_result is not None:
+                result = json.loads(shared_result)
+                self._set_local(key, result)
+                self.shared_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: dict) -> None:
+        self._set_local(key, result)
+        if self.shared_backend is not None:
+            try:
+                await self.shared_backend.set(
+                    SHARED_KEY_PREFIX + key,
+                    json.dumps(result),
+                    ex=max(1, int(self.ttl_seconds)),
+                )
+            except Exception:
+                logger.exception("Failed to write the shared projection cache")
+
+    def _set_local(self, key: str, result: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def close(self) -> None:
+        if self.shared_backend is not None:
+            await self.shared_backend.aclose()
@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+import logging
+import itertools
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing_extensions import Annotated
+import polars as pl
+import typer
+
+# Allow imports from the parent directory
+dir_abspath = os.path.dirname(__file__)
+parent_dir_abspath = os.path.dirname(dir_abspath)
+sys.path.append(parent_dir_abspath)
+
+from backend.routers.project_personal_finances import (
+    PersonalFinanceProjectBatch,
+    PersonalFinanceScenario,
+)
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+# Parameters of PersonalFinanceProject and the type of their values
+PARAMETER_TYPES = {
+    "initial_amount_invested": int,
+    "recurring_investment_frequency": str,
+    "recurring_investment_amount": int,
+    "investment_duration_yrs": int,
+    "annual_gross_yield": float,
+    "annual_inflation_rate": float,
+    "investment_buy_in_fee_pct": float,
+    "annual_custody_fee_pct": float,
+    "investment_sell_out_fee_pct": float,
+    "tax_on_gains_pct": float,
+}
+
+
+def parse_parameter_range(parameter_range: str, value_type: type) -> list:
+    """
+    Parse the values of a parameter given either as a comma-separated list ("weekly,monthly") or as an inclusive
+    start:stop:step range ("0:15:0.5").
+    """
+    if ":" not in parameter_range:
+        return [
+            value_type(value.strip()) for value in parameter_range.split(",")
+        ]
+
+    start, stop, step = (
+        value_type(value) for value in parameter_range.split(":")
+    )
+    if step <= 0 or stop < start:
+        raise ValueError(
+            f"Invalid range {parameter_range}: expected start:stop:step with start <= stop and step > 0"
+        )
+    # The rounding avoids values like 0.30000000000000004 and stop being missed because of float errors
+    n_values = int(round((stop - start) / step, 9)) + 1
+    return [value_type(round(start + i * step, 9)) for i in range(n_values)]
+
+
+def build_scenario_grid(parameter_ranges: dict[str, list]):
+    """
+    Lazily yield one scenario (i.e. one set of PersonalFinanceProject parameters) per combination of parameter values.
+    """
+    for values in itertools.product(*parameter_ranges.values()):
+        yield dict(zip(parameter_ranges.keys(), values))
+
+
+def project_scenario_chunk(
+    chunk_index: int,
+    first_scenario_id: int,
+    scenarios: list[dict],
+    output_dir: str,
+) -> int:
+    """
+    Project a chunk of scenarios and write one row per scenario (parameters, summary and details) to its own Parquet
+    file of <output_dir>. Run in the worker processes.
+    """
+    project_batch = PersonalFinanceProjectBatch(scenarios)
+    results = pl.DataFrame(
+        [
+            {
+                "scenario_id": first_scenario_id + i,
+                **scenario,
+                **projection["summary"],
+                # The parameters echoed in the details are rounded, the original values are kept
+                **{
+                    key: value
+                    for key, value in projection["details"].items()
+                    if key not in PARAMETER_TYPES
+                },
+            }
+            for i, (scenario, projection) in enumerate(
+                zip(scenarios, project_batch.projections)
+            )
+        ]
+    )
+    results.write_parquet(
+        os.path.join(output_dir, f"part-{chunk_index:06d}.parquet")
+    )
+    return results.height
+
+
+def sweep(
+    parameter_ranges: dict[str, list],
+    output_dir: str,
+    chunk_size: int = 1000,
+    n_workers: int | None = None,
+) -> int:
+    """
+    Project every scenario of the grid of <parameter_ranges> across a pool of <n_workers> processes (one per CPU by
+    default) and return the number of scenarios projected.
+
+    The grid is split into chunks of <chunk_size> scenarios, each projected with a PersonalFinanceProjectBatch and
+    written to its own Parquet file as soon as it's done, so that results stream to <output_dir> and memory stays
+    bounded whatever the size of the grid. The files form a dataset readable with pl.scan_parquet(f"{output_dir}/*.parquet").
+    """
+    missing_parameters = PARAMETER_TYPES.keys() - parameter_ranges.keys()
+    if missing_parameters:
+        raise ValueError(
+            f"Missing parameter ranges: {sorted(missing_parameters)}"
+        )
+
+    # A scenario without any spending has no yield
+    if (
+        0 in parameter_ranges["initial_amount_invested"]
+        and 0 in parameter_ranges["recurring_investment_amount"]
+    ):
+        raise ValueError(
+            "initial_amount_invested and recurring_investment_amount can't both include 0"
+        )
+
+    # Each value is validated like the parameters of the /project_personal_finances/batch path operation
+    first_scenario = {
+        parameter: values[0] for parameter, values in parameter_ranges.items()
+    }
+    for parameter, values in parameter_ranges.items():
+        for value in values:
+            PersonalFinanceScenario(**{**first_scenario, parameter: value})
+
+    n_scenarios = 1
+    for values in parameter_ranges.values():
+        n_scenarios *= len(values)
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_workers = n_workers or os.cpu_count()
+    logger.info(
+        f"Sweeping {n_scenarios} scenarios in chunks of {chunk_size} across {n_workers} processes"
+    )
+    start_time = time.perf_counter()
+    scenarios = build_scenario_grid(parameter_ranges)
+    n_scenarios_done = 0
+    # The workers are spawned rather than forked: forking a process whose Polars thread pool is already running
+    # (i.e. any caller that used Polars before) deadlocks the workers
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as executor:
+        # At most 2 chunks per worker are in flight so that the grid is never fully materialized
+        running = set()
+        for chunk_index in itertools.count():
+            chunk = list(itertools.islice(scenarios, chunk_size))
+            if chunk:
+                running.add(
+                    executor.submit(
+                        project_scenario_chunk,
+                        chunk_index,
+                        chunk_index * chunk_size,
+                        chunk,
+                        output_dir,
+                    )
+                )
+            if running and (len(running) >= 2 * n_workers or not chunk):
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    n_scenarios_done += future.result()
+                logger.info(
+                    f"{n_scenarios_done}/{n_scenarios} scenarios projected"
+                )
+            if not chunk and not running:
+                break
+
+    logger.info(
+        f"Swept {n_scenarios_done} scenarios in {time.perf_counter() - start_time:.1f}s to {output_dir}"
+    )
+    return n_scenarios_done
+
+
+app = typer.Typer()
+
+RANGE_HELP = 'Comma-separated values ("weekly,monthly") or inclusive start:stop:step range ("0:15:0.5").'
+
+
+@app.command()
+def projection_sweep(
+    output_dir: str,
+    initial_amount_invested: Annotated[str, typer.Option(help=RANGE_HELP)],
+    recurring_investment_frequency: Annotated[
+        str, typer.Option(help=RANGE_HELP)
+    ],
+    recurring_investment_amount: Annotated[str, typer.Option(help=RANGE_HELP)],
+    investment_duration_yrs: Annotated[str, typer.Option(help=RANGE_HELP)],
+    annual_gross_yield: Annotated[str, typer.Option(help=RANGE_HELP)],
+    annual_inflation_rate: Annotated[str, typer.Option(help=RANGE_HELP)],
+    investment_buy_in_fee_pct: Annotated[str, typer.Option(help=RANGE_HELP)],
+    annual_custody_fee_pct: Annotated[str, typer.Option(help=RANGE_HELP)],
+    investment_sell_out_fee_pct: Annotated[str, typer.Option(help=RANGE_HELP)],
+    tax_on_gains_pct: Annotated[str, typer.Option(help=RANGE_HELP)],
+    chunk_size: int = 1000,
+    n_workers: Annotated[
+        int | None,
+        typer.Option(help="Number of processes, one per CPU by default."),
+    ] = None,
+) -> None:
+    """
+    Project the grid of scenarios of the given parameter ranges to Parquet files in <output_dir>.
+    """
+    parameter_ranges = {
+        "initial_amount_invested": initial_amount_invested,
+        "recurring_investment_frequency": recurring_investment_frequency,
+        "recurring_investment_amount": recurring_investment_amount,
+        "investment_duration_yrs": investment_duration_yrs,
+        "annual_gross_yield": annual_gross_yield,
+        "annual_inflation_rate": annual_inflation_rate,
+        "investment_buy_in_fee_pct": investment_buy_in_fee_pct,
+        "annual_custody_fee_pct": annual_custody_fee_pct,
+        "investment_sell_out_fee_pct": investment_sell_out_fee_pct,
+        "tax_on_gains_pct": tax_on_gains_pct,
+    }
+    sweep(
+        {
+            parameter: parse_parameter_range(
+                parameter_range, PARAMETER_TYPES[parameter]
+            )
+            for parameter, parameter_range in parameter_ranges.items()
+        },
+        output_dir,
+        chunk_size=chunk_size,
+        n_workers=n_workers,
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -1,7 +1,10 @@
-from fastapi import Header, HTTPException
+from fastapi import Depends, Header, HTTPException, Request, Response
 from typing_extensions import Annotated
 
 from shared.environments_utils import get_env_var
+from shared.psql_connector import AsyncPsqlConnector
+from backend.cpi_snapshot import CpiSnapshot
+from backend.projection_cache import ProjectionCache
 
 
 class Common:
@@ -11,3 +14,77 @@ class Common:
             "API_KEYS", get_env_var("ENVIRONMENT_NAME")
         ).split(","):
             raise HTTPException(status_code=403, detail="Invalid API Key")
+
+
+def get_cpi_snapshot(request: Request) -> CpiSnapshot | None:
+    """
+    Return the in-memory CPI snapshot if the app runs in snapshot mode, None otherwise.
+    """
+    return getattr(request.app.state, "cpi_snapshot", None)
+
+
+async def get_cpi_psql_connector(
+    request: Request,
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+):
+    """
+    Yield an AsyncPsqlConnector running on the application-wide pooled engine created in the lifespan of the app.
+    In snapshot mode, the CPI routes don't query the database so None is yielded and no session is opened.
+    """
+    if cpi_snapshot is not None:
+        yield None
+        return
+    async with AsyncPsqlConnector(
+        engine=request.app.state.psql_engine,
+        pool_stats=request.app.state.psql_pool_stats,
+    ) as psql_conn:
+        yield psql_conn
+
+
+def get_projection_cache(request: Request) -> ProjectionCache | None:
+    """
+    Return the cache of the /project_personal_finances results, None if the app runs without it (e.g. in tests).
+    """
+    return getattr(request.app.state, "projection_cache", None)
+
+
+def get_dataset_version(
+    request: Request,
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+) -> str | None:
+    """
+    Return the version of the enriched dataset served by the CPI routes, None if it's unknown.
+    """
+    if cpi_snapshot is not None:
+        return cpi_snapshot.dataset_version
+    dataset_version = getattr(request.app.state, "dataset_version", None)
+    return dataset_version.value if dataset_version is not None else None
+
+
+def cache_by_dataset_version(
+    request: Request, response: Response, dataset_version: str | None
+) -> Response | None:
+    """
+    Set the ETag and Cache-Control headers of the response of a CPI route, which only changes with the dataset version.
+    Return the 304 response to send instead if the client's copy is still valid, None otherwise.
+    """
+    if dataset_version is None:
+        return None
+    max_age_seconds = get_env_var(
+        "CPI_CACHE_MAX_AGE_SECONDS",
+        get_env_var("ENVIRONMENT_NAME"),
+        default="300",
+    )
+    headers = {
+        "ETag": f'"{dataset_version}"',
+        "Cache-Control": f"public, max-age={max_age_seconds}",
+    }
+    # If-None-Match uses the weak comparison (cf. RFC 9110)
+    if_none_match = [
+        etag.strip().removeprefix("W/")
+        for etag in request.headers.get("if-none-match", "").split(",")
+    ]
+    if "*" in if_none_match or headers["ETag"] in if_none_match:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,9 +1,16 @@
 from typing_extensions import Annotated
-from fastapi import Depends, APIRouter, Path
+from fastapi import Depends, APIRouter, Request, Response, Path
+import polars as pl
 
-from shared.environments_utils import get_env_var
-from shared.psql_connector import PsqlConnector
-from backend.routers.common import Common
+from shared.psql_connector import AsyncPsqlConnector
+from backend.cpi_snapshot import CpiSnapshot
+from backend.routers.common import (
+    Common,
+    cache_by_dataset_version,
+    get_dataset_version,
+    get_cpi_snapshot,
+    get_cpi_psql_connector,
+)
 
 
 router = APIRouter()
@@ -12,32 +19,43 @@ router = APIRouter()
 @router.get("/cpis/{cpi_id}")
 async def get_cpi(
     common: Annotated[Common, Depends()],
+    psql_conn: Annotated[
+        AsyncPsqlConnector | None, Depends(get_cpi_psql_connector)
+    ],
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+    dataset_version: Annotated[str | None, Depends(get_dataset_version)],
+    request: Request,
+    response: Response,
     cpi_id: Annotated[int, Path(gt=0)],
 ) -> dict:
-    with PsqlConnector(
-        dbname=get_env_var("PSQL_DB_NAME", get_env_var("ENVIRONMENT_NAME")),
-        user=get_env_var(
-            "PSQL_DB_READ_ONLY_USER", get_env_var("ENVIRONMENT_NAME")
-        ),
-        password=get_env_var(
-            "PSQL_DB_READ_ONLY_PASSWORD", get_env_var("ENVIRONMENT_NAME")
-        ),
-        host=get_env_var("PSQL_DB_HOST", get_env_var("ENVIRONMENT_NAME")),
-        port=get_env_var("PSQL_DB_PORT", get_env_var("ENVIRONMENT_NAME")),
-    ) as psql_conn:
-        cpi_values_df = psql_conn.execute_query_return_df(
-            query=f"""
+    not_modified_response = cache_by_dataset_version(
+        request, response, dataset_version
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    if cpi_snapshot is not None:
+        cpi_values_df = cpi_snapshot.get_cpi_values_df(cpi_id)
+        cpi_df = cpi_snapshot.get_cpi_df(cpi_id)
+    else:
+        cpi_values_df = await psql_conn.execute_query_return_df(
+            query="""
                 SELECT
                     year,
-                    value
+                    value,
+                    yoy_rate
                 FROM
-                    enriched.fact_cpi_values
+                    enriched.fact_cpi_metrics
                 WHERE
-                    cpi_id = {cpi_id}
+                    cpi_id = :cpi_id
+                ORDER BY
+                    year
             """,
+            params={"cpi_id": cpi_id},
+            prepared=True,
         )
-        cpi_df = psql_conn.execute_query_return_df(
-            query=f"""
+        cpi_df = await psql_conn.execute_query_return_df(
+            query="""
                 SELECT
                     cpis.id as cpi_id,
                     cpis.name AS cpi_name,
@@ -51,31 +69,31 @@ async def get_cpi(
                 JOIN
                     enriched.dim_countries AS countries ON countries.id = cpis.country_id
                 WHERE
-                    cpis.id = {cpi_id}
+                    cpis.id = :cpi_id
             """,
+            params={"cpi_id": cpi_id},
+            prepared=True,
         )
 
-    cpi_values_dict = {}
-    for row in cpi_values_df.iter_rows(named=True):
-        cpi_values_dict.update(
-            {
-                row["year"]: row["value"],
-            }
-        )
+    return format_cpi(cpi_df, cpi_values_df)
+
 
-    annual_inflation_rates_dict = {}
-    for year, value in cpi_values_dict.items():
-        if year - 1 in cpi_values_dict:
-            annual_inflation_rates_dict.update(
-                {
-                    year: round(
-                        (value - cpi_values_dict[year - 1])
-                        / cpi_values_dict[year - 1]
-                        * 100,
-                        2,
-                    ),
-                }
-            )
+def format_cpi(cpi_df: pl.DataFrame, cpi_values_df: pl.DataFrame) -> dict:
+    """
+    Return the response of a CPI, given its metadata (a single row) and its (year, value, yoy_rate) values.
+    """
+    # The annual inflation rates are precomputed by the enrichment (cf. fact_cpi_metrics.sql)
+    cpi_values_dict = dict(
+        zip(cpi_values_df["year"].to_list(), cpi_values_df["value"].to_list())
+    )
+    annual_inflation_rates_dict = {
+        year: round(yoy_rate, 2)
+        for year, yoy_rate in zip(
+            cpi_values_df["year"].to_list(),
+            cpi_values_df["yoy_rate"].to_list(),
+        )
+        if yoy_rate is not None
+    }
     final_dict = {
         "cpi_id": cpi_df[0, "cpi_id"],
         "cpi_name": cpi_df[0, "cpi_name"],
@@ -1,73 +1,311 @@
+import io
+import math
 from datetime import datetime
+from typing import Iterator
 from typing_extensions import Annotated
-from fastapi import Depends, APIRouter, Query, Path
+from fastapi import (
+    Depends,
+    APIRouter,
+    HTTPException,
+    Request,
+    Response,
+    Query,
+    Path,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import polars as pl
 
-from shared.environments_utils import get_env_var
-from shared.psql_connector import PsqlConnector
-from backend.routers.common import Common
+from shared.psql_connector import AsyncPsqlConnector
+from backend.cpi_snapshot import CpiSnapshot
+from backend.routers.common import (
+    Common,
+    cache_by_dataset_version,
+    get_dataset_version,
+    get_cpi_snapshot,
+    get_cpi_psql_connector,
+)
 
 
 router = APIRouter()
 
+MAX_BATCH_CORRECTIONS = 1_000_000
+# Size of the bodies of the batch corrections, checked before they're buffered and parsed (~60 bytes per JSON correction)
+MAX_BATCH_CORRECTIONS_BYTES = 128 * 1024 * 1024
+# Rows of the results serialized at once while streaming them
+BATCH_CORRECTIONS_CHUNK_ROWS = 10_000
+
+# Columns of the batch corrections and their types, and the media types the corrections can be sent and returned in
+BATCH_CORRECTIONS_SCHEMA = {
+    "cpi_id": pl.Int64,
+    "amount": pl.Float64,
+    "year_a": pl.Int64,
+    "year_b": pl.Int64,
+}
+JSON_MEDIA_TYPE = "application/json"
+CSV_MEDIA_TYPE = "text/csv"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
 
 @router.get("/cpis/{cpi_id}/correction")
 async def get_cpi_correction(
     common: Annotated[Common, Depends()],
+    psql_conn: Annotated[
+        AsyncPsqlConnector | None, Depends(get_cpi_psql_connector)
+    ],
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+    dataset_version: Annotated[str | None, Depends(get_dataset_version)],
+    request: Request,
+    response: Response,
     cpi_id: Annotated[int, Path(gt=0)],
     year_a: Annotated[int, Query(gt=1900, le=datetime.today().year)],
     year_b: Annotated[int, Query(gt=1900, le=datetime.today().year)],
     amount: Annotated[float, Query(gt=0)],
 ) -> dict:
-    with PsqlConnector(
-        dbname=get_env_var("PSQL_DB_NAME", get_env_var("ENVIRONMENT_NAME")),
-        user=get_env_var(
-            "PSQL_DB_READ_ONLY_USER", get_env_var("ENVIRONMENT_NAME")
-        ),
-        password=get_env_var(
-            "PSQL_DB_READ_ONLY_PASSWORD", get_env_var("ENVIRONMENT_NAME")
-        ),
-        host=get_env_var("PSQL_DB_HOST", get_env_var("ENVIRONMENT_NAME")),
-        port=get_env_var("PSQL_DB_PORT", get_env_var("ENVIRONMENT_NAME")),
-    ) as psql_conn:
-        cpi_values_df = psql_conn.execute_query_return_df(
-            query=f"""
-                SELECT
-                    year,
-                    value
-                FROM
-                    enriched.fact_cpi_values
-                WHERE
-                    cpi_id = {cpi_id}
-                    AND (year = {year_a} OR year = {year_b})
-            """,
-        )
-        currency_df = psql_conn.execute_query_return_df(
-            query=f"""
+    not_modified_response = cache_by_dataset_version(
+        request, response, dataset_version
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    # The correction factor from year_a to year_b is the exponential of the difference of their log-indexes, precomputed
+    # by the enrichment (cf. fact_cpi_metrics.sql)
+    if cpi_snapshot is not None:
+        cpi_df = cpi_snapshot.get_cpi_df(cpi_id)
+        cpi_found = cpi_df.height > 0
+        currency = cpi_df[0, "currency_symbol"] if cpi_found else None
+        log_index_a = cpi_snapshot.get_cpi_log_index(cpi_id, year_a)
+        log_index_b = cpi_snapshot.get_cpi_log_index(cpi_id, year_b)
+    else:
+        # The metrics are left joined so that an unknown CPI (no row) can be told apart from a missing year (null)
+        correction_df = await psql_conn.execute_query_return_df(
+            query="""
                 SELECT
-                    countries.currency_symbol
+                    countries.currency_symbol,
+                    metrics_a.log_index AS log_index_a,
+                    metrics_b.log_index AS log_index_b
                 FROM
                     enriched.dim_cpis AS cpis
                 JOIN
                     enriched.dim_countries AS countries ON countries.id = cpis.country_id
+                LEFT JOIN
+                    enriched.fact_cpi_metrics AS metrics_a ON metrics_a.cpi_id = cpis.id AND metrics_a.year = :year_a
+                LEFT JOIN
+                    enriched.fact_cpi_metrics AS metrics_b ON metrics_b.cpi_id = cpis.id AND metrics_b.year = :year_b
                 WHERE
-                    cpis.id = {cpi_id}
+                    cpis.id = :cpi_id
             """,
+            params={"cpi_id": cpi_id, "year_a": year_a, "year_b": year_b},
+            prepared=True,
         )
-    currency = currency_df[0, 0]
-    year_a_cpi_value = cpi_values_df.filter(pl.col("year") == year_a).select(
-        pl.col("value")
-    )[0, 0]
-    year_b_cpi_value = cpi_values_df.filter(pl.col("year") == year_b).select(
-        pl.col("value")
-    )[0, 0]
-    corrected_amount = round(amount / year_a_cpi_value * year_b_cpi_value, 2)
-    inflation_rate = round(
-        (year_b_cpi_value - year_a_cpi_value) / year_a_cpi_value * 100, 2
-    )
+        cpi_found = correction_df.height > 0
+        currency, log_index_a, log_index_b = (
+            correction_df.row(0) if cpi_found else (None,) * 3
+        )
+    if not cpi_found:
+        raise HTTPException(status_code=404, detail=f"CPI {cpi_id} not found")
+    for year, log_index in [(year_a, log_index_a), (year_b, log_index_b)]:
+        if log_index is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"CPI {cpi_id} has no value for the year {year}",
+            )
+    correction_factor = math.exp(log_index_b - log_index_a)
+    corrected_amount = round(amount * correction_factor, 2)
+    inflation_rate = round((correction_factor - 1) * 100, 2)
     final_dict = {
         "corrected_amount": corrected_amount,
         "inflation_rate": inflation_rate,
         "currency": currency,
     }
     return final_dict
+
+
+async def read_request_body(request: Request, max_bytes: int) -> bytes:
+    """
+    Read the body of the <request>, answering a 413 as soon as its Content-Length or the bytes received exceed
+    <max_bytes>, instead of buffering it whole first.
+    """
+    too_large_exception = HTTPException(
+        status_code=413,
+        detail=f"The body can't be larger than {max_bytes} bytes",
+    )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit():
+        if int(content_length) > max_bytes:
+            raise too_large_exception
+    chunks = []
+    n_bytes = 0
+    async for chunk in request.stream():
+        n_bytes += len(chunk)
+        if n_bytes > max_bytes:
+            raise too_large_exception
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def read_batch_corrections(body: bytes, media_type: str) -> pl.DataFrame:
+    """
+    Read the (cpi_id, amount, year_a, year_b) rows of a batch of corrections sent as a JSON array of objects, a CSV
+    with a header or an Arrow IPC stream.
+    """
+    try:
+        if media_type == JSON_MEDIA_TYPE:
+            df = pl.read_json(body)
+        elif media_type == CSV_MEDIA_TYPE:
+            df = pl.read_csv(body)
+        elif media_type == ARROW_MEDIA_TYPE:
+            df = pl.read_ipc_stream(body)
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported media type {media_type}, expected {JSON_MEDIA_TYPE}, {CSV_MEDIA_TYPE} or {ARROW_MEDIA_TYPE}",
+            )
+        return df.select(
+            pl.col(column_name).cast(dtype, strict=True)
+            for column_name, dtype in BATCH_CORRECTIONS_SCHEMA.items()
+        )
+    except pl.exceptions.PolarsError as exception:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid corrections, expected the columns {', '.join(BATCH_CORRECTIONS_SCHEMA)}: {exception}",
+        )
+
+
+def correct_batch(
+    corrections_df: pl.DataFrame, log_indexes_df: pl.DataFrame
+) -> pl.DataFrame:
+    """
+    Correct the <corrections_df> amounts given the (cpi_id, year, log_index, currency_symbol) <log_indexes_df>, in the
+    same way and order as get_cpi_correction would one by one. The results of the CPIs or years without values are null.
+    """
+    return (
+        corrections_df.join(
+            log_indexes_df.select(
+                "cpi_id",
+                pl.col("year").alias("year_a"),
+                pl.col("log_index").alias("log_index_a"),
+                pl.col("currency_symbol").alias("currency"),
+            ),
+            on=["cpi_id", "year_a"],
+            how="left",
+        )
+        .join(
+            log_indexes_df.select(
+                "cpi_id",
+                pl.col("year").alias("year_b"),
+                pl.col("log_index").alias("log_index_b"),
+            ),
+            on=["cpi_id", "year_b"],
+            how="left",
+        )
+        .with_columns(
+            correction_factor=(
+                pl.col("log_index_b") - pl.col("log_index_a")
+            ).exp()
+        )
+        .select(
+            *BATCH_CORRECTIONS_SCHEMA,
+            corrected_amount=(
+                pl.col("amount") * pl.col("correction_factor")
+            ).round(2),
+            inflation_rate=((pl.col("correction_factor") - 1) * 100).round(2),
+            currency="currency",
+        )
+    )
+
+
+def write_batch_corrections(
+    df: pl.DataFrame, media_type: str
+) -> Iterator[bytes]:
+    """
+    Serialize the corrected <df> in the <media_type> of the request, chunk by chunk for JSON and CSV.
+    """
+    if media_type == ARROW_MEDIA_TYPE:
+        ipc_stream = io.BytesIO()
+        df.write_ipc_stream(ipc_stream)
+        yield ipc_stream.getvalue()
+        return
+
+    if media_type == JSON_MEDIA_TYPE:
+        yield b"["
+    for offset in range(0, df.height, BATCH_CORRECTIONS_CHUNK_ROWS):
+        chunk_df = df.slice(offset, BATCH_CORRECTIONS_CHUNK_ROWS)
+        if media_type == JSON_MEDIA_TYPE:
+            # The objects of the chunk, without the brackets of its array
+            separator = b"," if offset else b""
+            yield separator + chunk_df.write_json().encode()[1:-1]
+        else:
+            yield chunk_df.write_csv(include_header=offset == 0).encode()
+    if media_type == JSON_MEDIA_TYPE:
+        yield b"]"
+    elif df.height == 0:
+        yield df.write_csv().encode()
+
+
+@router.post("/cpis/correction/batch")
+async def get_cpi_correction_batch(
+    common: Annotated[Common, Depends()],
+    psql_conn: Annotated[
+        AsyncPsqlConnector | None, Depends(get_cpi_psql_connector)
+    ],
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+    request: Request,
+) -> StreamingResponse:
+    """
+    Correct many amounts at once, the body being a JSON array of {cpi_id, amount, year_a, year_b} objects, a CSV with
+    those columns or an Arrow IPC stream, depending on its Content-Type. The results (the same columns, plus
+    corrected_amount, inflation_rate and currency) are streamed back in the same format and order.
+
+    The log-indexes of all the CPIs involved are fetched at once and joined to the corrections, which are all computed
+    in a single vectorized pass. The parsing and the corrections run in the threadpool (as does the serialization,
+    through the synchronous iterator of the StreamingResponse), so that they don't block the event loop.
+    """
+    media_type = request.headers.get("content-type", JSON_MEDIA_TYPE)
+    media_type = media_type.split(";")[0].strip()
+    body = await read_request_body(request, MAX_BATCH_CORRECTIONS_BYTES)
+    corrections_df = await run_in_threadpool(
+        read_batch_corrections, body, media_type
+    )
+    if corrections_df.height > MAX_BATCH_CORRECTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_CORRECTIONS} corrections can be sent at once",
+        )
+
+    cpi_ids = corrections_df["cpi_id"].drop_nulls().unique().to_list()
+    if cpi_snapshot is not None:
+        log_indexes_df = cpi_snapshot.get_cpi_log_indexes_df(cpi_ids)
+    else:
+        log_indexes_df = await psql_conn.execute_query_return_df(
+            query="""
+                SELECT
+                    metrics.cpi_id,
+                    metrics.year,
+                    metrics.log_index,
+                    countries.currency_symbol
+                FROM
+                    enriched.fact_cpi_metrics AS metrics
+                JOIN
+                    enriched.dim_cpis AS cpis ON cpis.id = metrics.cpi_id
+                JOIN
+                    enriched.dim_countries AS countries ON countries.id = cpis.country_id
+                WHERE
+                    metrics.cpi_id = ANY(:cpi_ids)
+            """,
+            schema={
+                "cpi_id": pl.Int64,
+                "year": pl.Int64,
+                "log_index": pl.Float64,
+                "currency_symbol": pl.String,
+            },
+            params={"cpi_ids": cpi_ids},
+        )
+
+    corrected_df = await run_in_threadpool(
+        correct_batch, corrections_df, log_indexes_df
+    )
+    return StreamingResponse(
+        write_batch_corrections(corrected_df, media_type),
+        media_type=media_type,
+    )
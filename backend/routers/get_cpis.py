@@ -1,9 +1,15 @@
 from typing_extensions import Annotated
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, Request, Response
 
-from shared.environments_utils import get_env_var
-from shared.psql_connector import PsqlConnector
-from backend.routers.common import Common
+from shared.psql_connector import AsyncPsqlConnector
+from backend.cpi_snapshot import CpiSnapshot
+from backend.routers.common import (
+    Common,
+    cache_by_dataset_version,
+    get_dataset_version,
+    get_cpi_snapshot,
+    get_cpi_psql_connector,
+)
 
 
 router = APIRouter()
@@ -12,19 +18,24 @@ router = APIRouter()
 @router.get("/cpis")
 async def get_cpis(
     common: Annotated[Common, Depends()],
+    psql_conn: Annotated[
+        AsyncPsqlConnector | None, Depends(get_cpi_psql_connector)
+    ],
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+    dataset_version: Annotated[str | None, Depends(get_dataset_version)],
+    request: Request,
+    response: Response,
 ) -> dict:
-    with PsqlConnector(
-        dbname=get_env_var("PSQL_DB_NAME", get_env_var("ENVIRONMENT_NAME")),
-        user=get_env_var(
-            "PSQL_DB_READ_ONLY_USER", get_env_var("ENVIRONMENT_NAME")
-        ),
-        password=get_env_var(
-            "PSQL_DB_READ_ONLY_PASSWORD", get_env_var("ENVIRONMENT_NAME")
-        ),
-        host=get_env_var("PSQL_DB_HOST", get_env_var("ENVIRONMENT_NAME")),
-        port=get_env_var("PSQL_DB_PORT", get_env_var("ENVIRONMENT_NAME")),
-    ) as psql_conn:
-        df = psql_conn.execute_query_return_df(
+    not_modified_response = cache_by_dataset_version(
+        request, response, dataset_version
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    if cpi_snapshot is not None:
+        df = cpi_snapshot.cpis_df
+    else:
+        df = await psql_conn.execute_query_return_df(
             query="""
                 SELECT
                     cpis.id AS cpi_id,
@@ -35,6 +46,7 @@ async def get_cpis(
                 JOIN
                     enriched.dim_countries AS countries ON countries.id = cpis.country_id
             """,
+            prepared=True,
         )
     cpis_dict = {}
     for row in df.iter_rows(named=True):
@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing_extensions import Annotated
+from fastapi import Depends, APIRouter, Request, Response, Query
+import polars as pl
+
+from shared.psql_connector import AsyncPsqlConnector
+from backend.cpi_snapshot import CpiSnapshot
+from backend.routers.common import (
+    Common,
+    cache_by_dataset_version,
+    get_dataset_version,
+    get_cpi_snapshot,
+    get_cpi_psql_connector,
+)
+from backend.routers.get_cpi import format_cpi
+
+
+router = APIRouter()
+
+CPI_COLUMNS = [
+    "cpi_id",
+    "cpi_name",
+    "country_name",
+    "institution_name",
+    "currency_symbol",
+    "documentation_link",
+    "legal_mentions",
+]
+
+
+@router.get("/cpis/series")
+async def get_cpis_series(
+    common: Annotated[Common, Depends()],
+    psql_conn: Annotated[
+        AsyncPsqlConnector | None, Depends(get_cpi_psql_connector)
+    ],
+    cpi_snapshot: Annotated[CpiSnapshot | None, Depends(get_cpi_snapshot)],
+    dataset_version: Annotated[str | None, Depends(get_dataset_version)],
+    request: Request,
+    response: Response,
+    ids: Annotated[str, Query(pattern=r"^[1-9]\d*(,[1-9]\d*)*$")],
+    from_year: Annotated[
+        int | None, Query(alias="from", gt=1900, le=datetime.today().year)
+    ] = None,
+    to_year: Annotated[
+        int | None, Query(alias="to", gt=1900, le=datetime.today().year)
+    ] = None,
+) -> dict:
+    """
+    Return the CPIs <ids> (comma-separated), as get_cpi does for one of them, with their values from the year <from>
+    to the year <to> (both optional), keyed by cpi_id. The unknown CPIs are left out.
+    """
+    not_modified_response = cache_by_dataset_version(
+        request, response, dataset_version
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    cpi_ids = list(dict.fromkeys(int(cpi_id) for cpi_id in ids.split(",")))
+    # The bounds of the years, so that a single statement serves all the ranges
+    first_year = from_year if from_year is not None else 0
+    last_year = to_year if to_year is not None else datetime.today().year
+    year_range = pl.col("year").is_between(first_year, last_year)
+
+    if cpi_snapshot is not None:
+        cpis = [
+            (
+                cpi_snapshot.get_cpi_df(cpi_id),
+                cpi_snapshot.get_cpi_values_df(cpi_id).filter(year_range),
+            )
+            for cpi_id in cpi_ids
+        ]
+    else:
+        # The metadata and the values of all the CPIs are fetched by a single query, the metadata being repeated on
+        # each value
+        series_df = await psql_conn.execute_query_return_df(
+            query="""
+                SELECT
+                    cpis.id AS cpi_id,
+                    cpis.name AS cpi_name,
+                    countries.name AS country_name,
+                    cpis.institution_name,
+                    countries.currency_symbol,
+                    cpis.documentation_link,
+                    cpis.legal_mentions,
+                    metrics.year,
+                    metrics.value,
+                    metrics.yoy_rate
+                FROM
+                    enriched.dim_cpis AS cpis
+                JOIN
+                    enriched.dim_countries AS countries ON countries.id = cpis.country_id
+                LEFT JOIN
+                    enriched.fact_cpi_metrics AS metrics ON metrics.cpi_id = cpis.id
+                    AND metrics.year BETWEEN :first_year AND :last_year
+                WHERE
+                    cpis.id = ANY(:cpi_ids)
+                ORDER BY
+                    cpis.id,
+                    metrics.year
+            """,
+            params={
+                "cpi_ids": cpi_ids,
+                "first_year": first_year,
+                "last_year": last_year,
+            },
+        )
+        cpis = [
+            (
+                cpi_series_df.select(CPI_COLUMNS).head(1),
+                # The CPIs without values in the range have a single row, with null values
+                cpi_series_df.select("year", "value", "yoy_rate").drop_nulls(
+                    "year"
+                ),
+            )
+            for cpi_series_df in (
+                series_df.partition_by("cpi_id", maintain_order=True)
+                if series_df.height
+                else []
+            )
+        ]
+
+    return {
+        cpi_df[0, "cpi_id"]: format_cpi(cpi_df, cpi_values_df)
+        for cpi_df, cpi_values_df in cpis
+        if cpi_df.height
+    }
@@ -0,0 +1,116 @@
+from typing_extensions import Annotated
+from fastapi import Depends, APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from backend.routers.common import Common
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    common: Annotated[Common, Depends()],
+    request: Request,
+) -> str:
+    """
+    Expose the connection pool and projection cache metrics in the Prometheus text format, for scraping.
+    Like the other routes, it requires an API key since the pool internals are not meant to be public.
+    """
+    pool = request.app.state.psql_engine.pool
+    pool_stats = request.app.state.psql_pool_stats
+    metrics = [
+        (
+            "psql_pool_size",
+            "gauge",
+            "Number of connections the pool keeps open",
+            pool.size(),
+        ),
+        (
+            "psql_pool_checked_out",
+            "gauge",
+            "Number of connections currently checked out",
+            pool.checkedout(),
+        ),
+        (
+            "psql_pool_checked_in",
+            "gauge",
+            "Number of idle connections in the pool",
+            pool.checkedin(),
+        ),
+        (
+            "psql_pool_overflow",
+            "gauge",
+            "Number of connections opened beyond the pool size",
+            pool.overflow(),
+        ),
+        (
+            "psql_pool_waiters",
+            "gauge",
+            "Number of requests waiting for a connection",
+            pool_stats.waiters,
+        ),
+        (
+            "psql_pool_checkouts_total",
+            "counter",
+            "Number of connection checkouts",
+            pool_stats.checkouts,
+        ),
+        (
+            "psql_pool_wait_seconds_total",
+            "counter",
+            "Time spent waiting for a connection",
+            pool_stats.wait_seconds_total,
+        ),
+        (
+            "psql_pool_wait_seconds_max",
+            "gauge",
+            "Longest time spent waiting for a connection",
+            pool_stats.wait_seconds_max,
+        ),
+    ]
+    projection_cache = request.app.state.projection_cache
+    metrics += [
+        (
+            "projection_cache_entries",
+            "gauge",
+            "Number of projections held by the in-process cache",
+            len(projection_cache),
+        ),
+        (
+            "projection_cache_hits_total",
+            "counter",
+            "Number of projections served from the in-process cache",
+            projection_cache.hits,
+        ),
+        (
+            "projection_cache_shared_hits_total",
+            "counter",
+            "Number of projections served from the shared cache",
+            projection_cache.shared_hits,
+        ),
+        (
+            "projection_cache_misses_total",
+            "counter",
+            "Number of projections computed",
+            projection_cache.misses,
+        ),
+        (
+            "projection_cache_evictions_total",
+            "counter",
+            "Number of projections evicted from the in-process cache because it was full",
+            projection_cache.evictions,
+        ),
+        (
+            "projection_cache_expirations_total",
+            "counter",
+            "Number of projections expired from the in-process cache",
+            projection_cache.expirations,
+        ),
+    ]
+    lines = []
+    for name, metric_type, description, value in metrics:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,14 +1,297 @@
 import datetime
 from typing_extensions import Annotated
-from fastapi import Depends, APIRouter, Query
+from fastapi import Depends, APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field, model_validator
 import polars as pl
 from dateutil.relativedelta import relativedelta
 
-from backend.routers.common import Common
+from backend.projection_cache import ProjectionCache
+from backend.routers.common import Common, get_projection_cache
 
 START_DATE = datetime.date(2000, 1, 1)
 START_ASSET_PRICE = 1
 START_CPI_VALUE = 100
+MAX_BATCH_SCENARIOS = 1000
+
+# Columns of the transactions summed up into the projection results
+TOTALS_COLUMNS = [
+    "spending",
+    "buy_in_fee",
+    "total_custodian_fee",
+    "sell_out_fee",
+    "net_pre_tax_final_value",
+    "net_pre_tax_final_gain",
+    "tax_on_gains",
+    "net_post_tax_final_gain",
+    "net_post_tax_final_value",
+]
+
+
+def project_recurring_investment_dates(
+    recurring_investment_frequency, investment_duration_yrs
+):
+    if recurring_investment_frequency == "weekly":
+        recurring_investment_dates = [
+            START_DATE + datetime.timedelta(weeks=i)
+            for i in range(1, investment_duration_yrs * 52)
+        ]
+    elif recurring_investment_frequency == "monthly":
+        recurring_investment_dates = [
+            START_DATE + relativedelta(months=i)
+            for i in range(0, investment_duration_yrs * 12)
+        ]
+    elif recurring_investment_frequency == "yearly":
+        recurring_investment_dates = [
+            START_DATE + relativedelta(years=i)
+            for i in range(0, investment_duration_yrs)
+        ]
+    return recurring_investment_dates
+
+
+def get_projection_years(investment_duration_yrs):
+    return range(
+        START_DATE.year,
+        (START_DATE + relativedelta(years=investment_duration_yrs)).year,
+    )
+
+
+def get_sell_out_date(investment_duration_yrs):
+    return (
+        START_DATE
+        + relativedelta(years=investment_duration_yrs)
+        - relativedelta(days=1)
+    )
+
+
+def get_closing_price_dates(
+    recurring_investment_dates, investment_duration_yrs
+):
+    # Prices are only projected for the dates that are actually read:
+    # buy-ins, year ends (custodian fees) and the sell-out date
+    return (
+        [START_DATE]
+        + recurring_investment_dates
+        + [
+            datetime.date(year, 12, 31)
+            for year in get_projection_years(investment_duration_yrs)
+        ]
+        + [get_sell_out_date(investment_duration_yrs)]
+    )
+
+
+def project_closing_prices(dates, annual_gross_yield):
+    closing_prices = (
+        pl.DataFrame({"date": dates}, schema={"date": pl.Date})
+        .unique()
+        .sort("date")
+    )
+
+    closing_prices = closing_prices.with_columns(
+        price_start_year=START_ASSET_PRICE
+        * (1 + annual_gross_yield / 100)
+        ** (pl.col("date").dt.year() - START_DATE.year),
+    )
+
+    # Columnar equivalent of get_daily_closing_price(), operation for
+    # operation so that the prices are numerically identical
+    closing_prices = closing_prices.with_columns(
+        n_days_in_year=pl.when(pl.col("date").dt.is_leap_year())
+        .then(365)
+        .otherwise(364),
+        n_days_ytd=pl.col("date").dt.ordinal_day() - 1,
+    )
+
+    closing_prices = closing_prices.with_columns(
+        price=pl.col("price_start_year")
+        * (
+            1
+            + annual_gross_yield
+            / 100
+            * pl.col("n_days_ytd")
+            / pl.col("n_days_in_year")
+        ),
+    )
+
+    return closing_prices.drop("n_days_in_year", "n_days_ytd")
+
+
+def project_transactions_custodian_fees(transactions, closing_prices):
+    """
+    Add the total_custodian_fee of each transaction (i.e. buy-in) of <transactions>, which holds the
+    annual_gross_yield, investment_duration_yrs and annual_custody_fee_pct of its scenario, from the <closing_prices> of
+    each annual_gross_yield. Shared by PersonalFinanceProject and PersonalFinanceProjectBatch.
+    """
+    ## Annual custodian fees
+    # The assets bought in a year are charged the fee at the end of that year
+    # and of every following year of the projection, i.e. on the sum of those
+    # year-end prices: a reverse cumulative sum of the year-end prices, computed
+    # once per (annual_gross_yield, investment_duration_yrs) and joined once
+    investment_durations_yrs = (
+        transactions["investment_duration_yrs"].unique().to_list()
+    )
+    year_end_dates = pl.concat(
+        [
+            pl.DataFrame(
+                {
+                    "investment_duration_yrs": investment_duration_yrs,
+                    "date": [
+                        datetime.date(year, 12, 31)
+                        for year in get_projection_years(
+                            investment_duration_yrs
+                        )
+                    ],
+                },
+                schema={
+                    "investment_duration_yrs": pl.Int64,
+                    "date": pl.Date,
+                },
+            )
+            for investment_duration_yrs in investment_durations_yrs
+        ]
+    )
+
+    held_year_end_prices = (
+        transactions.select("annual_gross_yield", "investment_duration_yrs")
+        .unique()
+        .join(year_end_dates, on="investment_duration_yrs")
+        .join(closing_prices, on=["annual_gross_yield", "date"])
+        .sort("annual_gross_yield", "investment_duration_yrs", "date")
+        .select(
+            "annual_gross_yield",
+            "investment_duration_yrs",
+            buy_in_year=pl.col("date").dt.year(),
+            held_year_end_prices_sum=pl.col("price")
+            .cum_sum(reverse=True)
+            .over("annual_gross_yield", "investment_duration_yrs"),
+        )
+    )
+
+    transactions = transactions.with_columns(
+        buy_in_year=pl.col("date").dt.year(),
+    ).join(
+        held_year_end_prices,
+        on=["annual_gross_yield", "investment_duration_yrs", "buy_in_year"],
+        how="left",
+    )
+
+    transactions = transactions.with_columns(
+        total_custodian_fee=pl.col("n_assets_acquired")
+        * pl.col("held_year_end_prices_sum")
+        * pl.col("annual_custody_fee_pct")
+        / 100,
+    )
+
+    return transactions.drop("buy_in_year", "held_year_end_prices_sum")
+
+
+def project_inflation(annual_inflation_rate, investment_duration_yrs):
+    # Inflation correction factor
+    final_cpi_value = START_CPI_VALUE * (
+        1 + annual_inflation_rate / 100
+    ) ** len(get_projection_years(investment_duration_yrs))
+    inflation_correction_factor = START_CPI_VALUE / final_cpi_value
+    return final_cpi_value, inflation_correction_factor
+
+
+def summarize_projection_results(
+    totals, final_cpi_value, inflation_correction_factor
+):
+    return {
+        # amount spent
+        "total_spending": round(totals["spending"], 2),
+        # net_post_tax_final_value
+        "net_post_tax_final_value": round(
+            totals["net_post_tax_final_value"], 2
+        ),
+        "net_post_tax_inflation_corrected_final_value": round(
+            totals["net_post_tax_final_value"] * inflation_correction_factor,
+            2,
+        ),
+        # net_post_tax_final_gain
+        "net_post_tax_final_gain": round(totals["net_post_tax_final_gain"], 2),
+        "net_post_tax_inflation_corrected_final_gain": round(
+            totals["net_post_tax_final_gain"] * inflation_correction_factor,
+            2,
+        ),
+        # total_inflation_pct
+        "total_inflation_pct": round(
+            (final_cpi_value - START_CPI_VALUE) / START_CPI_VALUE * 100,
+            2,
+        ),
+        # net_post_tax_yield
+        "net_post_tax_yield": round(
+            totals["net_post_tax_final_gain"] / totals["spending"] * 100,
+            2,
+        ),
+        "net_post_tax_inflation_corrected_yield": round(
+            totals["net_post_tax_final_gain"]
+            * inflation_correction_factor
+            / totals["spending"]
+            * 100,
+            2,
+        ),
+    }
+
+
+def detail_projection_results(
+    initial_amount_invested,
+    recurring_investment_frequency,
+    recurring_investment_amount,
+    annual_gross_yield,
+    totals,
+    inflation_correction_factor,
+):
+    return {
+        # spending
+        "initial_amount_invested": round(initial_amount_invested, 2),
+        "recurring_investment_frequency": recurring_investment_frequency,
+        "recurring_investment_amount": round(recurring_investment_amount, 2),
+        "total_spending": round(totals["spending"], 2),
+        # buy in fees
+        "buy_in_fees": round(totals["buy_in_fee"], 2),
+        # annual yield
+        "annual_gross_yield": round(annual_gross_yield, 2),
+        # annual custodian fee
+        "total_custodian_fees": round(totals["total_custodian_fee"], 2),
+        # sell out fees
+        "sell_out_fees": round(totals["sell_out_fee"], 2),
+        "inflation_corrected_sell_out_fees": round(
+            totals["sell_out_fee"] * inflation_correction_factor,
+            2,
+        ),
+        # net_pre_tax_final_value
+        "net_pre_tax_final_value": round(totals["net_pre_tax_final_value"], 2),
+        "net_pre_tax_inflation_corrected_final_value": round(
+            totals["net_pre_tax_final_value"] * inflation_correction_factor,
+            2,
+        ),
+        # net_pre_tax_final_gain
+        "net_pre_tax_final_gain": round(totals["net_pre_tax_final_gain"], 2),
+        "net_pre_tax_inflation_corrected_final_gain": round(
+            totals["net_pre_tax_final_gain"] * inflation_correction_factor,
+            2,
+        ),
+        # tax on gains
+        "tax_on_gains": round(totals["tax_on_gains"], 2),
+        "inflation_corrected_tax_on_gains": round(
+            totals["tax_on_gains"] * inflation_correction_factor,
+            2,
+        ),
+        # net_post_tax_final_gain
+        "net_post_tax_final_gain": round(totals["net_post_tax_final_gain"], 2),
+        "net_post_tax_inflation_corrected_final_gain": round(
+            totals["net_post_tax_final_gain"] * inflation_correction_factor,
+            2,
+        ),
+        # net_post_tax_final_value
+        "net_post_tax_final_value": round(
+            totals["net_post_tax_final_value"], 2
+        ),
+        "net_post_tax_inflation_corrected_final_value": round(
+            totals["net_post_tax_final_value"] * inflation_correction_factor,
+            2,
+        ),
+    }
 
 
 class PersonalFinanceProject:
@@ -36,6 +319,9 @@ class PersonalFinanceProject:
         self.investment_sell_out_fee_pct = investment_sell_out_fee_pct
         self.tax_on_gains_pct = tax_on_gains_pct
 
+        self.recurring_investment_dates = (
+            self.project_recurring_investment_dates()
+        )
         self.closing_prices = self.project_closing_prices()
         self.transactions = self.project_transactions()
         self.final_cpi_value, self.inflation_correction_factor = (
@@ -55,39 +341,19 @@ class PersonalFinanceProject:
         )
         return closing_price
 
-    def project_closing_prices(self):
-        closing_prices = pl.DataFrame()
-        closing_prices = closing_prices.with_columns(
-            date=pl.date_range(
-                start=START_DATE,
-                end=START_DATE
-                + relativedelta(years=self.investment_duration_yrs)
-                - relativedelta(days=1),
-                interval="1d",
-            ),
-        )
-
-        closing_prices = closing_prices.with_columns(
-            price_start_year=START_ASSET_PRICE
-            * (1 + self.annual_gross_yield / 100)
-            ** (pl.col("date").dt.year() - START_DATE.year),
+    def project_recurring_investment_dates(self):
+        return project_recurring_investment_dates(
+            self.recurring_investment_frequency, self.investment_duration_yrs
         )
 
-        closing_prices = closing_prices.hstack(
-            pl.DataFrame(
-                {
-                    "price": [
-                        self.get_daily_closing_price(
-                            row["date"], row["price_start_year"]
-                        )
-                        for row in closing_prices.to_dicts()
-                    ],
-                }
-            )
+    def project_closing_prices(self):
+        return project_closing_prices(
+            get_closing_price_dates(
+                self.recurring_investment_dates, self.investment_duration_yrs
+            ),
+            self.annual_gross_yield,
         )
 
-        return closing_prices
-
     def project_transactions_buy_ins(self):
         # Buy-ins
         transactions = pl.DataFrame(
@@ -97,22 +363,6 @@ class PersonalFinanceProject:
             }
         )
 
-        if self.recurring_investment_frequency == "weekly":
-            recurring_investment_dates = [
-                START_DATE + datetime.timedelta(weeks=i)
-                for i in range(1, self.investment_duration_yrs * 52)
-            ]
-        elif self.recurring_investment_frequency == "monthly":
-            recurring_investment_dates = [
-                START_DATE + relativedelta(months=i)
-                for i in range(0, self.investment_duration_yrs * 12)
-            ]
-        elif self.recurring_investment_frequency == "yearly":
-            recurring_investment_dates = [
-                START_DATE + relativedelta(years=i)
-                for i in range(0, self.investment_duration_yrs)
-            ]
-
         # recurring_investment_amount is not concerned by inflation correction:
         # it's a fixed currency amount (fixed by the investor), even though its
         # purchasing power will change -- the DCA amount is not meant to change
@@ -120,9 +370,9 @@ class PersonalFinanceProject:
         transactions = transactions.vstack(
             pl.DataFrame(
                 {
-                    "date": recurring_investment_dates,
+                    "date": self.recurring_investment_dates,
                     "spending": [self.recurring_investment_amount]
-                    * len(recurring_investment_dates),
+                    * len(self.recurring_investment_dates),
                 }
             ),
         )
@@ -151,48 +401,35 @@ class PersonalFinanceProject:
         return transactions
 
     def project_transactions_custodian_fees(self, transactions):
-        ## Annual custodian fees
-        transactions = transactions.with_columns(total_custodian_fee=0)
-        for year in range(
-            START_DATE.year,
-            (
-                START_DATE + relativedelta(years=self.investment_duration_yrs)
-            ).year,
-        ):
-            closing_price_year = (
-                self.closing_prices.filter(
-                    pl.col("date") == datetime.date(year, 12, 31)
-                )
-                .select("price")
-                .item()
-            )
-
-            transactions = transactions.with_columns(
-                total_custodian_fee=pl.when(
-                    pl.col("date").dt.year() <= year,
-                )
-                .then(
-                    pl.col("total_custodian_fee")
-                    + pl.col("n_assets_acquired")
-                    * closing_price_year
-                    * self.annual_custody_fee_pct
-                    / 100,
-                )
-                .otherwise(
-                    pl.col("total_custodian_fee"),
+        return project_transactions_custodian_fees(
+            transactions.with_columns(
+                annual_gross_yield=pl.lit(
+                    self.annual_gross_yield, dtype=pl.Float64
                 ),
-            )
-
-            return transactions
+                investment_duration_yrs=pl.lit(
+                    self.investment_duration_yrs, dtype=pl.Int64
+                ),
+                annual_custody_fee_pct=pl.lit(
+                    self.annual_custody_fee_pct, dtype=pl.Float64
+                ),
+            ),
+            self.closing_prices.with_columns(
+                annual_gross_yield=pl.lit(
+                    self.annual_gross_yield, dtype=pl.Float64
+                ),
+            ),
+        ).drop(
+            "annual_gross_yield",
+            "investment_duration_yrs",
+            "annual_custody_fee_pct",
+        )
 
     def project_transactions_sell_outs(self, transactions):
         # Sell outs
         transactions = transactions.with_columns(
             sell_price=self.closing_prices.filter(
                 pl.col("date")
-                == START_DATE
-                + relativedelta(years=self.investment_duration_yrs)
-                - relativedelta(days=1),
+                == get_sell_out_date(self.investment_duration_yrs),
             ).select("price")
         )
 
@@ -248,134 +485,306 @@ class PersonalFinanceProject:
         return transactions
 
     def project_inflation(self):
-        # Inflation correction factor
-        final_cpi_value = START_CPI_VALUE * (
-            1 + self.annual_inflation_rate / 100
-        ) ** len(
-            range(
-                START_DATE.year,
-                (
-                    START_DATE
-                    + relativedelta(years=self.investment_duration_yrs)
-                ).year,
-            )
+        return project_inflation(
+            self.annual_inflation_rate, self.investment_duration_yrs
         )
-        inflation_correction_factor = START_CPI_VALUE / final_cpi_value
-        return final_cpi_value, inflation_correction_factor
 
     def summarize_projection_results(self):
-        return {
-            # amount spent
-            "total_spending": round(self.transactions["spending"].sum(), 2),
-            # net_post_tax_final_value
-            "net_post_tax_final_value": round(
-                self.transactions["net_post_tax_final_value"].sum(), 2
-            ),
-            "net_post_tax_inflation_corrected_final_value": round(
-                self.transactions["net_post_tax_final_value"].sum()
-                * self.inflation_correction_factor,
-                2,
-            ),
-            # net_post_tax_final_gain
-            "net_post_tax_final_gain": round(
-                self.transactions["net_post_tax_final_gain"].sum(), 2
-            ),
-            "net_post_tax_inflation_corrected_final_gain": round(
-                self.transactions["net_post_tax_final_gain"].sum()
-                * self.inflation_correction_factor,
-                2,
-            ),
-            # total_inflation_pct
-            "total_inflation_pct": round(
-                (self.final_cpi_value - START_CPI_VALUE)
-                / START_CPI_VALUE
-                * 100,
-                2,
-            ),
-            # net_post_tax_yield
-            "net_post_tax_yield": round(
-                self.transactions["net_post_tax_final_gain"].sum()
-                / self.transactions["spending"].sum()
-                * 100,
-                2,
-            ),
-            "net_post_tax_inflation_corrected_yield": round(
-                self.transactions["net_post_tax_final_gain"].sum()
-                * self.inflation_correction_factor
-                / self.transactions["spending"].sum()
-                * 100,
-                2,
-            ),
-        }
+        return summarize_projection_results(
+            self.transactions.select(TOTALS_COLUMNS).sum().row(0, named=True),
+            self.final_cpi_value,
+            self.inflation_correction_factor,
+        )
 
     def detail_projection_results(self):
+        return detail_projection_results(
+            self.initial_amount_invested,
+            self.recurring_investment_frequency,
+            self.recurring_investment_amount,
+            self.annual_gross_yield,
+            self.transactions.select(TOTALS_COLUMNS).sum().row(0, named=True),
+            self.inflation_correction_factor,
+        )
+
+
+class PersonalFinanceProjectBatch:
+    """
+    Projection of many scenarios (i.e. sets of PersonalFinanceProject parameters) in a single columnar pass.
+
+    The transactions of all the scenarios are stacked in one frame keyed by scenario_id. The date grids are built once per
+    (recurring_investment_frequency, investment_duration_yrs) and the closing prices once per annual_gross_yield, then
+    shared by all the scenarios using them. The results are the same as those of one PersonalFinanceProject per scenario.
+    """
+
+    def __init__(self, scenarios):
+        self.scenarios = pl.DataFrame(
+            scenarios,
+            schema={
+                "initial_amount_invested": pl.Int64,
+                "recurring_investment_frequency": pl.String,
+                "recurring_investment_amount": pl.Int64,
+                "investment_duration_yrs": pl.Int64,
+                "annual_gross_yield": pl.Float64,
+                "annual_inflation_rate": pl.Float64,
+                "investment_buy_in_fee_pct": pl.Float64,
+                "annual_custody_fee_pct": pl.Float64,
+                "investment_sell_out_fee_pct": pl.Float64,
+                "tax_on_gains_pct": pl.Float64,
+            },
+        ).with_row_index("scenario_id")
+
+        self.recurring_investment_dates = (
+            self.project_recurring_investment_dates()
+        )
+        self.closing_prices = self.project_closing_prices()
+        self.transactions = self.project_transactions()
+
+        self.projections = self.summarize_and_detail_projection_results()
+
+    def project_recurring_investment_dates(self):
         return {
-            # spending
-            "initial_amount_invested": round(self.initial_amount_invested, 2),
-            "recurring_investment_frequency": self.recurring_investment_frequency,
-            "recurring_investment_amount": round(
-                self.recurring_investment_amount, 2
-            ),
-            "total_spending": round(self.transactions["spending"].sum(), 2),
-            # buy in fees
-            "buy_in_fees": round(self.transactions["buy_in_fee"].sum(), 2),
-            # annual yield
-            "annual_gross_yield": round(self.annual_gross_yield, 2),
-            # annual custodian fee
-            "total_custodian_fees": round(
-                self.transactions["total_custodian_fee"].sum(), 2
-            ),
-            # sell out fees
-            "sell_out_fees": round(self.transactions["sell_out_fee"].sum(), 2),
-            "inflation_corrected_sell_out_fees": round(
-                self.transactions["sell_out_fee"].sum()
-                * self.inflation_correction_factor,
-                2,
-            ),
-            # net_pre_tax_final_value
-            "net_pre_tax_final_value": round(
-                self.transactions["net_pre_tax_final_value"].sum(), 2
-            ),
-            "net_pre_tax_inflation_corrected_final_value": round(
-                self.transactions["net_pre_tax_final_value"].sum()
-                * self.inflation_correction_factor,
-                2,
-            ),
-            # net_pre_tax_final_gain
-            "net_pre_tax_final_gain": round(
-                self.transactions["net_pre_tax_final_gain"].sum(), 2
-            ),
-            "net_pre_tax_inflation_corrected_final_gain": round(
-                self.transactions["net_pre_tax_final_gain"].sum()
-                * self.inflation_correction_factor,
-                2,
-            ),
-            # tax on gains
-            "tax_on_gains": round(self.transactions["tax_on_gains"].sum(), 2),
-            "inflation_corrected_tax_on_gains": round(
-                self.transactions["tax_on_gains"].sum()
-                * self.inflation_correction_factor,
-                2,
-            ),
-            # net_post_tax_final_gain
-            "net_post_tax_final_gain": round(
-                self.transactions["net_post_tax_final_gain"].sum(), 2
-            ),
-            "net_post_tax_inflation_corrected_final_gain": round(
-                self.transactions["net_post_tax_final_gain"].sum()
-                * self.inflation_correction_factor,
-                2,
+            (
+                recurring_investment_frequency,
+                investment_duration_yrs,
+            ): project_recurring_investment_dates(
+                recurring_investment_frequency, investment_duration_yrs
+            )
+            for recurring_investment_frequency, investment_duration_yrs in (
+                self.scenarios.select(
+                    "recurring_investment_frequency", "investment_duration_yrs"
+                )
+                .unique()
+                .iter_rows()
+            )
+        }
+
+    def project_closing_prices(self):
+        # The prices are projected once per yield, on the union of the dates
+        # read by the scenarios having that yield
+        closing_prices = []
+        for (annual_gross_yield,), scenarios in self.scenarios.partition_by(
+            "annual_gross_yield", as_dict=True
+        ).items():
+            dates = set()
+            for recurring_investment_frequency, investment_duration_yrs in (
+                scenarios.select(
+                    "recurring_investment_frequency", "investment_duration_yrs"
+                )
+                .unique()
+                .iter_rows()
+            ):
+                dates.update(
+                    get_closing_price_dates(
+                        self.recurring_investment_dates[
+                            (
+                                recurring_investment_frequency,
+                                investment_duration_yrs,
+                            )
+                        ],
+                        investment_duration_yrs,
+                    )
+                )
+            closing_prices.append(
+                project_closing_prices(
+                    list(dates), annual_gross_yield
+                ).with_columns(
+                    annual_gross_yield=pl.lit(
+                        annual_gross_yield, dtype=pl.Float64
+                    ),
+                )
+            )
+        return pl.concat(closing_prices).select(
+            "annual_gross_yield", "date", "price"
+        )
+
+    def project_transactions_buy_ins(self):
+        # Buy-ins: the initial investment (buy_in_index 0) followed by the
+        # recurring investments, in the order of PersonalFinanceProject
+        buy_in_dates = pl.concat(
+            [
+                pl.DataFrame(
+                    {"date": [START_DATE] + recurring_investment_dates},
+                    schema={"date": pl.Date},
+                ).select(
+                    recurring_investment_frequency=pl.lit(
+                        recurring_investment_frequency, dtype=pl.String
+                    ),
+                    investment_duration_yrs=pl.lit(
+                        investment_duration_yrs, dtype=pl.Int64
+                    ),
+                    buy_in_index=pl.int_range(pl.len(), dtype=pl.Int64),
+                    date=pl.col("date"),
+                )
+                for (
+                    recurring_investment_frequency,
+                    investment_duration_yrs,
+                ), recurring_investment_dates in self.recurring_investment_dates.items()
+            ]
+        )
+
+        transactions = self.scenarios.join(
+            buy_in_dates,
+            on=["recurring_investment_frequency", "investment_duration_yrs"],
+        )
+
+        transactions = transactions.with_columns(
+            spending=pl.when(pl.col("buy_in_index") == 0)
+            .then(pl.col("initial_amount_invested"))
+            .otherwise(pl.col("recurring_investment_amount")),
+        )
+
+        transactions = transactions.with_columns(
+            buy_in_fee=pl.col("spending")
+            * pl.col("investment_buy_in_fee_pct")
+            / 100,
+        )
+
+        transactions = transactions.with_columns(
+            spending_on_asset=pl.col("spending") - pl.col("buy_in_fee"),
+        )
+
+        transactions = transactions.join(
+            self.closing_prices.rename({"price": "buy_price"}),
+            on=["annual_gross_yield", "date"],
+        )
+
+        transactions = transactions.with_columns(
+            n_assets_acquired=pl.col("spending_on_asset") / pl.col("buy_price"),
+        )
+
+        return transactions
+
+    def project_transactions_custodian_fees(self, transactions):
+        return project_transactions_custodian_fees(
+            transactions, self.closing_prices
+        )
+
+    def project_transactions_sell_outs(self, transactions):
+        # Sell outs
+        investment_durations_yrs = (
+            self.scenarios["investment_duration_yrs"].unique().to_list()
+        )
+        transactions = transactions.join(
+            pl.DataFrame(
+                {
+                    "investment_duration_yrs": investment_durations_yrs,
+                    "sell_out_date": [
+                        get_sell_out_date(investment_duration_yrs)
+                        for investment_duration_yrs in investment_durations_yrs
+                    ],
+                },
+                schema={
+                    "investment_duration_yrs": pl.Int64,
+                    "sell_out_date": pl.Date,
+                },
             ),
-            # net_post_tax_final_value
-            "net_post_tax_final_value": round(
-                self.transactions["net_post_tax_final_value"].sum(), 2
+            on="investment_duration_yrs",
+        )
+
+        transactions = transactions.join(
+            self.closing_prices.rename(
+                {"date": "sell_out_date", "price": "sell_price"}
             ),
-            "net_post_tax_inflation_corrected_final_value": round(
-                self.transactions["net_post_tax_final_value"].sum()
-                * self.inflation_correction_factor,
-                2,
+            on=["annual_gross_yield", "sell_out_date"],
+        )
+
+        transactions = transactions.with_columns(
+            gross_final_value=pl.col("n_assets_acquired")
+            * pl.col("sell_price"),
+        )
+
+        transactions = transactions.with_columns(
+            gross_final_gain=pl.col("gross_final_value") - pl.col("spending"),
+        )
+
+        transactions = transactions.with_columns(
+            sell_out_fee=pl.col("gross_final_value")
+            * pl.col("investment_sell_out_fee_pct")
+            / 100,
+        )
+
+        transactions = transactions.with_columns(
+            net_pre_tax_final_value=pl.col("gross_final_value")
+            - pl.col("sell_out_fee")
+            - pl.col("total_custodian_fee"),
+        )
+
+        transactions = transactions.with_columns(
+            # gain is computed using spending and not spending_on_asset because
+            # that's the French fisc method
+            net_pre_tax_final_gain=pl.col("net_pre_tax_final_value")
+            - pl.col("spending"),
+        )
+
+        transactions = transactions.with_columns(
+            tax_on_gains=pl.when(pl.col("net_pre_tax_final_gain") < 0)
+            .then(0)
+            .otherwise(
+                pl.col("net_pre_tax_final_gain")
+                * pl.col("tax_on_gains_pct")
+                / 100,
             ),
-        }
+        )
+
+        transactions = transactions.with_columns(
+            net_post_tax_final_gain=pl.col("net_pre_tax_final_gain")
+            - pl.col("tax_on_gains"),
+            net_post_tax_final_value=pl.col("net_pre_tax_final_value")
+            - pl.col("tax_on_gains"),
+        )
+
+        return transactions
+
+    def project_transactions(self):
+        transactions = self.project_transactions_buy_ins()
+        transactions = self.project_transactions_custodian_fees(transactions)
+        transactions = self.project_transactions_sell_outs(transactions)
+        # Joins do not keep the row order, which the sums depend on
+        return transactions.sort("scenario_id", "buy_in_index")
+
+    def summarize_and_detail_projection_results(self):
+        projections = []
+        offset = 0
+        for scenario in self.scenarios.iter_rows(named=True):
+            n_transactions = 1 + len(
+                self.recurring_investment_dates[
+                    (
+                        scenario["recurring_investment_frequency"],
+                        scenario["investment_duration_yrs"],
+                    )
+                ]
+            )
+            # Summing each scenario's (zero-copy) slice, rather than grouping
+            # by scenario_id, gives the exact same floating-point sums as
+            # PersonalFinanceProject
+            totals = (
+                self.transactions.slice(offset, n_transactions)
+                .select(TOTALS_COLUMNS)
+                .sum()
+                .row(0, named=True)
+            )
+            offset += n_transactions
+
+            final_cpi_value, inflation_correction_factor = project_inflation(
+                scenario["annual_inflation_rate"],
+                scenario["investment_duration_yrs"],
+            )
+            projections.append(
+                {
+                    "summary": summarize_projection_results(
+                        totals, final_cpi_value, inflation_correction_factor
+                    ),
+                    "details": detail_projection_results(
+                        scenario["initial_amount_invested"],
+                        scenario["recurring_investment_frequency"],
+                        scenario["recurring_investment_amount"],
+                        scenario["annual_gross_yield"],
+                        totals,
+                        inflation_correction_factor,
+                    ),
+                }
+            )
+        return projections
 
 
 router = APIRouter()
@@ -384,6 +793,9 @@ router = APIRouter()
 @router.get("/project_personal_finances")
 async def project_personal_finances(
     common: Annotated[Common, Depends()],
+    projection_cache: Annotated[
+        ProjectionCache | None, Depends(get_projection_cache)
+    ],
     initial_amount_invested: Annotated[int, Query(ge=0)],
     recurring_investment_frequency: Annotated[
         str, Query(pattern="^(weekly|monthly|yearly)$")
@@ -397,20 +809,93 @@ async def project_personal_finances(
     investment_sell_out_fee_pct: Annotated[float, Query(ge=0, le=100)],
     tax_on_gains_pct: Annotated[float, Query(ge=0, le=100)],
 ) -> dict:
-    project = PersonalFinanceProject(
-        initial_amount_invested,
-        recurring_investment_frequency,
-        recurring_investment_amount,
-        investment_duration_yrs,
-        annual_gross_yield,
-        annual_inflation_rate,
-        investment_buy_in_fee_pct,
-        annual_custody_fee_pct,
-        investment_sell_out_fee_pct,
-        tax_on_gains_pct,
-    )
+    if initial_amount_invested == 0 and recurring_investment_amount == 0:
+        raise HTTPException(
+            status_code=422,
+            detail="initial_amount_invested and recurring_investment_amount can't both be 0",
+        )
 
-    return {
+    # The projection is a pure function of its parameters
+    parameters = {
+        "initial_amount_invested": initial_amount_invested,
+        "recurring_investment_frequency": recurring_investment_frequency,
+        "recurring_investment_amount": recurring_investment_amount,
+        "investment_duration_yrs": investment_duration_yrs,
+        "annual_gross_yield": annual_gross_yield,
+        "annual_inflation_rate": annual_inflation_rate,
+        "investment_buy_in_fee_pct": investment_buy_in_fee_pct,
+        "annual_custody_fee_pct": annual_custody_fee_pct,
+        "investment_sell_out_fee_pct": investment_sell_out_fee_pct,
+        "tax_on_gains_pct": tax_on_gains_pct,
+    }
+    if projection_cache is not None:
+        cache_key = ProjectionCache.make_key(**parameters)
+        result = await projection_cache.get(cache_key)
+        if result is not None:
+            return result
+
+    project = PersonalFinanceProject(**parameters)
+    result = {
         "summary": project.summary,
         "details": project.details,
     }
+
+    if projection_cache is not None:
+        await projection_cache.set(cache_key, result)
+    return result
+
+
+class PersonalFinanceScenario(BaseModel):
+    initial_amount_invested: Annotated[int, Field(ge=0)]
+    recurring_investment_frequency: Annotated[
+        str, Field(pattern="^(weekly|monthly|yearly)$")
+    ]
+    recurring_investment_amount: Annotated[int, Field(ge=0)]
+    investment_duration_yrs: Annotated[int, Field(gt=0)]
+    annual_gross_yield: float
+    annual_inflation_rate: float
+    investment_buy_in_fee_pct: Annotated[float, Field(ge=0, le=100)]
+    annual_custody_fee_pct: Annotated[float, Field(ge=0, le=100)]
+    investment_sell_out_fee_pct: Annotated[float, Field(ge=0, le=100)]
+    tax_on_gains_pct: Annotated[float, Field(ge=0, le=100)]
+
+    @model_validator(mode="after")
+    def check_spending(self):
+        # The yields are relative to the total spending
+        if (
+            self.initial_amount_invested == 0
+            and self.recurring_investment_amount == 0
+        ):
+            raise ValueError(
+                "initial_amount_invested and recurring_investment_amount can't both be 0"
+            )
+        return self
+
+
+class PersonalFinanceScenarios(BaseModel):
+    scenarios: Annotated[
+        list[PersonalFinanceScenario],
+        Field(min_length=1, max_length=MAX_BATCH_SCENARIOS),
+    ]
+
+
+# Declared with def so that FastAPI runs this CPU-bound path operation in
+# its threadpool instead of blocking the event loop
+@router.post("/project_personal_finances/batch")
+def project_personal_finances_batch(
+    common: Annotated[Common, Depends()],
+    personal_finance_scenarios: PersonalFinanceScenarios,
+) -> dict:
+    """
+    Project many scenarios at once, returning the summary and details of each scenario in the order they were sent.
+    """
+    project_batch = PersonalFinanceProjectBatch(
+        [
+            scenario.model_dump()
+            for scenario in personal_finance_scenarios.scenarios
+        ]
+    )
+
+    return {
+        "projections": project_batch.projections,
+    }
@@ -1,9 +1,14 @@
+import io
+import json
+import math
 import os
 import sys
 from unittest.mock import patch
 from fastapi.testclient import TestClient
+import asyncio
 import inspect
 import polars as pl
+import pytest
 
 # Allow imports from the parent directory
 dir_abspath = os.path.dirname(__file__)
@@ -11,8 +16,22 @@ grandparent_dir_abspath = os.path.dirname(os.path.dirname(dir_abspath))
 sys.path.append(grandparent_dir_abspath)
 
 from shared.environments_utils import get_env_var
+from shared.psql_connector import create_async_psql_engine, read_copied_csv
 from backend.main import app
-
+from backend.cpi_snapshot import CpiSnapshot
+from backend.dataset_version import DatasetVersion
+from backend.projection_cache import ProjectionCache
+from backend.routers.common import (
+    get_cpi_snapshot,
+    get_cpi_psql_connector,
+    get_dataset_version,
+    get_projection_cache,
+)
+from backend.routers.project_personal_finances import (
+    PersonalFinanceProject,
+    PersonalFinanceProjectBatch,
+)
+from backend.projection_sweep import parse_parameter_range, sweep
 
 client = TestClient(app)
 
@@ -22,30 +41,34 @@ class MockPsqlConnector:
     Mocked PsqlConnector class used for testing to control the DB query results returned to each path operation function.
     """
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self):
         pass
 
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
-
-    def execute_query_return_df(self, query: str):
+    async def execute_query_return_df(
+        self, query: str, schema=None, params=None, prepared=False
+    ):
         caller_function = inspect.stack()[1].function
 
         if caller_function == "get_cpi_correction":
-            if "fact_cpi_values" in query:
+            # The parameters are bound, not formatted into the query
+            if "fact_cpi_metrics" in query and params["cpi_id"] == 1:
+                log_indexes = {2020: math.log(100.0), 2021: math.log(110.0)}
                 return pl.DataFrame(
                     {
-                        "year": [2020, 2021],
-                        "value": [100.0, 110.0],
+                        "currency_symbol": ["USD"],
+                        "log_index_a": [log_indexes.get(params["year_a"])],
+                        "log_index_b": [log_indexes.get(params["year_b"])],
                     }
                 )
-            elif "dim_countries" in query:
+        elif caller_function == "get_cpi_correction_batch":
+            # The large results are read through COPY, not as prepared statements
+            if "fact_cpi_metrics" in query and not prepared:
                 return pl.DataFrame(
                     {
-                        "currency_symbol": ["USD"],
+                        "cpi_id": [1, 1],
+                        "year": [2020, 2021],
+                        "log_index": [math.log(100.0), math.log(110.0)],
+                        "currency_symbol": ["USD", "USD"],
                     }
                 )
         elif caller_function == "get_cpis":
@@ -57,6 +80,23 @@ class MockPsqlConnector:
                         "country_name": ["Country 1", "Country 2", "Country 3"],
                     }
                 )
+        elif caller_function == "get_cpis_series":
+            if "fact_cpi_metrics" in query and not prepared:
+                # CPI 3 has no values in the range
+                return pl.DataFrame(
+                    {
+                        "cpi_id": [1, 1, 3],
+                        "cpi_name": ["CPI 1", "CPI 1", "CPI 3"],
+                        "country_name": ["Country 1", "Country 1", "Country 3"],
+                        "institution_name": ["Institution 1"] * 3,
+                        "currency_symbol": ["$", "$", "€"],
+                        "documentation_link": ["http://example.com"] * 3,
+                        "legal_mentions": ["Legal mentions"] * 3,
+                        "year": [2020, 2021, None],
+                        "value": [100.0, 110.0, None],
+                        "yoy_rate": [None, 10.0, None],
+                    }
+                )
         elif caller_function == "get_cpi":
             if "dim_cpis" in query:
                 return pl.DataFrame(
@@ -70,17 +110,20 @@ class MockPsqlConnector:
                         "legal_mentions": ["Legal mentions"],
                     }
                 )
-            elif "fact_cpi_values" in query:
+            elif "fact_cpi_metrics" in query:
                 return pl.DataFrame(
                     {
                         "year": [2020, 2021],
                         "value": [100.0, 110.0],
+                        "yoy_rate": [None, 10.0],
                     }
                 )
         return pl.DataFrame()
 
 
-@patch("backend.routers.get_cpis.PsqlConnector", new=MockPsqlConnector)
+@patch.dict(
+    app.dependency_overrides, {get_cpi_psql_connector: MockPsqlConnector}
+)
 def test_get_cpis():
     """
     Test the get_cpis path operation.
@@ -109,7 +152,9 @@ def test_get_cpis():
     assert json_response == expected_data
 
 
-@patch("backend.routers.get_cpi.PsqlConnector", new=MockPsqlConnector)
+@patch.dict(
+    app.dependency_overrides, {get_cpi_psql_connector: MockPsqlConnector}
+)
 def test_get_cpi():
     """
     Test the get_cpis/{cpi_id} path operation.
@@ -143,8 +188,8 @@ def test_get_cpi():
     }
 
 
-@patch(
-    "backend.routers.get_cpi_correction.PsqlConnector", new=MockPsqlConnector
+@patch.dict(
+    app.dependency_overrides, {get_cpi_psql_connector: MockPsqlConnector}
 )
 def test_get_cpi_correction():
     """
@@ -177,6 +222,530 @@ def test_get_cpi_correction():
     }
 
 
+def test_get_cpis_conditional_requests():
+    """
+    Test the HTTP caching of the CPI path operations: their responses carry the dataset version as ETag, and the
+    requests whose If-None-Match matches it are answered with a 304 without any DB query.
+    """
+
+    class FailingPsqlConnector:
+        async def execute_query_return_df(
+            self, query: str, schema=None, params=None, prepared=False
+        ):
+            raise AssertionError("No query should be run")
+
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+
+    with patch.dict(
+        app.dependency_overrides,
+        {
+            get_cpi_psql_connector: MockPsqlConnector,
+            get_dataset_version: lambda: "v1",
+        },
+    ):
+        response = client.get("/cpis", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"v1"'
+    assert response.headers["cache-control"] == "public, max-age=300"
+
+    with patch.dict(
+        app.dependency_overrides,
+        {
+            get_cpi_psql_connector: FailingPsqlConnector,
+            get_dataset_version: lambda: "v1",
+        },
+    ):
+        for path in [
+            "/cpis",
+            "/cpis/1",
+            "/cpis/1/correction?year_a=2020&year_b=2021&amount=100.0",
+        ]:
+            not_modified_response = client.get(
+                path, headers={**headers, "if-none-match": 'W/"v0", "v1"'}
+            )
+            assert not_modified_response.status_code == 304
+            assert not_modified_response.headers["etag"] == '"v1"'
+            assert not_modified_response.content == b""
+
+    # A new dataset version invalidates the client's copy
+    with patch.dict(
+        app.dependency_overrides,
+        {
+            get_cpi_psql_connector: MockPsqlConnector,
+            get_dataset_version: lambda: "v2",
+        },
+    ):
+        modified_response = client.get(
+            "/cpis", headers={**headers, "if-none-match": '"v1"'}
+        )
+    assert modified_response.status_code == 200
+    assert modified_response.headers["etag"] == '"v2"'
+    assert modified_response.json() == response.json()
+
+
+def test_get_cpi_from_snapshot():
+    """
+    Test the get_cpis/{cpi_id} and get_cpis/{cpi_id}/correction path operations in snapshot mode.
+
+    The responses must be the same as in test_get_cpi() and test_get_cpi_correction(), without any DB connector involved
+    (none is overridden: opening one would fail since the app's lifespan, which creates the engine, isn't run).
+    """
+
+    cpi_snapshot = CpiSnapshot(engine=None)
+    cpi_snapshot.update(
+        cpis_df=pl.DataFrame(
+            {
+                "cpi_id": [1, 2],
+                "cpi_name": ["CPI 1", "CPI 2"],
+                "country_name": ["Country 1", "Country 2"],
+                "institution_name": ["Institution 1", "Institution 2"],
+                "currency_symbol": ["$", "USD"],
+                "documentation_link": ["http://example.com"] * 2,
+                "legal_mentions": ["Legal mentions"] * 2,
+            }
+        ),
+        cpi_values_df=pl.DataFrame(
+            {
+                "cpi_id": [2, 1, 1],
+                "year": [2020, 2021, 2020],
+                "value": [50.0, 110.0, 100.0],
+                "yoy_rate": [None, 10.0, None],
+                "log_index": [math.log(50.0), math.log(110.0), math.log(100.0)],
+            }
+        ),
+        dataset_version="v1",
+    )
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+
+    with patch.dict(
+        app.dependency_overrides,
+        {get_cpi_snapshot: lambda: cpi_snapshot},
+    ):
+        cpi_response = client.get("/cpis/1", headers=headers)
+        correction_response = client.get(
+            "/cpis/1/correction?year_a=2020&year_b=2021&amount=100.0",
+            headers=headers,
+        )
+
+    assert cpi_response.status_code == 200
+    assert cpi_response.headers["etag"] == '"v1"'
+    assert cpi_response.json() == {
+        "cpi_id": 1,
+        "cpi_name": "CPI 1",
+        "country_name": "Country 1",
+        "institution_name": "Institution 1",
+        "currency_symbol": "$",
+        "documentation_link": "http://example.com",
+        "legal_mentions": "Legal mentions",
+        "cpi_values": {"2020": 100.0, "2021": 110.0},
+        "annual_inflation_rates": {"2021": 10.0},
+    }
+    assert correction_response.status_code == 200
+    assert correction_response.json() == {
+        "corrected_amount": 110.0,
+        "inflation_rate": 10.0,
+        "currency": "$",
+    }
+
+
+def test_get_cpi_correction_not_found():
+    """
+    Test that get_cpis/{cpi_id}/correction answers a 404 naming the unknown CPI or the year without value, from the DB
+    and in snapshot mode.
+    """
+
+    cpi_snapshot = CpiSnapshot(engine=None)
+    cpi_snapshot.update(
+        cpis_df=pl.DataFrame(
+            {
+                "cpi_id": [1],
+                "cpi_name": ["CPI 1"],
+                "country_name": ["Country 1"],
+                "institution_name": ["Institution 1"],
+                "currency_symbol": ["USD"],
+                "documentation_link": ["http://example.com"],
+                "legal_mentions": ["Legal mentions"],
+            }
+        ),
+        cpi_values_df=pl.DataFrame(
+            {
+                "cpi_id": [1, 1],
+                "year": [2020, 2021],
+                "value": [100.0, 110.0],
+                "yoy_rate": [None, 10.0],
+                "log_index": [math.log(100.0), math.log(110.0)],
+            }
+        ),
+        dataset_version="v1",
+    )
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+
+    for dependency_overrides in [
+        {get_cpi_psql_connector: MockPsqlConnector},
+        {get_cpi_snapshot: lambda: cpi_snapshot},
+    ]:
+        with patch.dict(app.dependency_overrides, dependency_overrides):
+            unknown_cpi_response = client.get(
+                "/cpis/2/correction?year_a=2020&year_b=2021&amount=100.0",
+                headers=headers,
+            )
+            missing_year_response = client.get(
+                "/cpis/1/correction?year_a=2020&year_b=2019&amount=100.0",
+                headers=headers,
+            )
+
+        assert unknown_cpi_response.status_code == 404
+        assert unknown_cpi_response.json() == {"detail": "CPI 2 not found"}
+        assert missing_year_response.status_code == 404
+        assert missing_year_response.json() == {
+            "detail": "CPI 1 has no value for the year 2019"
+        }
+
+
+def test_read_copied_csv_keys_dtype():
+    """
+    Test that the integer keys read from the database (integer and bigint columns) are Int64, as in the CPI snapshot
+    and the batch corrections, so that they can be joined without casts.
+    """
+
+    # (name, type OID) of the columns, as in a cursor description
+    description = [("cpi_id", 23), ("year", 23), ("log_index", 701)]
+    df = read_copied_csv(b"1,2020,4.6\n", description)
+    empty_df = read_copied_csv(b"", description)
+
+    assert df.schema == empty_df.schema
+    assert df.schema == {
+        "cpi_id": pl.Int64,
+        "year": pl.Int64,
+        "log_index": pl.Float64,
+    }
+
+
+def test_get_cpi_correction_batch():
+    """
+    Test the get_cpis/correction/batch path operation, from the DB and in snapshot mode, with JSON, CSV and Arrow
+    bodies.
+
+    Each result must be the same as the response of get_cpis/{cpi_id}/correction, in the order of the corrections sent,
+    those without CPI values being null.
+    """
+
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+    corrections = [
+        {"cpi_id": 1, "amount": 100.0, "year_a": 2020, "year_b": 2021},
+        {"cpi_id": 1, "amount": 55.0, "year_a": 2021, "year_b": 2020},
+        {"cpi_id": 2, "amount": 100.0, "year_a": 2020, "year_b": 2021},
+    ]
+    expected_results = [
+        {
+            **corrections[0],
+            "corrected_amount": 110.0,
+            "inflation_rate": 10.0,
+            "currency": "USD",
+        },
+        {
+            **corrections[1],
+            "corrected_amount": 50.0,
+            "inflation_rate": -9.09,
+            "currency": "USD",
+        },
+        {
+            **corrections[2],
+            "corrected_amount": None,
+            "inflation_rate": None,
+            "currency": None,
+        },
+    ]
+
+    with patch.dict(
+        app.dependency_overrides, {get_cpi_psql_connector: MockPsqlConnector}
+    ):
+        json_response = client.post(
+            "/cpis/correction/batch", json=corrections, headers=headers
+        )
+        csv_response = client.post(
+            "/cpis/correction/batch",
+            content=pl.DataFrame(corrections).write_csv(),
+            headers={**headers, "content-type": "text/csv"},
+        )
+        invalid_response = client.post(
+            "/cpis/correction/batch",
+            json=[{"cpi_id": 1, "amount": 100.0}],
+            headers=headers,
+        )
+    assert json_response.status_code == 200
+    assert json_response.json() == expected_results
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    assert pl.read_csv(csv_response.content).to_dicts() == expected_results
+    assert invalid_response.status_code == 422
+
+    cpi_snapshot = CpiSnapshot(engine=None)
+    cpi_snapshot.update(
+        cpis_df=pl.DataFrame({"cpi_id": [1], "currency_symbol": ["USD"]}),
+        cpi_values_df=pl.DataFrame(
+            {
+                "cpi_id": [1, 1],
+                "year": [2020, 2021],
+                "value": [100.0, 110.0],
+                "yoy_rate": [None, 10.0],
+                "log_index": [math.log(100.0), math.log(110.0)],
+            }
+        ),
+    )
+    arrow_stream = io.BytesIO()
+    pl.DataFrame(corrections).write_ipc_stream(arrow_stream)
+    with patch.dict(
+        app.dependency_overrides, {get_cpi_snapshot: lambda: cpi_snapshot}
+    ):
+        arrow_response = client.post(
+            "/cpis/correction/batch",
+            content=arrow_stream.getvalue(),
+            headers={
+                **headers,
+                "content-type": "application/vnd.apache.arrow.stream",
+            },
+        )
+    assert arrow_response.status_code == 200
+    assert (
+        pl.read_ipc_stream(arrow_response.content).to_dicts()
+        == expected_results
+    )
+
+    # The bodies too large are rejected on their Content-Length, or while streamed when they have none
+    with patch.dict(
+        app.dependency_overrides, {get_cpi_snapshot: lambda: cpi_snapshot}
+    ), patch(
+        "backend.routers.get_cpi_correction.MAX_BATCH_CORRECTIONS_BYTES", 64
+    ):
+        too_large_response = client.post(
+            "/cpis/correction/batch", json=corrections, headers=headers
+        )
+        too_large_streamed_response = client.post(
+            "/cpis/correction/batch",
+            content=(
+                json.dumps(correction).encode() for correction in corrections
+            ),
+            headers=headers,
+        )
+    assert too_large_response.status_code == 413
+    assert too_large_streamed_response.status_code == 413
+    assert "content-length" not in too_large_streamed_response.request.headers
+
+
+def test_get_cpis_series():
+    """
+    Test the get_cpis/series path operation, from the DB and in snapshot mode.
+
+    Each CPI of the response must be the same as the response of get_cpis/{cpi_id}, restricted to the requested years,
+    the unknown CPIs being left out.
+    """
+
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+    cpi_1 = {
+        "cpi_id": 1,
+        "cpi_name": "CPI 1",
+        "country_name": "Country 1",
+        "institution_name": "Institution 1",
+        "currency_symbol": "$",
+        "documentation_link": "http://example.com",
+        "legal_mentions": "Legal mentions",
+        "cpi_values": {"2020": 100.0, "2021": 110.0},
+        "annual_inflation_rates": {"2021": 10.0},
+    }
+
+    with patch.dict(
+        app.dependency_overrides, {get_cpi_psql_connector: MockPsqlConnector}
+    ):
+        response = client.get("/cpis/series?ids=1,3,4", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "1": cpi_1,
+        "3": {
+            **cpi_1,
+            "cpi_id": 3,
+            "cpi_name": "CPI 3",
+            "country_name": "Country 3",
+            "currency_symbol": "€",
+            "cpi_values": {},
+            "annual_inflation_rates": {},
+        },
+    }
+
+    cpi_snapshot = CpiSnapshot(engine=None)
+    cpi_snapshot.update(
+        cpis_df=pl.DataFrame(
+            {
+                key: [value]
+                for key, value in cpi_1.items()
+                if key not in ["cpi_values", "annual_inflation_rates"]
+            }
+        ),
+        cpi_values_df=pl.DataFrame(
+            {
+                "cpi_id": [1, 1, 1],
+                "year": [2019, 2020, 2021],
+                "value": [95.0, 100.0, 110.0],
+                "yoy_rate": [None, 5.263, 10.0],
+                "log_index": [math.log(95.0), math.log(100.0), math.log(110.0)],
+            }
+        ),
+    )
+    with patch.dict(
+        app.dependency_overrides, {get_cpi_snapshot: lambda: cpi_snapshot}
+    ):
+        snapshot_response = client.get(
+            "/cpis/series?ids=1,4&from=2020", headers=headers
+        )
+        invalid_response = client.get("/cpis/series?ids=1,a", headers=headers)
+    assert snapshot_response.status_code == 200
+    assert snapshot_response.json() == {
+        "1": {
+            **cpi_1,
+            "annual_inflation_rates": {"2020": 5.26, "2021": 10.0},
+        }
+    }
+    assert invalid_response.status_code == 422
+
+
+def test_cpi_snapshot_listener_reconnects():
+    """
+    Test that the listener of the enrichment notifications reconnects, on a dedicated connection, after failing to
+    connect and after losing its connection, and that it requests a refresh once reconnected.
+    """
+
+    class MockListenConnection:
+        def __init__(self):
+            self.termination_listeners = []
+
+        def add_termination_listener(self, callback):
+            self.termination_listeners.append(callback)
+
+        async def add_listener(self, channel, callback):
+            pass
+
+        def is_closed(self):
+            return False
+
+        def terminate(self):
+            pass
+
+        def lose(self):
+            for callback in self.termination_listeners:
+                callback(self)
+
+    connections = []
+
+    async def mock_connect(**kwargs):
+        if not connections:
+            connections.append(None)
+            raise OSError("Connection refused")
+        connections.append(MockListenConnection())
+        return connections[-1]
+
+    async def listen():
+        cpi_snapshot = CpiSnapshot(
+            engine=create_async_psql_engine("db", "user", "pw", "host", "5432")
+        )
+        listener = asyncio.create_task(
+            cpi_snapshot.listen_for_refresh_notifications()
+        )
+        # 1st attempt fails, 2nd one listens
+        while len(connections) < 2:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        refresh_requested_on_connect = cpi_snapshot._refresh_requested.is_set()
+        connections[-1].lose()
+        while len(connections) < 3:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        listener.cancel()
+        return (
+            refresh_requested_on_connect,
+            cpi_snapshot._refresh_requested.is_set(),
+        )
+
+    with patch("backend.dataset_version.asyncpg.connect", mock_connect), patch(
+        "backend.dataset_version.LISTEN_RETRY_MIN_SECONDS", 0
+    ):
+        refresh_requested_on_connect, refresh_requested_on_reconnect = (
+            asyncio.run(listen())
+        )
+
+    assert len(connections) == 3
+    assert not refresh_requested_on_connect
+    assert refresh_requested_on_reconnect
+
+
+def test_dataset_version_refresh():
+    """
+    Test that the dataset version is reloaded as soon as the enrichment notifies its end, without waiting for the
+    periodic refresh, and that it's cleared rather than kept stale when it can't be read.
+    """
+
+    versions = ["v1", "v2", ConnectionError("Connection refused")]
+    dataset_version = DatasetVersion(engine=None)
+    values_on_notification = []
+
+    async def mock_fetch_dataset_version(engine):
+        fetched.set()
+        version = versions.pop(0)
+        if isinstance(version, Exception):
+            raise version
+        return version
+
+    async def mock_listen(engine, refresh_requested):
+        # The enrichment ends twice
+        for _ in range(2):
+            values_on_notification.append(dataset_version.value)
+            fetched.clear()
+            refresh_requested.set()
+            await fetched.wait()
+        values_on_notification.append(dataset_version.value)
+        await asyncio.Event().wait()
+
+    async def refresh():
+        await dataset_version.load()
+        refresh_task = asyncio.create_task(
+            dataset_version.refresh_forever(refresh_interval_seconds=3600)
+        )
+        while len(values_on_notification) < 3:
+            await asyncio.sleep(0)
+        refresh_task.cancel()
+
+    fetched = asyncio.Event()
+    with patch(
+        "backend.dataset_version.fetch_dataset_version",
+        mock_fetch_dataset_version,
+    ), patch(
+        "backend.dataset_version.listen_for_refresh_notifications",
+        mock_listen,
+    ):
+        asyncio.run(refresh())
+
+    assert values_on_notification == ["v1", "v2", None]
+
+
 def test_project_personal_finances():
     initial_amount_invested = 0
     recurring_investment_frequency = "monthly"
@@ -204,13 +773,13 @@ def test_project_personal_finances():
     expected_response = {
         "summary": {
             "total_spending": 312000,
-            "net_post_tax_final_value": 874703.49,
-            "net_post_tax_inflation_corrected_final_value": 522704.68,
-            "net_post_tax_final_gain": 562703.49,
-            "net_post_tax_inflation_corrected_final_gain": 336259.95,
+            "net_post_tax_final_value": 859152.22,
+            "net_post_tax_inflation_corrected_final_value": 513411.57,
+            "net_post_tax_final_gain": 547152.22,
+            "net_post_tax_inflation_corrected_final_gain": 326966.83,
             "total_inflation_pct": 67.34,
-            "net_post_tax_yield": 180.35,
-            "net_post_tax_inflation_corrected_yield": 107.78,
+            "net_post_tax_yield": 175.37,
+            "net_post_tax_inflation_corrected_yield": 104.8,
         },
         "details": {
             "initial_amount_invested": 0,
@@ -219,20 +788,339 @@ def test_project_personal_finances():
             "total_spending": 312000,
             "buy_in_fees": 1092.0,
             "annual_gross_yield": 8.0,
-            "total_custodian_fees": 24.93,
+            "total_custodian_fees": 18806.24,
             "sell_out_fees": 4983.01,
             "inflation_corrected_sell_out_fees": 2977.74,
-            "net_pre_tax_final_value": 991594.08,
-            "net_pre_tax_inflation_corrected_final_value": 592556.08,
-            "net_pre_tax_final_gain": 679594.08,
-            "net_pre_tax_inflation_corrected_final_gain": 406111.35,
-            "tax_on_gains": 116890.59,
-            "inflation_corrected_tax_on_gains": 69851.4,
-            "net_post_tax_final_gain": 562703.49,
-            "net_post_tax_inflation_corrected_final_gain": 336259.95,
-            "net_post_tax_final_value": 874703.49,
-            "net_post_tax_inflation_corrected_final_value": 522704.68,
+            "net_pre_tax_final_value": 972812.77,
+            "net_pre_tax_inflation_corrected_final_value": 581332.76,
+            "net_pre_tax_final_gain": 660812.77,
+            "net_pre_tax_inflation_corrected_final_gain": 394888.02,
+            "tax_on_gains": 113660.55,
+            "inflation_corrected_tax_on_gains": 67921.19,
+            "net_post_tax_final_gain": 547152.22,
+            "net_post_tax_inflation_corrected_final_gain": 326966.83,
+            "net_post_tax_final_value": 859152.22,
+            "net_post_tax_inflation_corrected_final_value": 513411.57,
         },
     }
 
     assert json_response == expected_response
+
+
+def test_project_personal_finances_cache():
+    """
+    Test that the /project_personal_finances results are cached by normalized parameters, with LRU eviction and
+    expiration.
+    """
+
+    params = {
+        "initial_amount_invested": 0,
+        "recurring_investment_frequency": "monthly",
+        "recurring_investment_amount": 1000,
+        "investment_duration_yrs": 26,
+        "annual_gross_yield": 8,
+        "annual_inflation_rate": 2,
+        "investment_buy_in_fee_pct": 0.35,
+        "annual_custody_fee_pct": 0.2,
+        "investment_sell_out_fee_pct": 0.5,
+        "tax_on_gains_pct": 17.2,
+    }
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+    projection_cache = ProjectionCache(max_size=2)
+
+    with patch.dict(
+        app.dependency_overrides,
+        {get_projection_cache: lambda: projection_cache},
+    ):
+        response = client.get(
+            "/project_personal_finances", params=params, headers=headers
+        )
+        # Same parameters, written differently
+        with patch(
+            "backend.routers.project_personal_finances.PersonalFinanceProject"
+        ) as mock_project:
+            cached_response = client.get(
+                "/project_personal_finances",
+                params={**params, "annual_gross_yield": "8.0"},
+                headers=headers,
+            )
+        assert not mock_project.called
+        for annual_gross_yield in [6, 7]:
+            client.get(
+                "/project_personal_finances",
+                params={**params, "annual_gross_yield": annual_gross_yield},
+                headers=headers,
+            )
+
+    assert cached_response.status_code == 200
+    assert cached_response.json() == response.json()
+    assert projection_cache.hits == 1
+    assert projection_cache.misses == 3
+    # The least recently used projection (8) was evicted
+    assert len(projection_cache) == 2
+    assert projection_cache.evictions == 1
+
+    expiring_cache = ProjectionCache(ttl_seconds=0)
+    asyncio.run(expiring_cache.set("key", {"summary": {}}))
+    assert asyncio.run(expiring_cache.get("key")) is None
+    assert expiring_cache.expirations == 1
+
+
+def test_project_closing_prices():
+    """
+    Test that the closing prices are only projected for the dates that are read (buy-ins, year ends, sell-out) and that they match get_daily_closing_price() exactly, leap years included.
+    """
+
+    project = PersonalFinanceProject(
+        initial_amount_invested=1000,
+        recurring_investment_frequency="yearly",
+        recurring_investment_amount=100,
+        investment_duration_yrs=5,
+        annual_gross_yield=7.3,
+        annual_inflation_rate=2,
+        investment_buy_in_fee_pct=0.35,
+        annual_custody_fee_pct=0.2,
+        investment_sell_out_fee_pct=0.5,
+        tax_on_gains_pct=17.2,
+    )
+
+    # 5 yearly buy-ins (the first one being the initial investment) and 5 year ends, the last one being the sell-out date
+    assert project.closing_prices.height == 10
+    assert project.closing_prices["price"].to_list() == [
+        project.get_daily_closing_price(row["date"], row["price_start_year"])
+        for row in project.closing_prices.to_dicts()
+    ]
+
+
+def test_project_transactions_custodian_fees():
+    """
+    Test that the custodian fees are charged at the end of every year an asset is held, on weekly contributions over 45
+    years, against a straightforward per-year computation.
+    """
+
+    project = PersonalFinanceProject(
+        initial_amount_invested=1000,
+        recurring_investment_frequency="weekly",
+        recurring_investment_amount=50,
+        investment_duration_yrs=45,
+        annual_gross_yield=6.5,
+        annual_inflation_rate=2,
+        investment_buy_in_fee_pct=0.35,
+        annual_custody_fee_pct=0.3,
+        investment_sell_out_fee_pct=0.5,
+        tax_on_gains_pct=17.2,
+    )
+
+    year_end_prices = {
+        row["date"].year: row["price"]
+        for row in project.closing_prices.filter(
+            (pl.col("date").dt.month() == 12)
+            & (pl.col("date").dt.day() == 31)
+        ).iter_rows(named=True)
+    }
+    assert len(year_end_prices) == 45
+    expected_custodian_fees = [
+        sum(
+            row["n_assets_acquired"]
+            * price
+            * project.annual_custody_fee_pct
+            / 100
+            for year, price in year_end_prices.items()
+            if year >= row["date"].year
+        )
+        for row in project.transactions.iter_rows(named=True)
+    ]
+
+    assert project.transactions["total_custodian_fee"].to_list() == (
+        pytest.approx(expected_custodian_fees, rel=1e-12)
+    )
+    # An asset bought in the last year is only charged once
+    last_transaction = project.transactions.row(-1, named=True)
+    assert last_transaction["total_custodian_fee"] == pytest.approx(
+        last_transaction["n_assets_acquired"]
+        * year_end_prices[max(year_end_prices)]
+        * project.annual_custody_fee_pct
+        / 100
+    )
+
+
+def test_project_personal_finances_batch():
+    """
+    Test that the batch path operation returns, for each scenario and in order, the same projection as the single path
+    operation.
+    """
+
+    scenarios = [
+        {
+            "initial_amount_invested": 0,
+            "recurring_investment_frequency": "monthly",
+            "recurring_investment_amount": 1000,
+            "investment_duration_yrs": 26,
+            "annual_gross_yield": 8,
+            "annual_inflation_rate": 2,
+            "investment_buy_in_fee_pct": 0.35,
+            "annual_custody_fee_pct": 0.2,
+            "investment_sell_out_fee_pct": 0.5,
+            "tax_on_gains_pct": 17.2,
+        },
+        {
+            "initial_amount_invested": 5000,
+            "recurring_investment_frequency": "weekly",
+            "recurring_investment_amount": 50,
+            "investment_duration_yrs": 10,
+            "annual_gross_yield": -3.5,
+            "annual_inflation_rate": 3,
+            "investment_buy_in_fee_pct": 1,
+            "annual_custody_fee_pct": 0.5,
+            "investment_sell_out_fee_pct": 0,
+            "tax_on_gains_pct": 30,
+        },
+        {
+            "initial_amount_invested": 1000,
+            "recurring_investment_frequency": "yearly",
+            "recurring_investment_amount": 100,
+            "investment_duration_yrs": 26,
+            "annual_gross_yield": 8,
+            "annual_inflation_rate": 0,
+            "investment_buy_in_fee_pct": 0,
+            "annual_custody_fee_pct": 0,
+            "investment_sell_out_fee_pct": 0.5,
+            "tax_on_gains_pct": 17.2,
+        },
+    ]
+    headers = {
+        "x-api-key": get_env_var(
+            "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+        ).split(",")[0],
+    }
+
+    response = client.post(
+        "/project_personal_finances/batch",
+        json={"scenarios": scenarios},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "projections": [
+            client.get(
+                "/project_personal_finances",
+                params=scenario,
+                headers=headers,
+            ).json()
+            for scenario in scenarios
+        ]
+    }
+
+    # A scenario without any spending has no yield, it's rejected rather than failing the whole batch
+    response = client.post(
+        "/project_personal_finances/batch",
+        json={
+            "scenarios": scenarios
+            + [
+                {
+                    **scenarios[0],
+                    "initial_amount_invested": 0,
+                    "recurring_investment_amount": 0,
+                }
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 422
+
+
+def test_projection_sweep(tmp_path):
+    """
+    Test that the sweep projects each scenario of the parameter grid once, with the results of the batch projection.
+    """
+
+    assert parse_parameter_range("0:1:0.1", float) == [
+        0.0,
+        0.1,
+        0.2,
+        0.3,
+        0.4,
+        0.5,
+        0.6,
+        0.7,
+        0.8,
+        0.9,
+        1.0,
+    ]
+    assert parse_parameter_range("weekly, yearly", str) == [
+        "weekly",
+        "yearly",
+    ]
+
+    parameter_ranges = {
+        "initial_amount_invested": [1000],
+        "recurring_investment_frequency": ["weekly", "monthly", "yearly"],
+        "recurring_investment_amount": [100],
+        "investment_duration_yrs": parse_parameter_range("1:10:3", int),
+        "annual_gross_yield": [0.0, 8.0],
+        "annual_inflation_rate": [2.0],
+        "investment_buy_in_fee_pct": [0.35],
+        "annual_custody_fee_pct": [0.2],
+        "investment_sell_out_fee_pct": [0.5],
+        "tax_on_gains_pct": [17.2],
+    }
+
+    n_scenarios = sweep(
+        parameter_ranges, str(tmp_path), chunk_size=5, n_workers=2
+    )
+
+    results = pl.read_parquet(tmp_path / "*.parquet").sort("scenario_id")
+    assert n_scenarios == results.height == 3 * 4 * 2
+    assert results["scenario_id"].to_list() == list(range(n_scenarios))
+    scenarios = results.select(parameter_ranges.keys()).to_dicts()
+    assert results["net_post_tax_final_value"].to_list() == [
+        projection["summary"]["net_post_tax_final_value"]
+        for projection in PersonalFinanceProjectBatch(scenarios).projections
+    ]
+
+    # The grid would include scenarios without any spending
+    with pytest.raises(ValueError):
+        sweep(
+            {
+                **parameter_ranges,
+                "initial_amount_invested": [0, 1000],
+                "recurring_investment_amount": [100, 0],
+            },
+            str(tmp_path),
+        )
+
+
+def test_get_metrics():
+    """
+    Test the metrics path operation.
+
+    The pooled engine is created by the lifespan of the app, hence the use of the TestClient as a context manager.
+    No connection is checked out since no query is run.
+    """
+
+    with TestClient(app) as lifespan_client:
+        unauthorized_response = lifespan_client.get(
+            "/metrics", headers={"x-api-key": "invalid"}
+        )
+        response = lifespan_client.get(
+            "/metrics",
+            headers={
+                "x-api-key": get_env_var(
+                    "API_KEYS", get_env_var("ENVIRONMENT_NAME")
+                ).split(",")[0],
+            },
+        )
+
+    assert unauthorized_response.status_code == 403
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "psql_pool_size 5\n" in response.text
+    assert "psql_pool_checked_out 0\n" in response.text
+    assert "psql_pool_waiters 0\n" in response.text
+    assert "psql_pool_checkouts_total 0\n" in response.text
+    assert "projection_cache_hits_total 0\n" in response.text
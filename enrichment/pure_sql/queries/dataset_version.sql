@@ -0,0 +1,28 @@
+-- Fingerprint of the enriched tables served by the backend, used as the validator (ETag) of its HTTP caches
+-- It only changes when the content of the tables does
+CREATE TABLE IF NOT EXISTS "enriched"."dataset_version" (
+  "version" varchar NOT NULL,
+  "created_at" timestamp with time zone NOT NULL DEFAULT NOW()
+);
+
+TRUNCATE enriched.dataset_version;
+
+INSERT INTO enriched.dataset_version (version)
+SELECT
+	MD5(
+		CONCAT_WS(
+			'|',
+			(
+				SELECT STRING_AGG(CONCAT_WS(',', id, iso_code, currency_symbol, name), ';' ORDER BY id)
+				FROM enriched.dim_countries
+			),
+			(
+				SELECT STRING_AGG(CONCAT_WS(',', id, name, institution_name, documentation_link, legal_mentions, country_id), ';' ORDER BY id)
+				FROM enriched.dim_cpis
+			),
+			(
+				SELECT STRING_AGG(CONCAT_WS(',', id, cpi_id, year, value), ';' ORDER BY id)
+				FROM enriched.fact_cpi_values
+			)
+		)
+	) AS version;
@@ -0,0 +1,45 @@
+-- Incremental counterpart of dim_countries.sql: only the added, changed and removed countries are written
+CREATE TEMPORARY TABLE dim_countries__new ON COMMIT DROP AS
+SELECT DISTINCT
+	cca2 AS iso_code,
+	currencies_symbol AS currency_symbol,
+	common_name AS name
+FROM
+	raw.restcountries
+WHERE
+	currencies_count = 1;
+
+-- The CPIs of the removed countries, and their values and metrics, are removed first since they reference them
+DELETE FROM enriched.fact_cpi_metrics
+WHERE cpi_id IN (
+	SELECT dim_cpis.id
+	FROM enriched.dim_cpis
+	INNER JOIN enriched.dim_countries ON dim_cpis.country_id = dim_countries.id
+	WHERE dim_countries.iso_code NOT IN (SELECT iso_code FROM dim_countries__new)
+);
+
+DELETE FROM enriched.fact_cpi_values
+WHERE cpi_id IN (
+	SELECT dim_cpis.id
+	FROM enriched.dim_cpis
+	INNER JOIN enriched.dim_countries ON dim_cpis.country_id = dim_countries.id
+	WHERE dim_countries.iso_code NOT IN (SELECT iso_code FROM dim_countries__new)
+);
+
+DELETE FROM enriched.dim_cpis
+WHERE country_id IN (
+	SELECT id
+	FROM enriched.dim_countries
+	WHERE iso_code NOT IN (SELECT iso_code FROM dim_countries__new)
+);
+
+DELETE FROM enriched.dim_countries
+WHERE iso_code NOT IN (SELECT iso_code FROM dim_countries__new);
+
+MERGE INTO enriched.dim_countries AS dc
+USING dim_countries__new AS n ON dc.iso_code = n.iso_code
+WHEN MATCHED AND (dc.currency_symbol, dc.name) IS DISTINCT FROM (n.currency_symbol, n.name) THEN
+	UPDATE SET currency_symbol = n.currency_symbol, name = n.name
+WHEN NOT MATCHED THEN
+	INSERT (id, iso_code, currency_symbol, name)
+	VALUES (NEXTVAL('enriched.dim_countries_id_seq'), n.iso_code, n.currency_symbol, n.name);
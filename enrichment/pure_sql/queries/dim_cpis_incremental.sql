@@ -0,0 +1,66 @@
+-- Incremental counterpart of dim_cpis.sql: only the added, changed and removed CPIs are written
+-- A CPI is identified by its institution, its name and its country
+CREATE TEMPORARY TABLE dim_cpis__new ON COMMIT DROP AS
+SELECT
+	'Harmonized Index of Consumer Prices - All-items' AS name,
+    'Eurostat' AS institution_name,
+    'https://ec.europa.eu/eurostat/cache/metadata/en/prc_hicp_esms.htm' AS documentation_link,
+    'https://doi.org/10.2908/PRC_HICP_AIND' AS legal_mentions,
+    dc.id AS country_id
+FROM (
+	SELECT DISTINCT geo
+	FROM raw.eurostat
+) AS e
+JOIN 
+    enriched.dim_countries AS dc ON e.geo = dc.iso_code
+
+UNION ALL
+
+SELECT
+	'Consumer Price Index for All Urban Consumers' AS name,
+    'U.S. Bureau of Labor Statistics' AS institution_name,
+    'https://data.bls.gov/timeseries/CUUR0000SA0' AS documentation_link,
+    'BLS.gov cannot vouch for the data or analyses derived from these data after the data have been retrieved from BLS.gov.' AS legal_mentions,
+	(
+		SELECT id
+		FROM enriched.dim_countries
+		WHERE iso_code = 'US'
+	) AS country_id;
+
+-- The values and metrics of the removed CPIs are removed first since they reference them
+CREATE TEMPORARY TABLE dim_cpis__removed ON COMMIT DROP AS
+SELECT id
+FROM enriched.dim_cpis AS dcp
+WHERE NOT EXISTS (
+	SELECT
+	FROM dim_cpis__new AS n
+	WHERE (dcp.institution_name, dcp.name, dcp.country_id) IS NOT DISTINCT FROM (n.institution_name, n.name, n.country_id)
+);
+
+DELETE FROM enriched.fact_cpi_metrics
+WHERE cpi_id IN (SELECT id FROM dim_cpis__removed);
+
+DELETE FROM enriched.fact_cpi_values
+WHERE cpi_id IN (SELECT id FROM dim_cpis__removed);
+
+DELETE FROM enriched.dim_cpis
+WHERE id IN (SELECT id FROM dim_cpis__removed);
+
+MERGE INTO enriched.dim_cpis AS dcp
+USING dim_cpis__new AS n ON (
+	dcp.institution_name = n.institution_name
+	AND dcp.name = n.name
+	AND dcp.country_id IS NOT DISTINCT FROM n.country_id -- The country of the USBLS CPI may be missing
+)
+WHEN MATCHED AND (dcp.documentation_link, dcp.legal_mentions) IS DISTINCT FROM (n.documentation_link, n.legal_mentions) THEN
+	UPDATE SET documentation_link = n.documentation_link, legal_mentions = n.legal_mentions
+WHEN NOT MATCHED THEN
+	INSERT (id, name, institution_name, documentation_link, legal_mentions, country_id)
+	VALUES (
+		NEXTVAL('enriched.dim_cpis_id_seq'),
+		n.name,
+		n.institution_name,
+		n.documentation_link,
+		n.legal_mentions,
+		n.country_id
+	);
@@ -1,3 +1,4 @@
+DROP TABLE IF EXISTS "enriched"."fact_cpi_metrics";
 DROP TABLE IF EXISTS "enriched"."fact_cpi_values";
 DROP TABLE IF EXISTS "enriched"."dim_cpis";
 DROP TABLE IF EXISTS "enriched"."dim_countries";
@@ -10,6 +11,18 @@ CREATE TABLE "enriched"."fact_cpi_values" (
 );
 
 CREATE INDEX idx_fact_cpi_values_cpi_id ON "enriched"."fact_cpi_values" ("cpi_id");
+CREATE UNIQUE INDEX idx_fact_cpi_values_cpi_id_year ON "enriched"."fact_cpi_values" ("cpi_id", "year");
+
+-- The primary key covers the metrics, so that the backend reads them with index-only scans
+CREATE TABLE "enriched"."fact_cpi_metrics" (
+  "cpi_id" integer,
+  "year" integer,
+  "value" double precision,
+  "yoy_rate" double precision,
+  "cumulative_index" double precision,
+  "log_index" double precision,
+  PRIMARY KEY ("cpi_id", "year") INCLUDE ("value", "yoy_rate", "cumulative_index", "log_index")
+);
 
 CREATE TABLE "enriched"."dim_cpis" (
   "id" integer PRIMARY KEY,
@@ -22,6 +35,7 @@ CREATE TABLE "enriched"."dim_cpis" (
 
 CREATE INDEX idx_dim_cpis_name ON "enriched"."dim_cpis" ("name");
 CREATE INDEX idx_dim_cpis_country_id ON "enriched"."dim_cpis" ("country_id");
+CREATE UNIQUE INDEX idx_dim_cpis_natural_key ON "enriched"."dim_cpis" ("institution_name", "name", "country_id");
 
 CREATE TABLE "enriched"."dim_countries" (
   "id" integer PRIMARY KEY,
@@ -31,3 +45,4 @@ CREATE TABLE "enriched"."dim_countries" (
 );
 
 CREATE INDEX idx_dim_countries_name ON "enriched"."dim_countries" ("name");
+CREATE UNIQUE INDEX idx_dim_countries_iso_code ON "enriched"."dim_countries" ("iso_code");
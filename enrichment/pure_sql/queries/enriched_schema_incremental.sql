@@ -0,0 +1,25 @@
+-- Natural keys of the enriched tables, on which the incremental enrichment merges
+-- The tables are created by enriched_schema.sql, the first enrichment being a full one
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_countries_iso_code ON "enriched"."dim_countries" ("iso_code");
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_cpis_natural_key ON "enriched"."dim_cpis" ("institution_name", "name", "country_id");
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fact_cpi_values_cpi_id_year ON "enriched"."fact_cpi_values" ("cpi_id", "year");
+
+-- The new rows are numbered after the existing ones, which keep their IDs
+CREATE SEQUENCE IF NOT EXISTS enriched.dim_countries_id_seq;
+CREATE SEQUENCE IF NOT EXISTS enriched.dim_cpis_id_seq;
+CREATE SEQUENCE IF NOT EXISTS enriched.fact_cpi_values_id_seq;
+
+SELECT SETVAL('enriched.dim_countries_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM enriched.dim_countries;
+SELECT SETVAL('enriched.dim_cpis_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM enriched.dim_cpis;
+SELECT SETVAL('enriched.fact_cpi_values_id_seq', COALESCE(MAX(id), 0) + 1, false) FROM enriched.fact_cpi_values;
+
+-- Added after the enriched tables, it's created here if a full enrichment hasn't done it yet (cf. enriched_schema.sql)
+CREATE TABLE IF NOT EXISTS "enriched"."fact_cpi_metrics" (
+  "cpi_id" integer,
+  "year" integer,
+  "value" double precision,
+  "yoy_rate" double precision,
+  "cumulative_index" double precision,
+  "log_index" double precision,
+  PRIMARY KEY ("cpi_id", "year") INCLUDE ("value", "yoy_rate", "cumulative_index", "log_index")
+);
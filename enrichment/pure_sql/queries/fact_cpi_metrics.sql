@@ -0,0 +1,35 @@
+-- Metrics derived from the CPI values, so that the backend reads them rather than computing them on each request
+-- yoy_rate: rate of change from the previous year (%), cumulative_index: value rebased on the first year (= 100),
+-- log_index: natural logarithm of the value, the correction from year A to year B being EXP(log_index B - log_index A)
+-- Only the added, changed and removed metrics are written, after both the full and the incremental enrichments
+CREATE TEMPORARY TABLE fact_cpi_metrics__new ON COMMIT DROP AS
+SELECT
+	cpi_id,
+	year,
+	value,
+	CASE
+		WHEN LAG(year) OVER cpi_years = year - 1
+		THEN (value - LAG(value) OVER cpi_years) / NULLIF(LAG(value) OVER cpi_years, 0) * 100
+	END AS yoy_rate,
+	value / NULLIF(FIRST_VALUE(value) OVER cpi_years, 0) * 100 AS cumulative_index,
+	CASE WHEN value > 0 THEN LN(value) END AS log_index
+FROM
+	enriched.fact_cpi_values
+WHERE
+	value IS NOT NULL -- Missing values (e.g. not yet published) are left out
+WINDOW cpi_years AS (PARTITION BY cpi_id ORDER BY year);
+
+DELETE FROM enriched.fact_cpi_metrics AS m
+WHERE NOT EXISTS (
+	SELECT
+	FROM fact_cpi_metrics__new AS n
+	WHERE (m.cpi_id, m.year) = (n.cpi_id, n.year)
+);
+
+MERGE INTO enriched.fact_cpi_metrics AS m
+USING fact_cpi_metrics__new AS n ON m.cpi_id = n.cpi_id AND m.year = n.year
+WHEN MATCHED AND (m.value, m.yoy_rate, m.cumulative_index, m.log_index) IS DISTINCT FROM (n.value, n.yoy_rate, n.cumulative_index, n.log_index) THEN
+	UPDATE SET value = n.value, yoy_rate = n.yoy_rate, cumulative_index = n.cumulative_index, log_index = n.log_index
+WHEN NOT MATCHED THEN
+	INSERT (cpi_id, year, value, yoy_rate, cumulative_index, log_index)
+	VALUES (n.cpi_id, n.year, n.value, n.yoy_rate, n.cumulative_index, n.log_index);
@@ -0,0 +1,56 @@
+-- Incremental counterpart of fact_cpi_values.sql: only the added, changed and removed values are written
+-- A value is identified by its CPI and its year
+CREATE TEMPORARY TABLE fact_cpi_values__new ON COMMIT DROP AS
+SELECT
+    cpis_and_coutries.id AS cpi_id,
+    e.time_period AS year,
+    e.obs_value AS value
+FROM raw.eurostat e
+INNER JOIN (
+	SELECT
+        dim_cpis.id,
+        dim_cpis.name,
+        dim_cpis.institution_name,
+        dim_countries.iso_code
+	FROM enriched.dim_cpis
+	INNER JOIN enriched.dim_countries ON dim_cpis.country_id = dim_countries.id
+) AS cpis_and_coutries ON (
+	e.geo = cpis_and_coutries.iso_code
+	AND cpis_and_coutries.name = 'Harmonized Index of Consumer Prices - All-items'
+	AND cpis_and_coutries.institution_name = 'Eurostat'
+)
+WHERE
+	e.coicop = 'CP00' -- CP00 is the all-items index
+	AND e.unit = 'INX_A_AVG' -- INX_A_AVG is the annual average index, RCH_A_AVG is the annual average rate of change
+
+UNION ALL
+
+SELECT
+    (
+		SELECT id
+		FROM enriched.dim_cpis
+		WHERE
+			name = 'Consumer Price Index for All Urban Consumers'
+    		AND institution_name = 'U.S. Bureau of Labor Statistics'
+	) AS cpi_id,
+    u.year,
+    u.value AS value
+FROM raw.usbls as u
+WHERE
+	series_id = 'CUUR0000SA0'
+	AND period = 'M13'; -- M13 is the annual average
+
+DELETE FROM enriched.fact_cpi_values AS f
+WHERE NOT EXISTS (
+	SELECT
+	FROM fact_cpi_values__new AS n
+	WHERE (f.cpi_id, f.year) = (n.cpi_id, n.year)
+);
+
+MERGE INTO enriched.fact_cpi_values AS f
+USING fact_cpi_values__new AS n ON f.cpi_id = n.cpi_id AND f.year = n.year
+WHEN MATCHED AND f.value IS DISTINCT FROM n.value THEN
+	UPDATE SET value = n.value
+WHEN NOT MATCHED THEN
+	INSERT (id, cpi_id, year, value)
+	VALUES (NEXTVAL('enriched.fact_cpi_values_id_seq'), n.cpi_id, n.year, n.value);
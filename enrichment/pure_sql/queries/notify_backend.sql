@@ -0,0 +1,3 @@
+-- Tell the backends to reload the enriched tables (in snapshot mode) or the dataset version (otherwise)
+-- The notification is only delivered once the enrichment transaction is committed
+NOTIFY enriched_refreshed;
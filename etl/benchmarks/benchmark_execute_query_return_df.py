@@ -0,0 +1,75 @@
+import os
+import resource
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import polars as pl
+from sqlalchemy import text
+
+# Allow imports from the ETL directory and its parent directory
+dir_abspath = os.path.dirname(__file__)
+etl_dir_abspath = os.path.dirname(dir_abspath)
+sys.path.append(etl_dir_abspath)
+sys.path.append(os.path.dirname(etl_dir_abspath))
+
+from shared.environments_utils import get_env_var, load_env_from_dir
+from shared.psql_connector import PsqlConnector
+
+
+ENVIRONMENT = "local"
+QUERY = "SELECT * FROM enriched.fact_cpi_values"
+MODES = ["rows", "copy"]
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read(mode: str) -> tuple[int, float, float, float]:
+    """
+    Read the full fact_cpi_values table into a frame with the given mode, in a fresh process so that its peak RSS is its
+    own. Return the number of rows, the read time and the peak RSS before and after the read.
+    """
+    load_env_from_dir(etl_dir_abspath)
+    with PsqlConnector(
+        dbname=get_env_var("PSQL_DB_NAME", ENVIRONMENT),
+        user=get_env_var("PSQL_DB_DATAFLOW_USER", ENVIRONMENT),
+        password=get_env_var("PSQL_DB_DATAFLOW_PASSWORD", ENVIRONMENT),
+        host=get_env_var("PSQL_DB_HOST", ENVIRONMENT),
+        port=get_env_var("PSQL_DB_PORT", ENVIRONMENT),
+    ) as psql_conn:
+        peak_rss_before_mb = get_peak_rss_mb()
+        start_time = time.perf_counter()
+        if mode == "rows":
+            # Former PsqlConnector.execute_query_return_df
+            psql_conn._checkout_connection()
+            result = psql_conn.session.execute(text(QUERY))
+            rows = result.fetchall()
+            column_names = result.keys()
+            df = pl.DataFrame([dict(zip(column_names, row)) for row in rows])
+        else:
+            df = psql_conn.execute_query_return_df(QUERY)
+        read_seconds = time.perf_counter() - start_time
+        peak_rss_after_mb = get_peak_rss_mb()
+    return df.height, read_seconds, peak_rss_before_mb, peak_rss_after_mb
+
+
+def main() -> None:
+    """
+    Print the throughput and peak RSS of reading the full fact_cpi_values table of the local database into a frame, with
+    the former row by row fetch and with the COPY read of PsqlConnector.execute_query_return_df.
+    """
+    print(f"{'mode':<8}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak RSS before (MB)':>23}{'peak RSS after (MB)':>22}")
+    for mode in MODES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            n_rows, read_seconds, peak_rss_before_mb, peak_rss_after_mb = executor.submit(read, mode).result()
+        print(
+            f"{mode:<8}{n_rows:>10}{read_seconds:>10.2f}{n_rows / read_seconds:>12.0f}"
+            f"{peak_rss_before_mb:>23.1f}{peak_rss_after_mb:>22.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
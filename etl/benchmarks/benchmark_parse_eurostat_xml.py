@@ -0,0 +1,104 @@
+import gzip
+import os
+import sys
+import time
+import tracemalloc
+import polars as pl
+import requests as req
+from lxml import etree
+
+# Allow imports from the ETL directory and its parent directory
+dir_abspath = os.path.dirname(__file__)
+etl_dir_abspath = os.path.dirname(dir_abspath)
+sys.path.append(etl_dir_abspath)
+sys.path.append(os.path.dirname(etl_dir_abspath))
+
+from eurostat.utils import parse_eurostat_xml
+
+
+URL = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/3.0/data/dataflow/ESTAT/prc_hicp_aind/+"
+FIXTURE_PATH = os.path.join(dir_abspath, "fixtures", "prc_hicp_aind.xml.gz")
+N_REPEATS = 3
+
+
+def record_fixture() -> None:
+    # Record the gzipped extract once, the benchmark then runs offline
+    print(f"Recording {URL} into {FIXTURE_PATH}")
+    response = req.get(URL)
+    if response.status_code != 200:
+        raise Exception(f"Request failed with status code {response.status_code}")
+    os.makedirs(os.path.dirname(FIXTURE_PATH), exist_ok=True)
+    with open(FIXTURE_PATH, "wb") as fixture:
+        fixture.write(response.content)
+
+
+def iterparse_fixture():
+    return etree.iterparse(gzip.open(FIXTURE_PATH), events=("end",), tag="Series")
+
+
+def parse_eurostat_xml_rows(xml) -> pl.DataFrame:
+    """
+    Former parser: one dict per observation, then a frame whose schema is inferred and cast.
+    """
+    data = []
+    for _, series in xml:
+        coicop = series.get("coicop")
+        freq = series.get("freq")
+        geo = series.get("geo")
+        unit = series.get("unit")
+        for obs in series.findall("Obs"):
+            row = {
+                "coicop": coicop,
+                "freq": freq,
+                "geo": geo,
+                "unit": unit,
+                "time_period": obs.get("TIME_PERIOD"),
+                "obs_value": obs.get("OBS_VALUE"),
+            }
+            data.append(row)
+        series.clear()
+
+    df = pl.DataFrame(data)
+    df = df.with_columns(pl.col("time_period").cast(pl.Int32))
+    df = df.with_columns(pl.col("obs_value").cast(pl.Float64))
+    return df
+
+
+def parse_eurostat_xml_columns(xml) -> pl.DataFrame:
+    return pl.concat(parse_eurostat_xml(xml))
+
+
+def measure(parse) -> tuple[int, float, float]:
+    """
+    Return the number of observations parsed, the best time over <N_REPEATS> runs, and the peak of the memory allocated
+    by Python, as traced by tracemalloc (in a separate run, since tracing slows the parsing down).
+    """
+    seconds = []
+    for _ in range(N_REPEATS):
+        start_time = time.perf_counter()
+        df = parse(iterparse_fixture())
+        seconds.append(time.perf_counter() - start_time)
+
+    tracemalloc.start()
+    parse(iterparse_fixture())
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df.height, min(seconds), peak_bytes / 1024**2
+
+
+def main() -> None:
+    """
+    Print the throughput and the allocations of parsing the recorded Eurostat prc_hicp_aind extract, with the former
+    list-of-dicts parser and with the columnar parser of eurostat/utils.py.
+    """
+    if not os.path.exists(FIXTURE_PATH):
+        record_fixture()
+
+    print(f"{'parser':<10}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak traced (MB)':>19}")
+    for name, parse in [("rows", parse_eurostat_xml_rows), ("columns", parse_eurostat_xml_columns)]:
+        n_rows, best_seconds, peak_mb = measure(parse)
+        print(f"{name:<10}{n_rows:>10}{best_seconds:>10.2f}{n_rows / best_seconds:>12.0f}{peak_mb:>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import resource
+import sys
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import polars as pl
+
+# Allow imports from the ETL directory and its parent directory
+dir_abspath = os.path.dirname(__file__)
+etl_dir_abspath = os.path.dirname(dir_abspath)
+sys.path.append(etl_dir_abspath)
+sys.path.append(os.path.dirname(etl_dir_abspath))
+
+from eurostat.run import COLUMNS_DTYPE
+from eurostat.utils import fetch_eurostat_xml, parse_eurostat_xml
+from shared.environments_utils import get_env_var, load_env_from_dir
+from shared.psql_connector import PsqlConnector
+
+
+ENVIRONMENT = "local"
+DB_SCHEMA = "raw"
+MODES = ["to_sql", "copy"]
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load(mode: str, parquet_path: str) -> tuple[int, float, float, float]:
+    """
+    Load the extract into its own table with the given mode, in a fresh process so that its peak RSS is its own.
+    Return the number of rows, the load time and the peak RSS before and after the load.
+    """
+    load_env_from_dir(etl_dir_abspath)
+    df = pl.read_parquet(parquet_path)
+    table_name = f"eurostat_benchmark_{mode}"
+    with PsqlConnector(
+        dbname=get_env_var("PSQL_DB_NAME", ENVIRONMENT),
+        user=get_env_var("PSQL_DB_DATAFLOW_USER", ENVIRONMENT),
+        password=get_env_var("PSQL_DB_DATAFLOW_PASSWORD", ENVIRONMENT),
+        host=get_env_var("PSQL_DB_HOST", ENVIRONMENT),
+        port=get_env_var("PSQL_DB_PORT", ENVIRONMENT),
+    ) as psql_conn:
+        peak_rss_before_mb = get_peak_rss_mb()
+        start_time = time.perf_counter()
+        if mode == "to_sql":
+            # Former PsqlConnector.update_table
+            df.to_pandas(use_pyarrow_extension_array=True).to_sql(
+                table_name,
+                psql_conn.engine,
+                schema=DB_SCHEMA,
+                if_exists="replace",
+                index=False,
+                dtype=COLUMNS_DTYPE,
+            )
+        else:
+            psql_conn.update_table(DB_SCHEMA, table_name, df, COLUMNS_DTYPE, new_table=True)
+        load_seconds = time.perf_counter() - start_time
+        peak_rss_after_mb = get_peak_rss_mb()
+        psql_conn.execute_query(f'DROP TABLE IF EXISTS "{DB_SCHEMA}"."{table_name}"')
+    return df.height, load_seconds, peak_rss_before_mb, peak_rss_after_mb
+
+
+def main() -> None:
+    """
+    Print the throughput and peak RSS of loading the full Eurostat prc_hicp_aind extract into the local database, with
+    the former pandas to_sql load and with the COPY load of PsqlConnector.update_table.
+    """
+    df = pl.concat(parse_eurostat_xml(fetch_eurostat_xml()))
+    with tempfile.TemporaryDirectory() as tmp_dir_abspath:
+        parquet_path = os.path.join(tmp_dir_abspath, "eurostat.parquet")
+        df.write_parquet(parquet_path)
+
+        print(f"{'mode':<8}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak RSS before (MB)':>23}{'peak RSS after (MB)':>22}")
+        for mode in MODES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                n_rows, load_seconds, peak_rss_before_mb, peak_rss_after_mb = executor.submit(
+                    load, mode, parquet_path
+                ).result()
+            print(
+                f"{mode:<8}{n_rows:>10}{load_seconds:>10.2f}{n_rows / load_seconds:>12.0f}"
+                f"{peak_rss_before_mb:>23.1f}{peak_rss_after_mb:>22.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
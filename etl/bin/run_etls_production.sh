@@ -20,11 +20,12 @@ docker build \
     . \
     || { echo "Failed to build Docker image."; exit 1; }
 
-# Run the Docker container
+# Run the Docker container, keeping the cached responses of the sources across runs
 echo "Running the image..."
 docker run \
     --name ${CONTAINER_NAME} \
     --network=host \
+    --volume "${PWD}/etl/.response_cache":/app/etl/.response_cache \
     ${IMAGE_NAME} \
     || { echo "Failed to start Docker container."; exit 1; }
 echo "Image ran successfully."
@@ -1,7 +1,15 @@
-from eurostat.utils import fetch_eurostat_xml, parse_eurostat_xml
-from shared.psql_connector import PsqlConnector
+from eurostat.utils import (
+    build_eurostat_params,
+    fetch_eurostat_csv,
+    fetch_eurostat_xml,
+    parse_eurostat_csv,
+    parse_eurostat_xml,
+)
+from shared.psql_connector import PsqlConnector, create_psql_engine
 from shared.environments_utils import get_env_var
-from sqlalchemy import Integer, Text, Float
+from shared.timing_utils import log_duration
+from response_cache import ResponseCache, create_response_cache, is_source_unchanged
+from sqlalchemy import Engine, Integer, Text, Float
 
 
 # PRC: price
@@ -23,15 +31,123 @@ COLUMNS_DTYPE = {
     "obs_value": Float,
 }
 
+# Indexes of the raw table (name -> columns), on the columns the enrichment filters on
+INDEXES = {
+    "idx_eurostat_series": ["coicop", "unit", "geo"],
+}
+
+# Columns identifying an observation, on which the incremental loads upsert
+KEY_COLUMNS = ["coicop", "freq", "geo", "unit", "time_period"]
+
 
-def eurostat(environment: str, db_schema: str, table_name: str, new_table: bool = False) -> None:
-    xml = fetch_eurostat_xml()
-    df = parse_eurostat_xml(xml)
-    with PsqlConnector(
+def eurostat(
+    environment: str,
+    db_schema: str,
+    table_name: str,
+    new_table: bool = False,
+    incremental: bool = False,
+    revision_years: int = 1,
+    coicop: str = "CP00",
+    unit: str = "INX_A_AVG",
+    geo: str = "",
+    start_year: int | None = None,
+    end_year: int | None = None,
+    output_format: str = "xml",
+) -> None:
+    """
+    Load the Eurostat HICP annual indices into <db_schema>.<table_name>.
+
+    Only the observations of the <coicop>, <unit> and <geo> codes (comma-separated, all of them if empty) from
+    <start_year> to <end_year> are fetched, the filters being applied by the API. The defaults are the all-items
+    annual average indices of all the countries, the only ones the enrichment uses. The observations are sent as
+    SDMX-ML, or as SDMX-CSV with the "csv" <output_format>.
+
+    With --incremental, only the observations from <revision_years> before the high-water mark (the latest year
+    loaded) on are fetched, and upserted. Without a high-water mark (first run), everything is fetched and loaded.
+    """
+    engine = create_psql_engine(
         dbname=get_env_var("PSQL_DB_NAME", environment),
         user=get_env_var("PSQL_DB_DATAFLOW_USER", environment),
         password=get_env_var("PSQL_DB_DATAFLOW_PASSWORD", environment),
         host=get_env_var("PSQL_DB_HOST", environment),
         port=get_env_var("PSQL_DB_PORT", environment),
-    ) as psql_conn:
-        psql_conn.update_table(db_schema, table_name, df, COLUMNS_DTYPE, new_table)
+    )
+    try:
+        run_eurostat(
+            engine,
+            db_schema,
+            table_name,
+            new_table,
+            incremental,
+            revision_years,
+            create_response_cache(environment),
+            coicop,
+            unit,
+            geo,
+            start_year,
+            end_year,
+            output_format,
+        )
+    finally:
+        engine.dispose()
+
+
+def run_eurostat(
+    engine: Engine,
+    db_schema: str,
+    table_name: str,
+    new_table: bool = False,
+    incremental: bool = False,
+    revision_years: int = 1,
+    response_cache: ResponseCache | None = None,
+    coicop: str = "CP00",
+    unit: str = "INX_A_AVG",
+    geo: str = "",
+    start_year: int | None = None,
+    end_year: int | None = None,
+    output_format: str = "xml",
+) -> None:
+    # Same as the eurostat command, through the connections of the given <engine>
+    high_water_mark = None
+    if incremental:
+        with PsqlConnector(engine=engine) as psql_conn:
+            high_water_mark = psql_conn.get_high_water_mark(db_schema, table_name)
+    start_period = high_water_mark - revision_years if high_water_mark is not None else None
+    # The observations before <start_year> aren't fetched, even to be revised
+    fetch_start_period = start_period if start_year is None else max(start_period or start_year, start_year)
+    params = build_eurostat_params(
+        start_period=fetch_start_period,
+        end_period=end_year,
+        coicop=split_codes(coicop),
+        unit=split_codes(unit),
+        geo=split_codes(geo),
+        output_format=output_format,
+    )
+
+    # The extract is downloaded into the response cache (unless unchanged)
+    with log_duration("eurostat: fetch"):
+        if output_format == "csv":
+            csv = fetch_eurostat_csv(params, response_cache)
+        else:
+            xml = fetch_eurostat_xml(params, response_cache)
+    if is_source_unchanged(response_cache, engine, db_schema, table_name):
+        return
+
+    # The observations are streamed from the extract to the database, batch by batch
+    with log_duration("eurostat: parse and load"):
+        batches = parse_eurostat_csv(csv) if output_format == "csv" else parse_eurostat_xml(xml)
+        with PsqlConnector(engine=engine) as psql_conn:
+            # The incremental loads upsert, the other ones replace the table with the filtered observations
+            if start_period is None:
+                psql_conn.update_table(db_schema, table_name, batches, COLUMNS_DTYPE, new_table, INDEXES, KEY_COLUMNS)
+            else:
+                psql_conn.upsert_table(db_schema, table_name, batches, COLUMNS_DTYPE, KEY_COLUMNS)
+            latest_time_period = psql_conn.execute_query_return_df(
+                f'SELECT MAX(time_period) AS time_period FROM "{db_schema}"."{table_name}"'
+            )[0, "time_period"]
+            if latest_time_period is not None:
+                psql_conn.set_high_water_mark(db_schema, table_name, latest_time_period)
+
+
+def split_codes(codes: str) -> list[str]:
+    return [code.strip() for code in codes.split(",") if code.strip()]
@@ -1,9 +1,12 @@
+import array
 import logging
+import math
 import requests as req
 import gzip
-import io
+from typing import Iterator
 from lxml import etree
 import polars as pl
+from response_cache import ResponseCache
 
 
 logging.basicConfig(
@@ -14,55 +17,187 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def fetch_eurostat_xml():
-    logger.info("Fetching Eurostat XML data")
-    url = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/3.0/data/dataflow/ESTAT/prc_hicp_aind/+"
-    payload = {}
-    headers = {}
-    response = req.get(url, headers=headers, data=payload)
+# Schema of the parsed observations, matching the COLUMNS_DTYPE of eurostat/run.py
+SCHEMA = {
+    "coicop": pl.String,
+    "freq": pl.String,
+    "geo": pl.String,
+    "unit": pl.String,
+    "time_period": pl.Int32,
+    "obs_value": pl.Float64,
+}
 
-    if response.status_code != 200:
-        raise Exception(f"Request failed with status code {response.status_code}")
 
-    # Decompress the gzipped response content in-memory
-    with gzip.GzipFile(fileobj=io.BytesIO(response.content)) as gz:
-        xml_content = gz.read()
+URL = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/3.0/data/dataflow/ESTAT/prc_hicp_aind/+"
 
-    # Use lxml.iterparse to parse the XML incrementally
+# Columns of the SDMX-CSV output, renamed as in the XML output
+CSV_COLUMNS = {
+    "coicop": "coicop",
+    "freq": "freq",
+    "geo": "geo",
+    "unit": "unit",
+    "TIME_PERIOD": "time_period",
+    "OBS_VALUE": "obs_value",
+}
+
+
+def build_eurostat_params(
+    start_period: int | None = None,
+    end_period: int | None = None,
+    coicop: list[str] | None = None,
+    unit: list[str] | None = None,
+    geo: list[str] | None = None,
+    output_format: str = "xml",
+) -> dict:
+    """
+    Build the query parameters filtering the dataflow server-side, so that only the observations of the given
+    <coicop>, <unit> and <geo> codes (all of them if None or empty) from <start_period> to <end_period> are sent.
+    With the "csv" <output_format>, the observations are sent as (uncompressed) SDMX-CSV rather than gzipped SDMX-ML.
+    """
+    params = {}
+    for dimension, codes in [("coicop", coicop), ("unit", unit), ("geo", geo)]:
+        if codes:
+            params[f"c[{dimension}]"] = ",".join(codes)
+    time_period_filters = []
+    if start_period is not None:
+        time_period_filters.append(f"ge:{start_period}")
+    if end_period is not None:
+        time_period_filters.append(f"le:{end_period}")
+    if time_period_filters:
+        params["c[TIME_PERIOD]"] = "+".join(time_period_filters)
+    if output_format == "csv":
+        params.update({"format": "csvdata", "formatVersion": "2.0", "compress": "false"})
+    elif output_format != "xml":
+        raise ValueError(f"Invalid output format: {output_format}")
+    return params
+
+
+def fetch_eurostat_xml(params: dict | None = None, response_cache: ResponseCache | None = None):
+    # <params> filter the observations fetched, cf. build_eurostat_params
+    # If <response_cache> is given, the extract is downloaded into it (unless unchanged) and parsed from there
+    logger.info(f"Fetching Eurostat XML data{f' with {params}' if params else ''}")
+    params = params or {}
+
+    if response_cache is not None:
+        gz = gzip.open(response_cache.get(URL, params=params))
+    else:
+        payload = {}
+        headers = {}
+        response = req.get(URL, params=params, headers=headers, data=payload, stream=True)
+
+        if response.status_code != 200:
+            raise Exception(f"Request failed with status code {response.status_code}")
+
+        # Decompress the gzipped response content as it's downloaded (after undoing the HTTP content encoding, if any)
+        response.raw.decode_content = True
+        gz = gzip.GzipFile(fileobj=response.raw)
+
+    # Use lxml.iterparse to parse the XML incrementally, as it's decompressed
     xml = etree.iterparse(
-        io.BytesIO(xml_content),
+        gz,
         events=("end",),
         tag="Series",
     )
 
-    logger.info("Fetching Eurostat XML data done")
+    logger.info("Fetching Eurostat XML data started, the rest is streamed while parsing")
 
     return xml
 
 
-def parse_eurostat_xml(xml: etree.ElementTree) -> pl.DataFrame:
+def fetch_eurostat_csv(params: dict, response_cache: ResponseCache | None = None) -> str | bytes:
+    # Same as fetch_eurostat_xml, for the "csv" output format of build_eurostat_params
+    # Return the path of the cached CSV if <response_cache> is given, otherwise its content
+    logger.info(f"Fetching Eurostat CSV data with {params}")
+    if response_cache is not None:
+        csv = response_cache.get(URL, params=params)
+    else:
+        response = req.get(URL, params=params)
+
+        if response.status_code != 200:
+            raise Exception(f"Request failed with status code {response.status_code}")
+
+        csv = response.content
+
+    logger.info("Fetching Eurostat CSV data done")
+    return csv
+
+
+def parse_eurostat_csv(csv: str | bytes, batch_rows: int = 100_000) -> Iterator[pl.DataFrame]:
+    """
+    Yield the observations of the SDMX-CSV <csv> (a path, read <batch_rows> rows at a time, or the content itself)
+    as frames with the same schema as those of parse_eurostat_xml.
+    The CSV is parsed by Polars, without going through Python objects.
+    """
+    logger.info("Parsing Eurostat CSV data")
+    # All the columns are read as strings (infer_schema_length=0), and cast once selected
+    if isinstance(csv, bytes):
+        batches = [pl.read_csv(csv, infer_schema_length=0)]
+    else:
+        reader = pl.read_csv_batched(csv, batch_size=batch_rows, infer_schema_length=0)
+        # next_batches returns None once the file is read
+        batches = (batch for next_batches in iter(lambda: reader.next_batches(1), None) for batch in next_batches)
+
+    n_rows = 0
+    for batch in batches:
+        n_rows += batch.height
+        yield batch.select(list(CSV_COLUMNS)).rename(CSV_COLUMNS).select(
+            [pl.col(column_name).cast(dtype) for column_name, dtype in SCHEMA.items()]
+        )
+    logger.info(f"Parsing Eurostat CSV data done, {n_rows} observations parsed")
+
+
+def parse_eurostat_xml(xml: etree.iterparse, batch_rows: int = 100_000) -> Iterator[pl.DataFrame]:
+    """
+    Yield the observations of the streamed <xml> as frames of about <batch_rows> rows, so that the memory needed is
+    bounded by the size of a batch rather than by the size of the dataset.
+    """
     logger.info("Parsing Eurostat XML data")
-    data = []
+    columns = new_eurostat_columns()
+    n_rows = 0
     for _, series in xml:
         coicop = series.get("coicop")
         freq = series.get("freq")
         geo = series.get("geo")
         unit = series.get("unit")
-        for obs in series.findall("Obs"):
-            row = {
-                "coicop": coicop,
-                "freq": freq,
-                "geo": geo,
-                "unit": unit,
-                "time_period": obs.get("TIME_PERIOD"),
-                "obs_value": obs.get("OBS_VALUE"),
-            }
-            data.append(row)
-        # Clear the element to free memory
+        for obs in series.iterfind("Obs"):
+            columns["coicop"].append(coicop)
+            columns["freq"].append(freq)
+            columns["geo"].append(geo)
+            columns["unit"].append(unit)
+            columns["time_period"].append(int(obs.get("TIME_PERIOD")))
+            # Missing values are NaN in the buffer, and null in the frame
+            obs_value = obs.get("OBS_VALUE")
+            columns["obs_value"].append(float(obs_value) if obs_value is not None else math.nan)
+
+        # Free the memory of the parsed series, and of the references kept to them by their parent
         series.clear()
+        while series.getprevious() is not None:
+            del series.getparent()[0]
+
+        if len(columns["coicop"]) >= batch_rows:
+            n_rows += len(columns["coicop"])
+            yield build_eurostat_batch(columns)
+            columns = new_eurostat_columns()
+            logger.info(f"{n_rows} observations parsed")
+
+    n_rows += len(columns["coicop"])
+    yield build_eurostat_batch(columns)
+    logger.info(f"Parsing Eurostat XML data done, {n_rows} observations parsed")
+
+
+def new_eurostat_columns() -> dict[str, list | array.array]:
+    # The numbers are stored unboxed in typed arrays, the strings in lists (sharing the series' attributes)
+    return {
+        "coicop": [],
+        "freq": [],
+        "geo": [],
+        "unit": [],
+        "time_period": array.array("i"),
+        "obs_value": array.array("d"),
+    }
+
 
-    df = pl.DataFrame(data)
-    df = df.with_columns(pl.col("time_period").cast(pl.Int32))
-    df = df.with_columns(pl.col("obs_value").cast(pl.Float64))
-    logger.info("Parsing Eurostat XML data done")
-    return df
+def build_eurostat_batch(columns: dict[str, list | array.array]) -> pl.DataFrame:
+    return pl.DataFrame(
+        [pl.Series(column_name, columns[column_name], dtype=dtype) for column_name, dtype in SCHEMA.items()]
+    ).with_columns(pl.col("obs_value").fill_nan(None))
@@ -9,10 +9,12 @@ sys.path.append(parent_dir_abspath)
 
 from shared.cli_utils import load_and_register_commands
 from shared.environments_utils import load_env_from_dir
+from orchestrator import all_sources
 
 
 app = typer.Typer()
 load_and_register_commands(app, dir_abspath)
+app.command(name="all")(all_sources)
 
 # Load the .env of the current service of the monorepo
 load_env_from_dir(dir_abspath)
@@ -0,0 +1,96 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from eurostat.run import run_eurostat
+from usbls.run import run_usbls
+from restcountries.run import run_restcountries
+from shared.psql_connector import PsqlConnector, create_psql_engine
+from shared.environments_utils import get_env_var
+from shared.timing_utils import log_duration
+from response_cache import create_response_cache
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+# Queries of the enrichment, when the ETL runs from the monorepo
+ENRICHMENT_QUERIES_DIR_ABSPATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "enrichment", "pure_sql", "queries"
+)
+
+
+def all_sources(
+    environment: str,
+    db_schema: str,
+    usbls_series_ids: str = "CUUR0000SA0",
+    usbls_start_year: int = 1913,
+    usbls_end_year: int = 2023,
+    new_table: bool = False,
+    incremental: bool = False,
+    revision_years: int = 1,
+    enrichment_query_file_names: str = "",
+    enrichment_queries_dir: str = ENRICHMENT_QUERIES_DIR_ABSPATH,
+) -> None:
+    """
+    Load all the sources into the tables of <db_schema> named after them, concurrently and through a shared connection
+    pool, so that a full refresh takes as long as the slowest source. Then, if all the loads succeeded, run the
+    <enrichment_query_file_names> (comma-separated, as for the pure_sql command of the enrichment) found in
+    <enrichment_queries_dir>.
+
+    Each source is fetched, parsed and loaded in its own thread, the durations of the stages being logged. As with the
+    commands of the sources, the parsing and loading of the sources whose responses didn't change are skipped.
+    """
+    sources = {
+        "eurostat": lambda engine: run_eurostat(
+            engine, db_schema, "eurostat", new_table, incremental, revision_years, create_response_cache(environment)
+        ),
+        "usbls": lambda engine: run_usbls(
+            engine,
+            get_env_var("USBLS2_API_KEY", environment),
+            usbls_series_ids,
+            usbls_start_year,
+            usbls_end_year,
+            db_schema,
+            "usbls",
+            new_table,
+            incremental,
+            revision_years,
+            create_response_cache(environment),
+        ),
+        "restcountries": lambda engine: run_restcountries(
+            engine, db_schema, "restcountries", new_table, incremental, create_response_cache(environment)
+        ),
+    }
+    # One connection per source, one of them being reused by the enrichment
+    engine = create_psql_engine(
+        dbname=get_env_var("PSQL_DB_NAME", environment),
+        user=get_env_var("PSQL_DB_DATAFLOW_USER", environment),
+        password=get_env_var("PSQL_DB_DATAFLOW_PASSWORD", environment),
+        host=get_env_var("PSQL_DB_HOST", environment),
+        port=get_env_var("PSQL_DB_PORT", environment),
+        pool_size=len(sources),
+        max_overflow=0,
+    )
+    try:
+        with log_duration("all: sources"):
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                futures = {source_name: executor.submit(run, engine) for source_name, run in sources.items()}
+            failed_source_names = []
+            for source_name, future in futures.items():
+                if future.exception() is not None:
+                    logger.error(f"Loading {source_name} failed", exc_info=future.exception())
+                    failed_source_names.append(source_name)
+        if failed_source_names:
+            raise Exception(f"Loading {', '.join(failed_source_names)} failed, the enrichment is skipped")
+
+        if enrichment_query_file_names:
+            with log_duration("all: enrichment"):
+                with PsqlConnector(engine=engine) as psql_conn:
+                    for query_file_name in [name.strip() for name in enrichment_query_file_names.split(",")]:
+                        psql_conn.execute_query_from_file(os.path.join(enrichment_queries_dir, query_file_name))
+    finally:
+        engine.dispose()
@@ -0,0 +1,173 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Iterable
+import requests as req
+from sqlalchemy import Engine
+from shared.environments_utils import get_env_var
+from shared.psql_connector import PsqlConnector
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR_ABSPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache")
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class ResponseCache:
+    """
+    On-disk cache of the raw responses of the sources, keyed by a hash of the request (method, URL, parameters and
+    body), each entry being the body of the response and its metadata (ETag, Last-Modified, fingerprint of the
+    content).
+
+    The requests are made conditional (If-None-Match, If-Modified-Since) when the source gave validators. <n_changed>
+    counts the responses whose content differs from the cached one (or that weren't cached), so that the callers can
+    skip parsing and loading unchanged content.
+    With <offline>, no request is sent and the cached responses are replayed (all counted as changed, so that they are
+    loaded), which makes runs reproducible without network.
+    """
+
+    def __init__(self, cache_dir: str, offline: bool = False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.n_changed = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(method: str, url: str, params: dict | None = None, data: str | None = None) -> str:
+        # The key is a hash, so that the request body (which may contain an API key) isn't written to the disk
+        request = json.dumps([method, url, sorted((params or {}).items()), data])
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _metadata_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_metadata(self, key: str) -> dict | None:
+        if not (os.path.exists(self._metadata_path(key)) and os.path.exists(self.body_path(key))):
+            return None
+        with open(self._metadata_path(key), "r") as metadata_file:
+            return json.load(metadata_file)
+
+    def load(self, key: str) -> str:
+        """
+        Return the path of the cached body of the request <key>, for offline runs.
+        """
+        if self._load_metadata(key) is None:
+            raise Exception(f"No cached response for request {key}, it can't be replayed offline")
+        self._count_changed()
+        return self.body_path(key)
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        chunks: Iterable[bytes],
+        etag: str | None = None,
+        last_modified: str | None = None,
+        fingerprint: str | None = None,
+    ) -> str:
+        """
+        Write the body <chunks> of the response to the request <key> and return its path.
+        The <fingerprint> of the content defaults to its SHA-256, sources whose responses embed volatile fields (e.g. a
+        timestamp) should give one computed without them.
+        """
+        tmp_body_path = f"{self.body_path(key)}.tmp"
+        content_hash = hashlib.sha256()
+        with open(tmp_body_path, "wb") as body_file:
+            for chunk in chunks:
+                content_hash.update(chunk)
+                body_file.write(chunk)
+        fingerprint = fingerprint or content_hash.hexdigest()
+
+        previous_metadata = self._load_metadata(key)
+        if previous_metadata is None or previous_metadata["fingerprint"] != fingerprint:
+            self._count_changed()
+        else:
+            logger.info(f"Response from {url} unchanged")
+        os.replace(tmp_body_path, self.body_path(key))
+        self._write_metadata(key, url, etag, last_modified, fingerprint)
+        return self.body_path(key)
+
+    def get(self, url: str, params: dict | None = None, headers: dict | None = None) -> str:
+        """
+        Send a (conditional) GET request, stream its body into the cache and return the path of the cached body.
+        """
+        key = self.make_key("GET", url, params)
+        if self.offline:
+            return self.load(key)
+
+        metadata = self._load_metadata(key)
+        headers = dict(headers or {})
+        if metadata is not None and metadata["etag"]:
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata is not None and metadata["last_modified"]:
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+        with req.get(url, params=params, headers=headers, stream=True) as response:
+            if response.status_code == 304:
+                logger.info(f"Response from {url} not modified, using the cached one")
+                self._write_metadata(key, url, metadata["etag"], metadata["last_modified"], metadata["fingerprint"])
+                return self.body_path(key)
+            if response.status_code != 200:
+                raise Exception(f"Request failed with status code {response.status_code}")
+            return self.store(
+                key,
+                url,
+                response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+
+    def _write_metadata(self, key: str, url: str, etag: str | None, last_modified: str | None, fingerprint: str):
+        with open(self._metadata_path(key), "w") as metadata_file:
+            json.dump(
+                {
+                    "url": url,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fingerprint": fingerprint,
+                    "fetched_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                },
+                metadata_file,
+            )
+
+    def _count_changed(self):
+        with self._lock:
+            self.n_changed += 1
+
+
+def create_response_cache(environment: str) -> ResponseCache:
+    """
+    Create the response cache configured for <environment>: RESPONSE_CACHE_DIR (defaults to etl/.response_cache) and
+    RESPONSE_CACHE_OFFLINE ("true" to replay the cached responses without network).
+    """
+    return ResponseCache(
+        cache_dir=get_env_var("RESPONSE_CACHE_DIR", environment, default=DEFAULT_CACHE_DIR_ABSPATH),
+        offline=get_env_var("RESPONSE_CACHE_OFFLINE", environment, default="false").lower() == "true",
+    )
+
+
+def is_source_unchanged(response_cache: ResponseCache | None, engine: Engine, db_schema: str, table_name: str) -> bool:
+    """
+    Return whether none of the responses fetched through <response_cache> changed since the previous run, while
+    <db_schema>.<table_name> (loaded from them) still exists, in which case parsing and loading them can be skipped.
+    """
+    if response_cache is None or response_cache.n_changed:
+        return False
+    with PsqlConnector(engine=engine) as psql_conn:
+        table_exists = psql_conn.table_exists(db_schema, table_name)
+    if table_exists:
+        logger.info(f"Source of {db_schema}.{table_name} unchanged, skipping its parsing and loading")
+    return table_exists
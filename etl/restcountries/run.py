@@ -1,7 +1,9 @@
 from restcountries.utils import fetch_restcountries_json, parse_restcountries_json
-from shared.psql_connector import PsqlConnector
+from shared.psql_connector import PsqlConnector, create_psql_engine
 from shared.environments_utils import get_env_var
-from sqlalchemy import Integer, Text
+from shared.timing_utils import log_duration
+from response_cache import ResponseCache, create_response_cache, is_source_unchanged
+from sqlalchemy import Engine, Integer, Text
 
 
 COLUMNS_DTYPE = {
@@ -15,15 +17,62 @@ COLUMNS_DTYPE = {
     "currencies_count": Integer,
 }
 
+# Indexes of the raw table (name -> columns), on the columns the enrichment filters on
+INDEXES = {
+    "idx_restcountries_cca2": ["cca2"],
+}
+
+# Columns identifying a country, on which the incremental loads upsert
+KEY_COLUMNS = ["cca2"]
+
 
-def restcountries(environment: str, db_schema: str, table_name: str, new_table: bool = False) -> None:
-    json = fetch_restcountries_json()
-    df = parse_restcountries_json(json)
-    with PsqlConnector(
+def restcountries(environment: str, db_schema: str, table_name: str, new_table: bool = False, incremental: bool = False) -> None:
+    """
+    Load the countries into <db_schema>.<table_name>.
+
+    The API has no period to filter on, hence no high-water mark: --incremental fetches all the countries but only writes
+    the new or changed ones (upsert). Until a full load has built the key index the upsert relies on, it's a full load.
+    """
+    engine = create_psql_engine(
         dbname=get_env_var("PSQL_DB_NAME", environment),
         user=get_env_var("PSQL_DB_DATAFLOW_USER", environment),
         password=get_env_var("PSQL_DB_DATAFLOW_PASSWORD", environment),
         host=get_env_var("PSQL_DB_HOST", environment),
         port=get_env_var("PSQL_DB_PORT", environment),
-    ) as psql_conn:
-        psql_conn.update_table(db_schema, table_name, df, COLUMNS_DTYPE, new_table)
+    )
+    try:
+        run_restcountries(engine, db_schema, table_name, new_table, incremental, create_response_cache(environment))
+    finally:
+        engine.dispose()
+
+
+def run_restcountries(
+    engine: Engine,
+    db_schema: str,
+    table_name: str,
+    new_table: bool = False,
+    incremental: bool = False,
+    response_cache: ResponseCache | None = None,
+) -> None:
+    # Same as the restcountries command, through the connections of the given <engine>
+    with log_duration("restcountries: fetch"):
+        json = fetch_restcountries_json(response_cache)
+    if is_source_unchanged(response_cache, engine, db_schema, table_name):
+        return
+    with log_duration("restcountries: parse"):
+        df = parse_restcountries_json(json)
+    with log_duration("restcountries: load"):
+        with PsqlConnector(engine=engine) as psql_conn:
+            key_index = psql_conn.execute_query_return_df(
+                f"""
+                SELECT indexname
+                FROM pg_indexes
+                WHERE
+                    schemaname = '{db_schema}'
+                    AND indexname = 'idx_{table_name}_key'
+                """
+            )
+            if incremental and key_index.height:
+                psql_conn.upsert_table(db_schema, table_name, df, COLUMNS_DTYPE, KEY_COLUMNS)
+            else:
+                psql_conn.update_table(db_schema, table_name, df, COLUMNS_DTYPE, new_table, INDEXES, KEY_COLUMNS)
@@ -2,6 +2,7 @@ import logging
 import json
 import requests as req
 import polars as pl
+from response_cache import ResponseCache
 
 
 logging.basicConfig(
@@ -13,17 +14,33 @@ logger = logging.getLogger(__name__)
 
 SEPARATOR = ", "
 
+# Schema of the parsed countries, matching the COLUMNS_DTYPE of restcountries/run.py
+SCHEMA = {
+    "common_name": pl.String,
+    "official_name": pl.String,
+    "cca2": pl.String,
+    "status": pl.String,
+    "currencies_code": pl.String,
+    "currencies_name": pl.String,
+    "currencies_symbol": pl.String,
+    "currencies_count": pl.Int64,
+}
 
-def fetch_restcountries_json() -> dict:
+
+def fetch_restcountries_json(response_cache: ResponseCache | None = None) -> dict:
     logger.info(f"Fetching REST Countries JSON data")
 
     url = "https://restcountries.com/v3.1/all"
-    response = req.get(url)
+    if response_cache is not None:
+        with open(response_cache.get(url), "rb") as body_file:
+            json_ = json.load(body_file)
+    else:
+        response = req.get(url)
 
-    if response.status_code != 200:
-        raise Exception(f"Request failed with status code {response.status_code}")
+        if response.status_code != 200:
+            raise Exception(f"Request failed with status code {response.status_code}")
 
-    json_ = json.loads(response.text)
+        json_ = json.loads(response.text)
 
     logger.info("Fetching REST Countries JSON data complete")
     return json_
@@ -32,36 +49,24 @@ def fetch_restcountries_json() -> dict:
 def parse_restcountries_json(json: dict) -> pl.DataFrame:
     logger.info("Parsing REST Countries JSON data")
 
-    data = []
+    columns = {column_name: [] for column_name in SCHEMA}
     for object in json:
-        common_name = object["name"]["common"]
-        official_name = object["name"]["official"]
-        cca2 = object["cca2"]
-        status = object["status"]
+        columns["common_name"].append(object["name"]["common"])
+        columns["official_name"].append(object["name"]["official"])
+        columns["cca2"].append(object["cca2"])
+        columns["status"].append(object["status"])
 
         if "currencies" in object.keys():
-            currencies_code = SEPARATOR.join(object["currencies"].keys())
-            currencies_name = SEPARATOR.join(currency_object["name"] for currency_object in object["currencies"].values())
-            currencies_symbol = SEPARATOR.join(currency_object["symbol"] for currency_object in object["currencies"].values())
-            currencies_count = len(object["currencies"])
+            columns["currencies_code"].append(SEPARATOR.join(object["currencies"].keys()))
+            columns["currencies_name"].append(SEPARATOR.join(currency_object["name"] for currency_object in object["currencies"].values()))
+            columns["currencies_symbol"].append(SEPARATOR.join(currency_object["symbol"] for currency_object in object["currencies"].values()))
+            columns["currencies_count"].append(len(object["currencies"]))
         else:
-            currencies_code = None
-            currencies_name = None
-            currencies_symbol = None
-            currencies_count = 0
-
-        row = {
-            "common_name": common_name,
-            "official_name": official_name,
-            "cca2": cca2,
-            "status": status,
-            "currencies_code": currencies_code,
-            "currencies_name": currencies_name,
-            "currencies_symbol": currencies_symbol,
-            "currencies_count": currencies_count,
-        }
-        data.append(row)
+            columns["currencies_code"].append(None)
+            columns["currencies_name"].append(None)
+            columns["currencies_symbol"].append(None)
+            columns["currencies_count"].append(0)
 
-    df = pl.DataFrame(data)
+    df = pl.DataFrame(columns, schema=SCHEMA)
     logger.info("Parsing REST Countries JSON data complete")
     return df
@@ -1,7 +1,9 @@
 from usbls.utils import fetch_usbls_json, parse_usbls_json
-from shared.psql_connector import PsqlConnector
+from shared.psql_connector import PsqlConnector, create_psql_engine
 from shared.environments_utils import get_env_var
-from sqlalchemy import Integer, Text, Float
+from shared.timing_utils import log_duration
+from response_cache import ResponseCache, create_response_cache, is_source_unchanged
+from sqlalchemy import Engine, Integer, Text, Float
 
 
 # CUUR0000SA0: "Consumer Price Index for All Urban Consumers (CPI-U)"
@@ -16,15 +18,96 @@ COLUMNS_DTYPE = {
     "footnotes": Text,
 }
 
+# Indexes of the raw table (name -> columns), on the columns the enrichment filters on
+INDEXES = {
+    "idx_usbls_series_id": ["series_id"],
+}
+
+# Columns identifying an observation, on which the incremental loads upsert
+KEY_COLUMNS = ["series_id", "year", "period"]
+
+
+def usbls(
+    environment: str,
+    series_ids: str,
+    start_year: int,
+    end_year: int,
+    db_schema: str,
+    table_name: str,
+    new_table: bool = False,
+    incremental: bool = False,
+    revision_years: int = 1,
+) -> None:
+    """
+    Load the observations of the <series_ids> (comma-separated) from <start_year> to <end_year> into
+    <db_schema>.<table_name>.
 
-def usbls(environment: str, series_id: str, start_year: int, end_year: int, db_schema: str, table_name: str, new_table: bool = False) -> None:
-    jsons = fetch_usbls_json(series_id, start_year, end_year, get_env_var("USBLS2_API_KEY", environment))
-    df = parse_usbls_json(jsons)
-    with PsqlConnector(
+    With --incremental, only the years from <revision_years> before the high-water mark (the latest year loaded) on are
+    fetched, and upserted. Without a high-water mark (first run), everything is fetched and loaded.
+    """
+    engine = create_psql_engine(
         dbname=get_env_var("PSQL_DB_NAME", environment),
         user=get_env_var("PSQL_DB_DATAFLOW_USER", environment),
         password=get_env_var("PSQL_DB_DATAFLOW_PASSWORD", environment),
         host=get_env_var("PSQL_DB_HOST", environment),
         port=get_env_var("PSQL_DB_PORT", environment),
-    ) as psql_conn:
-        psql_conn.update_table(db_schema, table_name, df, COLUMNS_DTYPE, new_table)
+    )
+    try:
+        run_usbls(
+            engine,
+            get_env_var("USBLS2_API_KEY", environment),
+            series_ids,
+            start_year,
+            end_year,
+            db_schema,
+            table_name,
+            new_table,
+            incremental,
+            revision_years,
+            create_response_cache(environment),
+        )
+    finally:
+        engine.dispose()
+
+
+def run_usbls(
+    engine: Engine,
+    registration_key: str,
+    series_ids: str,
+    start_year: int,
+    end_year: int,
+    db_schema: str,
+    table_name: str,
+    new_table: bool = False,
+    incremental: bool = False,
+    revision_years: int = 1,
+    response_cache: ResponseCache | None = None,
+) -> None:
+    # Same as the usbls command, through the connections of the given <engine>
+    high_water_mark = None
+    if incremental:
+        with PsqlConnector(engine=engine) as psql_conn:
+            high_water_mark = psql_conn.get_high_water_mark(db_schema, table_name)
+    if high_water_mark is not None:
+        start_year = max(start_year, high_water_mark - revision_years)
+
+    with log_duration("usbls: fetch"):
+        jsons = fetch_usbls_json(
+            [series_id.strip() for series_id in series_ids.split(",")],
+            start_year,
+            end_year,
+            registration_key,
+            response_cache=response_cache,
+        )
+    if is_source_unchanged(response_cache, engine, db_schema, table_name):
+        return
+    with log_duration("usbls: parse"):
+        df = parse_usbls_json(jsons)
+    with log_duration("usbls: load"):
+        with PsqlConnector(engine=engine) as psql_conn:
+            if high_water_mark is None:
+                psql_conn.update_table(db_schema, table_name, df, COLUMNS_DTYPE, new_table, INDEXES, KEY_COLUMNS)
+            else:
+                psql_conn.upsert_table(db_schema, table_name, df, COLUMNS_DTYPE, KEY_COLUMNS)
+            if df.height:
+                psql_conn.set_high_water_mark(db_schema, table_name, max(df["year"].max(), high_water_mark or 0))
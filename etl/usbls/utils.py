@@ -1,7 +1,14 @@
+import array
+import hashlib
 import logging
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests as req
+from requests.adapters import HTTPAdapter
 import polars as pl
+from response_cache import ResponseCache
 
 
 logging.basicConfig(
@@ -13,71 +20,199 @@ logger = logging.getLogger(__name__)
 
 SEPARATOR = ", "
 
+URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+REQUEST_TIMEOUT_SECONDS = 60
 
-def fetch_usbls_json(series_id: str, start_year: int, end_year: int, registration_key: str, max_years_per_request: int = 19) -> list:
-    # At most 19 years of data can be requested at a time with a key and 9 without
-    logger.info(f"Fetching USBLS JSON data for series {series_id} from {start_year} to {end_year}")
-    headers = {"Content-type": "application/json"}
-    year_chunks = [[year, min(year + max_years_per_request, end_year)] for year in range(start_year, end_year, max_years_per_request)]
-    jsons = []
-    for years in year_chunks:
-        logger.info(f"Requesting data for years {min(years)}-{max(years)}")
+# Responses worth retrying, and the bounds of the exponential backoff between the retries
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_MIN_SECONDS = 1
+RETRY_MAX_SECONDS = 60
+# Status of the JSON of the responses throttled by the API, which come with a 200
+THROTTLED_RESPONSE_STATUS = "REQUEST_NOT_PROCESSED"
 
-        data = json.dumps(
+# Schema of the parsed observations, matching the COLUMNS_DTYPE of usbls/run.py
+SCHEMA = {
+    "series_id": pl.String,
+    "year": pl.Int32,
+    "period": pl.String,
+    "value": pl.Float64,
+    "footnotes": pl.String,
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the requests to <rate> per second on average, with bursts of up to <capacity>.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        # Block until a token is available, and take it
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill_time) * self.rate)
+                self.last_refill_time = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def fetch_usbls_json(
+    series_ids: list[str],
+    start_year: int,
+    end_year: int,
+    registration_key: str,
+    max_years_per_request: int = 19,
+    max_series_per_request: int = 50,
+    max_workers: int = 8,
+    requests_per_second: float = 2.5,
+    requests_burst: int = 25,
+    daily_requests_quota: int = 500,
+    max_retries: int = 5,
+    response_cache: ResponseCache | None = None,
+) -> list:
+    """
+    Fetch the <series_ids> from <start_year> to <end_year>, with one request per chunk of years and series, sent
+    concurrently by <max_workers> threads over a pooled session.
+
+    With a key, the API allows at most 19 years (9 without) and 50 series per request, 50 requests per 10 seconds and
+    500 requests per day: the requests are throttled accordingly, and the fetch is refused if it needs more than the
+    daily quota. Over any 10 seconds, the throttling lets through at most <requests_burst> + 10 * <requests_per_second>
+    requests (a full bucket, then its refill), 50 by default. Failed requests (network errors, 429, 5xx and
+    REQUEST_NOT_PROCESSED responses) are retried with exponential backoff.
+
+    If <response_cache> is given, the responses are stored into it (the API doesn't support conditional requests), or
+    replayed from it offline.
+    """
+    logger.info(f"Fetching USBLS JSON data for series {SEPARATOR.join(series_ids)} from {start_year} to {end_year}")
+    year_chunks = [
+        [year, min(year + max_years_per_request - 1, end_year)]
+        for year in range(start_year, end_year + 1, max_years_per_request)
+    ]
+    series_chunks = [
+        series_ids[index:index + max_series_per_request]
+        for index in range(0, len(series_ids), max_series_per_request)
+    ]
+    requests_data = [
+        json.dumps(
             {
-                "seriesid": [
-                    series_id,
-                ],
+                "seriesid": series_chunk,
                 "startyear": str(min(years)),
                 "endyear": str(max(years)),
                 "annualaverage": True,
                 "registrationkey": registration_key,
             }
         )
-        url = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
-        response = req.post(
-            url=url,
-            data=data,
-            headers=headers,
-        )
+        for series_chunk in series_chunks
+        for years in year_chunks
+    ]
+    if len(requests_data) > daily_requests_quota:
+        raise Exception(f"{len(requests_data)} requests needed, more than the daily quota of {daily_requests_quota}")
 
-        if json.loads(response.text)["message"]:
-            messages = SEPARATOR.join(json.loads(response.text)["message"])
-            logger.info(f"Request message: {messages}")
-            if "range has been reduced" in messages or "could not be serviced" in messages:
-                raise Exception("Unexpected response, stopping to avoid fetching incomplete data")
-
-        if response.status_code != 200:
-            raise Exception(f"Request failed with status code {response.status_code}")
-
-        jsons.append(json.loads(response.text))
+    rate_limiter = TokenBucket(requests_per_second, requests_burst)
+    with req.Session() as session:
+        session.headers.update({"Content-type": "application/json"})
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max_workers))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            jsons = list(
+                executor.map(
+                    lambda data: post_usbls_request(session, rate_limiter, data, max_retries, response_cache),
+                    requests_data,
+                )
+            )
 
     logger.info("Fetching USBLS JSON data complete")
     return jsons
 
 
+def post_usbls_request(
+    session: req.Session,
+    rate_limiter: TokenBucket,
+    data: str,
+    max_retries: int,
+    response_cache: ResponseCache | None = None,
+) -> dict:
+    request = json.loads(data)
+    logger.info(f"Requesting data for years {request['startyear']}-{request['endyear']}")
+
+    # The registration key is left out of the cache key, so that the cached responses outlive it
+    if response_cache is not None:
+        cache_key = response_cache.make_key(
+            "POST",
+            URL,
+            data=json.dumps({name: value for name, value in request.items() if name != "registrationkey"}, sort_keys=True),
+        )
+        if response_cache.offline:
+            with open(response_cache.load(cache_key), "rb") as body_file:
+                return json.load(body_file)
+
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        try:
+            response = session.post(url=URL, data=data, timeout=REQUEST_TIMEOUT_SECONDS)
+        except req.RequestException as exception:
+            error = f"Request failed: {exception}"
+        else:
+            json_ = json.loads(response.text) if response.status_code == 200 else None
+            if json_ is not None and json_.get("status") != THROTTLED_RESPONSE_STATUS:
+                if json_["message"]:
+                    messages = SEPARATOR.join(json_["message"])
+                    logger.info(f"Request message: {messages}")
+                    if "range has been reduced" in messages or "could not be serviced" in messages:
+                        raise Exception("Unexpected response, stopping to avoid fetching incomplete data")
+                if response_cache is not None:
+                    # The responses embed their processing time, only the results tell whether the content changed
+                    response_cache.store(
+                        cache_key,
+                        URL,
+                        [response.content],
+                        fingerprint=hashlib.sha256(json.dumps(json_["Results"], sort_keys=True).encode()).hexdigest(),
+                    )
+                return json_
+            if json_ is not None:
+                error = f"Request not processed: {SEPARATOR.join(json_['message'])}"
+            elif response.status_code not in RETRY_STATUS_CODES:
+                raise Exception(f"Request failed with status code {response.status_code}")
+            else:
+                error = f"Request failed with status code {response.status_code}"
+
+        if attempt == max_retries:
+            raise Exception(f"{error}, after {max_retries} retries")
+        backoff_seconds = min(RETRY_MAX_SECONDS, RETRY_MIN_SECONDS * 2**attempt)
+        logger.warning(f"{error}, retrying in {backoff_seconds} s")
+        time.sleep(backoff_seconds)
+
+
 def parse_usbls_json(jsons: list) -> pl.DataFrame:
     logger.info("Parsing USBLS JSON data")
-    data = []
+    # The numbers are stored unboxed in typed arrays, the strings in lists
+    columns = {
+        "series_id": [],
+        "year": array.array("i"),
+        "period": [],
+        "value": array.array("d"),
+        "footnotes": [],
+    }
     for json_data in jsons:
         for series in json_data["Results"]["series"]:
             seriesId = series["seriesID"]
             for item in series["data"]:
-                year = item["year"]
-                period = item["period"]
-                period_name = item["periodName"]
-                value = item["value"]
-                footnotes = ", ".join(footnote["text"] for footnote in item["footnotes"] if footnote)
-                row = {
-                    "series_id": seriesId,
-                    "year": year,
-                    "period": period,
-                    "value": value,
-                    "footnotes": footnotes,
-                }
-                data.append(row)
-    df = pl.DataFrame(data)
-    df = df.with_columns(pl.col("year").cast(pl.Int32))
-    df = df.with_columns(pl.col("value").cast(pl.Float64))
+                columns["series_id"].append(seriesId)
+                columns["year"].append(int(item["year"]))
+                columns["period"].append(item["period"])
+                columns["value"].append(float(item["value"]))
+                columns["footnotes"].append(", ".join(footnote["text"] for footnote in item["footnotes"] if footnote))
+    df = pl.DataFrame(
+        [pl.Series(column_name, columns[column_name], dtype=dtype) for column_name, dtype in SCHEMA.items()]
+    )
     logger.info("Parsing USBLS JSON data complete")
     return df
@@ -26,7 +26,7 @@ def load_env_from_dir(dir_abspath: str) -> None:
     dotenv.load_dotenv(env_path)
 
 
-def get_env_var(var_name: str, env_name: str = "") -> str:
+def get_env_var(var_name: str, env_name: str = "", default: str | None = None) -> str:
     if env_name != "":
         if env_name not in Environments.__members__:
             raise ValueError(f"Invalid environment name: {env_name}")
@@ -35,5 +35,7 @@ def get_env_var(var_name: str, env_name: str = "") -> str:
         env_var_name = var_name.upper()
     env_var = os.getenv(env_var_name)
     if not env_var:
+        if default is not None:
+            return default
         raise ValueError(f"Environment variable {env_var_name} not found")
     return env_var
@@ -1,6 +1,13 @@
+import io
 import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable
 import polars as pl
-from sqlalchemy import create_engine, text
+from sqlalchemy import Column, Engine, MetaData, Table, create_engine, text
+from sqlalchemy.schema import CreateTable, DropTable
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import urllib.parse
 
@@ -13,21 +20,225 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def create_psql_engine(
+    dbname: str,
+    user: str,
+    password: str,
+    host: str,
+    port: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    pool_pre_ping: bool = False,
+    pool_recycle: int = -1,
+) -> Engine:
+    """
+    Create a SQLAlchemy engine backed by a connection pool.
+    Long-lived processes (e.g. the backend) should create it once and share it between PsqlConnector instances.
+    """
+    return create_engine(
+        f"postgresql://{user}:{urllib.parse.quote_plus(password)}@{host}:{port}/{dbname}",
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=pool_pre_ping,
+        pool_recycle=pool_recycle,
+    )
+
+
+def create_async_psql_engine(
+    dbname: str,
+    user: str,
+    password: str,
+    host: str,
+    port: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30,
+    pool_pre_ping: bool = False,
+    pool_recycle: int = -1,
+    prepared_statement_cache_size: int = 100,
+) -> AsyncEngine:
+    """
+    Asyncio counterpart of create_psql_engine, running on the asyncpg driver.
+    The queries with bound parameters are prepared once per pooled connection, which keeps up to
+    <prepared_statement_cache_size> of them, so that their later executions skip parsing (and planning, once Postgres
+    switched them to a generic plan).
+    """
+    return create_async_engine(
+        f"postgresql+asyncpg://{user}:{urllib.parse.quote_plus(password)}@{host}:{port}/{dbname}"
+        f"?prepared_statement_cache_size={prepared_statement_cache_size}",
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=pool_pre_ping,
+        pool_recycle=pool_recycle,
+    )
+
+
+class PoolStats:
+    """
+    Thread-safe counters describing how long connectors wait to check out a connection from the pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiters = 0
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @contextmanager
+    def track_checkout(self):
+        with self._lock:
+            self.waiters += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wait_seconds = time.perf_counter() - start
+            with self._lock:
+                self.waiters -= 1
+                self.checkouts += 1
+                self.wait_seconds_total += wait_seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+class CsvChunksReader:
+    """
+    Read-only file-like object serving <batches> (frames, possibly produced on the fly) as CSV (without header), with
+    their <column_names> in this order and <chunk_rows> rows at a time, so that COPY ... FROM STDIN can stream them
+    without materializing them as a whole in CSV. <n_rows> counts the rows served so far.
+    """
+
+    def __init__(self, batches: Iterable[pl.DataFrame], column_names: list[str], chunk_rows: int):
+        self.chunks = (
+            batch.select(column_names).slice(offset, chunk_rows)
+            for batch in batches
+            for offset in range(0, batch.height, chunk_rows)
+        )
+        self.current_chunk = io.BytesIO()
+        self.n_rows = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = []
+        n_bytes = 0
+        while size < 0 or n_bytes < size:
+            piece = self.current_chunk.read(-1 if size < 0 else size - n_bytes)
+            if not piece:
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    break
+                self.current_chunk = io.BytesIO(chunk.write_csv(include_header=False).encode())
+                self.n_rows += chunk.height
+                continue
+            data.append(piece)
+            n_bytes += len(piece)
+        return b"".join(data)
+
+
+# Polars types of the Postgres types (by OID) of the columns read from COPY, the columns of other types being read as
+# strings. All the integers are read as Int64, as the frames built from Python ints are, so that the keys read from the
+# database can be joined to those of the CPI snapshot and of the requests without casts
+POLARS_DTYPES_BY_PSQL_TYPE_OID = {
+    20: pl.Int64,  # bigint
+    21: pl.Int64,  # smallint
+    23: pl.Int64,  # integer
+    700: pl.Float32,  # real
+    701: pl.Float64,  # double precision
+    1700: pl.Float64,  # numeric
+    1082: pl.Date,  # date
+    1114: pl.Datetime("us"),  # timestamp
+}
+PSQL_BOOLEAN_TYPE_OID = 16
+PSQL_TIMESTAMPTZ_TYPE_OID = 1184
+
+
+def get_describe_query(query: str) -> str:
+    # Query returning no rows, but the names and types of the columns of the results of <query> in its cursor description
+    return f"SELECT * FROM ({query}) AS query LIMIT 0"
+
+
+def read_copied_csv(csv: bytes, description: list, schema: list | dict | None = None) -> pl.DataFrame:
+    """
+    Read the <csv> written by COPY ... TO STDOUT WITH (FORMAT csv) into a frame typed as the Postgres columns of the
+    cursor <description> (the name and the type OID of each column), so that the results are parsed by Polars and never
+    materialized as Python objects. As in pl.DataFrame, <schema> overrides the types (dict) or selects columns (list).
+    """
+    columns = [(column[0], column[1]) for column in description]
+    read_schema = {name: POLARS_DTYPES_BY_PSQL_TYPE_OID.get(type_oid, pl.String) for name, type_oid in columns}
+    df = pl.read_csv(csv, has_header=False, schema=read_schema) if csv else pl.DataFrame(schema=read_schema)
+    # COPY writes the booleans as t/f and the timestamps with time zone with their offset
+    df = df.with_columns(
+        [pl.col(name) == "t" for name, type_oid in columns if type_oid == PSQL_BOOLEAN_TYPE_OID]
+        + [
+            pl.col(name).str.to_datetime("%Y-%m-%d %H:%M:%S%.f%#z", time_zone="UTC")
+            for name, type_oid in columns
+            if type_oid == PSQL_TIMESTAMPTZ_TYPE_OID
+        ]
+    )
+    return apply_schema(df, schema)
+
+
+def read_rows(rows: list, description: list, schema: list | dict | None = None) -> pl.DataFrame:
+    """
+    Read the <rows> of a prepared query into a frame, column by column, typed as in read_copied_csv (the columns of
+    other types being inferred from their values, or read as strings if there are none).
+    """
+    dtypes_by_type_oid = {
+        **POLARS_DTYPES_BY_PSQL_TYPE_OID,
+        PSQL_BOOLEAN_TYPE_OID: pl.Boolean,
+        PSQL_TIMESTAMPTZ_TYPE_OID: pl.Datetime("us", "UTC"),
+    }
+    read_schema = {
+        column[0]: dtypes_by_type_oid.get(column[1], None if rows else pl.String) for column in description
+    }
+    df = pl.DataFrame(list(zip(*rows)) or None, schema=read_schema, orient="col", strict=False)
+    return apply_schema(df, schema)
+
+
+def apply_schema(df: pl.DataFrame, schema: list | dict | None = None) -> pl.DataFrame:
+    # As in pl.DataFrame, <schema> overrides the types (dict) or selects columns (list)
+    if isinstance(schema, dict):
+        return df.cast(schema)
+    if schema is not None:
+        return df.select(schema)
+    return df
+
+
 class PsqlConnector:
-    def __init__(self, dbname: str, user: str, password: str, host: str, port: str):
-        self.dbname = dbname
-        self.user = user
-        self.password = urllib.parse.quote_plus(password)
-        self.host = host
-        self.port = port
-        self.engine = create_engine(f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.dbname}")
+    def __init__(
+        self,
+        dbname: str | None = None,
+        user: str | None = None,
+        password: str | None = None,
+        host: str | None = None,
+        port: str | None = None,
+        engine: Engine | None = None,
+        pool_stats: PoolStats | None = None,
+    ):
+        # Reuse the given (pooled) engine if any, otherwise create a dedicated one
+        if engine is None:
+            engine = create_psql_engine(dbname, user, password, host, port)
+        self.engine = engine
+        self.pool_stats = pool_stats
         self.Session = sessionmaker(bind=self.engine)
 
     def __enter__(self):
         self.session = self.Session(autobegin=False)
         self.session.begin()  # Explicit transaction
+        self._connection_checked_out = False
         return self
 
+    def _checkout_connection(self):
+        # The session checks out its connection lazily, on the first query of the transaction
+        # Doing it explicitly allows measuring the time spent waiting for the pool
+        if self.pool_stats is None or self._connection_checked_out:
+            return
+        with self.pool_stats.track_checkout():
+            self.session.connection()
+        self._connection_checked_out = True
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type is None:
             # Commit the transaction if no exceptions occurred in the context block
@@ -39,6 +250,7 @@ class PsqlConnector:
         self.session.close()
 
     def execute_query(self, query: str):
+        self._checkout_connection()
         self.session.execute(text(query))
         logger.info("Query executed successfully")
 
@@ -48,43 +260,368 @@ class PsqlConnector:
             query = query_file.read()
         self.execute_query(query)
 
-    def execute_query_return_df(self, query: str, schema: list | dict | None = None):
-        result = self.session.execute(text(query))
-        rows = result.fetchall()
+    def execute_query_return_df(
+        self,
+        query: str,
+        schema: list | dict | None = None,
+        params: dict | None = None,
+        prepared: bool = False,
+    ):
+        """
+        Return the results of <query> as a frame, with the <params> bound to its :name parameters, so that a single
+        statement text serves all their values. The results are copied as CSV and parsed by Polars (cf.
+        read_copied_csv), unless the query is <prepared>: it's then executed as a statement (prepared on the server by
+        the async connector) and its rows are read as Python objects, which is faster for the small results of point
+        queries, but not for the large ones.
+        """
+        self._checkout_connection()
+        if prepared:
+            result = self.session.execute(text(query), params or {})
+            description = result.cursor.description
+            rows = result.fetchall()
+            logger.info("Query results fetched successfully")
+            return read_rows(rows, description, schema)
+        query = query.strip().rstrip(";")
+        description = self.session.execute(text(get_describe_query(query)), params or {}).cursor.description
+        csv = io.BytesIO()
+        cursor = self.session.connection().connection.dbapi_connection.cursor()
+        copy_query = f"COPY ({query}) TO STDOUT WITH (FORMAT csv)"
+        if params:
+            # psycopg2 binds the parameters on the client side, those of a COPY included
+            compiled = text(copy_query).compile(dialect=self.engine.dialect)
+            copy_query = cursor.mogrify(str(compiled), compiled.construct_params(params)).decode()
+        cursor.copy_expert(copy_query, csv)
         logger.info("Query results fetched successfully")
-        column_names = result.keys()
-        data = [dict(zip(column_names, row)) for row in rows]
-        df = pl.DataFrame(data, schema=schema)
-        return df
+        return read_copied_csv(csv.getvalue(), description, schema)
+
+    def table_exists(self, schema_name: str, table_name: str) -> bool:
+        self._checkout_connection()
+        result = self.session.execute(
+            text(
+                f"""
+                SELECT *
+                FROM information_schema.tables
+                WHERE
+                    table_schema = '{schema_name}'
+                    AND table_name = '{table_name}'
+                """
+            )
+        )
+        return result.fetchone() is not None
+
+    def _copy_rows(
+        self,
+        table_name: str,
+        df: pl.DataFrame | Iterable[pl.DataFrame],
+        column_names: list[str],
+        copy_chunk_rows: int,
+    ) -> int:
+        # Stream the rows straight from the frame(s) to COPY, as CSV chunks of <copy_chunk_rows> rows
+        # Return the number of rows copied
+        batches = [df] if isinstance(df, pl.DataFrame) else df
+        reader = CsvChunksReader(batches, column_names, copy_chunk_rows)
+        cursor = self.session.connection().connection.dbapi_connection.cursor()
+        cursor.copy_expert(
+            f"""
+            COPY {table_name} ({", ".join(f'"{column_name}"' for column_name in column_names)})
+            FROM STDIN WITH (FORMAT csv)
+            """,
+            reader,
+        )
+        return reader.n_rows
+
+    def _commit_and_begin(self):
+        # Commit the current transaction and open the next one, on a connection checked out again from the pool
+        self.session.commit()
+        self.session.begin()
+        self._connection_checked_out = False
+        self._checkout_connection()
 
-    def update_table(self, schema_name: str, table_name: str, df: pl.DataFrame, columns_dtype: dict, new_table: bool = False):
+    def update_table(
+        self,
+        schema_name: str,
+        table_name: str,
+        df: pl.DataFrame | Iterable[pl.DataFrame],
+        columns_dtype: dict,
+        new_table: bool = False,
+        indexes: dict[str, list[str]] | None = None,
+        key_columns: list[str] | None = None,
+        copy_chunk_rows: int = 100_000,
+    ):
+        """
+        Replace the content of <schema_name>.<table_name> with <df>, without blocking or breaking its readers.
+        <df> may also be an iterable of frames (e.g. a generator of batches), loaded as they come, whose columns are
+        those of <columns_dtype>.
+
+        The rows are copied into <table_name>__staging, which gets the <indexes> (index name -> columns), a unique index
+        on the <key_columns> if any (required by upsert_table) and the grants of the current table. The staging table is
+        then swapped in by renaming it, in a transaction of its own, so the table is only locked for the time of the
+        renames, regardless of the size of <df>.
+        The transaction opened by the context manager is committed before the swap, and a new one is opened after it.
+        """
         logger.info(f"Updating table {schema_name}.{table_name}")
+        self._checkout_connection()
+        staging_table_name = f"{table_name}__staging"
+        indexes = indexes or {}
+        unique_index_names = set()
+        if key_columns:
+            unique_index_names.add(f"idx_{table_name}_key")
+            indexes = {**indexes, f"idx_{table_name}_key": key_columns}
 
         # Raise exception if the table doesn't exist AND new_table is False
-        if not new_table:
-            result = self.session.execute(
+        table_exists = self.table_exists(schema_name, table_name)
+        if not table_exists and not new_table:
+            raise Exception(f"Table {schema_name}.{table_name} doesn't exist and new_table is False")
+
+        # Create the staging table with the given column types, dropping the leftover of a failed load if any
+        staging_table = Table(
+            staging_table_name,
+            MetaData(schema=schema_name),
+            *[Column(column_name, column_dtype) for column_name, column_dtype in columns_dtype.items()],
+        )
+        self.session.execute(DropTable(staging_table, if_exists=True))
+        self.session.execute(CreateTable(staging_table))
+
+        n_rows = self._copy_rows(f'"{schema_name}"."{staging_table_name}"', df, list(columns_dtype), copy_chunk_rows)
+        logger.info(f"{n_rows} rows copied into {schema_name}.{staging_table_name}")
+
+        # Build the indexes once the rows are in, under temporary names since index names are unique per schema
+        for index_name, index_columns in indexes.items():
+            index_column_names = ", ".join(f'"{column_name}"' for column_name in index_columns)
+            self.session.execute(
                 text(
                     f"""
-                    SELECT *
-                    FROM information_schema.tables
+                    CREATE {"UNIQUE " if index_name in unique_index_names else ""}INDEX "{index_name}__staging"
+                    ON "{schema_name}"."{staging_table_name}" ({index_column_names})
+                    """
+                )
+            )
+
+        # Carry over the grants of the current table
+        if table_exists:
+            grants = self.session.execute(
+                text(
+                    f"""
+                    SELECT
+                        grantee,
+                        privilege_type
+                    FROM information_schema.role_table_grants
                     WHERE
                         table_schema = '{schema_name}'
                         AND table_name = '{table_name}'
+                        AND grantee <> grantor
                     """
                 )
+            ).fetchall()
+            for grantee, privilege_type in grants:
+                self.session.execute(
+                    text(f'GRANT {privilege_type} ON "{schema_name}"."{staging_table_name}" TO "{grantee}"')
+                )
+        self._commit_and_begin()
+
+        # Swap the staging table in
+        self.session.execute(text(f'DROP TABLE IF EXISTS "{schema_name}"."{table_name}"'))
+        self.session.execute(text(f'ALTER TABLE "{schema_name}"."{staging_table_name}" RENAME TO "{table_name}"'))
+        for index_name in indexes:
+            self.session.execute(text(f'ALTER INDEX "{schema_name}"."{index_name}__staging" RENAME TO "{index_name}"'))
+        self._commit_and_begin()
+        logger.info(f"Table {schema_name}.{table_name} updated successfully")
+
+    def upsert_table(
+        self,
+        schema_name: str,
+        table_name: str,
+        df: pl.DataFrame | Iterable[pl.DataFrame],
+        columns_dtype: dict,
+        key_columns: list[str],
+        copy_chunk_rows: int = 100_000,
+    ) -> int:
+        """
+        Insert the rows of <df> that are new to <schema_name>.<table_name> and update the ones that changed, the rows
+        being identified by their <key_columns> (which must have a unique index, cf. update_table). As in update_table,
+        <df> may also be an iterable of frames.
+        Return the number of rows inserted or updated.
+        """
+        logger.info(f"Upserting into table {schema_name}.{table_name}")
+        self._checkout_connection()
+        delta_table_name = f"{table_name}__delta"
+
+        # Copy the rows into a temporary table
+        delta_table = Table(
+            delta_table_name,
+            MetaData(),
+            *[Column(column_name, column_dtype) for column_name, column_dtype in columns_dtype.items()],
+            prefixes=["TEMPORARY"],
+        )
+        self.session.execute(CreateTable(delta_table))
+        n_rows = self._copy_rows(f'"{delta_table_name}"', df, list(columns_dtype), copy_chunk_rows)
+
+        # Only write the rows whose values differ from the stored ones
+        column_names = ", ".join(f'"{column_name}"' for column_name in columns_dtype)
+        key_column_names = ", ".join(f'"{column_name}"' for column_name in key_columns)
+        value_columns = [column_name for column_name in columns_dtype if column_name not in key_columns]
+        if value_columns:
+            on_conflict = f"""
+                DO UPDATE SET {", ".join(f'"{column_name}" = EXCLUDED."{column_name}"' for column_name in value_columns)}
+                WHERE
+                    ({", ".join(f'"{table_name}"."{column_name}"' for column_name in value_columns)})
+                    IS DISTINCT FROM ({", ".join(f'EXCLUDED."{column_name}"' for column_name in value_columns)})
+            """
+        else:
+            on_conflict = "DO NOTHING"
+        result = self.session.execute(
+            text(
+                f"""
+                INSERT INTO "{schema_name}"."{table_name}" ({column_names})
+                SELECT {column_names}
+                FROM "{delta_table_name}"
+                ON CONFLICT ({key_column_names}) {on_conflict}
+                """
             )
-            if not result.fetchone():
-                raise Exception(f"Table {schema_name}.{table_name} doesn't exist and new_table is False")
-
-        # Update the table
-        df.to_pandas(
-            use_pyarrow_extension_array=True,
-        ).to_sql(
-            table_name,
-            self.engine,
-            schema=schema_name,
-            if_exists="replace",
-            index=False,
-            dtype=columns_dtype,
         )
-        logger.info(f"Table {schema_name}.{table_name} updated successfully")
+        self.session.execute(DropTable(delta_table))
+        logger.info(f"{result.rowcount} of {n_rows} rows inserted or updated in {schema_name}.{table_name}")
+        return result.rowcount
+
+    def get_high_water_mark(self, schema_name: str, table_name: str) -> int | None:
+        """
+        Return the high-water mark recorded by the last load of <schema_name>.<table_name>, None if there's none.
+        """
+        self._checkout_connection()
+        self._create_high_water_marks_table(schema_name)
+        result = self.session.execute(
+            text(
+                f"""
+                SELECT high_water_mark
+                FROM "{schema_name}".etl_high_water_marks
+                WHERE table_name = :table_name
+                """
+            ),
+            {"table_name": table_name},
+        )
+        row = result.fetchone()
+        return row[0] if row else None
+
+    def set_high_water_mark(self, schema_name: str, table_name: str, high_water_mark: int):
+        self._checkout_connection()
+        self._create_high_water_marks_table(schema_name)
+        self.session.execute(
+            text(
+                f"""
+                INSERT INTO "{schema_name}".etl_high_water_marks (table_name, high_water_mark, updated_at)
+                VALUES (:table_name, :high_water_mark, NOW())
+                ON CONFLICT (table_name) DO UPDATE SET
+                    high_water_mark = EXCLUDED.high_water_mark,
+                    updated_at = EXCLUDED.updated_at
+                """
+            ),
+            {"table_name": table_name, "high_water_mark": high_water_mark},
+        )
+        logger.info(f"High-water mark of {schema_name}.{table_name} set to {high_water_mark}")
+
+    def _create_high_water_marks_table(self, schema_name: str):
+        result = self.session.execute(text(f"SELECT to_regclass('\"{schema_name}\".etl_high_water_marks')"))
+        if result.scalar() is not None:
+            return
+        # Concurrent CREATE TABLE IF NOT EXISTS may still conflict (e.g. loads run by the all command): serialize them
+        self.session.execute(text("SELECT pg_advisory_xact_lock(hashtext('etl_high_water_marks'))"))
+        self.session.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS "{schema_name}".etl_high_water_marks (
+                    table_name TEXT PRIMARY KEY,
+                    high_water_mark INTEGER NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL
+                )
+                """
+            )
+        )
+
+
+class AsyncPsqlConnector:
+    """
+    Asyncio counterpart of PsqlConnector, to be used with "async with".
+    The queries are awaited so that the event loop keeps serving other requests while waiting for the database.
+    """
+
+    def __init__(
+        self,
+        dbname: str | None = None,
+        user: str | None = None,
+        password: str | None = None,
+        host: str | None = None,
+        port: str | None = None,
+        engine: AsyncEngine | None = None,
+        pool_stats: PoolStats | None = None,
+    ):
+        # Reuse the given (pooled) engine if any, otherwise create a dedicated one
+        if engine is None:
+            engine = create_async_psql_engine(dbname, user, password, host, port)
+        self.engine = engine
+        self.pool_stats = pool_stats
+        self.Session = async_sessionmaker(bind=self.engine)
+
+    async def __aenter__(self):
+        self.session = self.Session(autobegin=False)
+        await self.session.begin()  # Explicit transaction
+        self._connection_checked_out = False
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            # Commit the transaction if no exceptions occurred in the context block
+            await self.session.commit()
+        else:
+            # Otherwise, rollback
+            logger.info("An exception occured, rolling back")
+            await self.session.rollback()
+        await self.session.close()
+
+    async def _checkout_connection(self):
+        # Same as PsqlConnector._checkout_connection
+        if self.pool_stats is None or self._connection_checked_out:
+            return
+        with self.pool_stats.track_checkout():
+            await self.session.connection()
+        self._connection_checked_out = True
+
+    async def execute_query(self, query: str):
+        await self._checkout_connection()
+        await self.session.execute(text(query))
+        logger.info("Query executed successfully")
+
+    async def execute_query_return_df(
+        self,
+        query: str,
+        schema: list | dict | None = None,
+        params: dict | None = None,
+        prepared: bool = False,
+    ):
+        # Same as PsqlConnector.execute_query_return_df, the COPY running on the asyncpg connection of the session (in
+        # its transaction, which the description query opens)
+        # A <prepared> query is prepared on its first execution on the pooled connection, then reused
+        await self._checkout_connection()
+        if prepared:
+            result = await self.session.execute(text(query), params or {})
+            description = result.cursor.description
+            rows = result.fetchall()
+            logger.info("Query results fetched successfully")
+            return read_rows(rows, description, schema)
+        query = query.strip().rstrip(";")
+        description = (await self.session.execute(text(get_describe_query(query)), params or {})).cursor.description
+        copy_args = []
+        if params:
+            # asyncpg binds the positional ($n) parameters of the COPY
+            compiled = text(query).compile(dialect=self.engine.dialect)
+            query = str(compiled)
+            copy_args = [params[name] for name in compiled.positiontup]
+        chunks = []
+
+        async def write_chunk(chunk: bytes) -> None:
+            chunks.append(chunk)
+
+        connection = await self.session.connection()
+        asyncpg_connection = (await connection.get_raw_connection()).driver_connection
+        await asyncpg_connection.copy_from_query(query, *copy_args, output=write_chunk, format="csv")
+        logger.info("Query results fetched successfully")
+        return read_copied_csv(b"".join(chunks), description, schema)
@@ -0,0 +1,23 @@
+import logging
+import time
+from contextlib import contextmanager
+
+
+logging.basicConfig(
+    format="%(asctime)s %(levelname)-8s %(message)s",
+    level=logging.INFO,
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def log_duration(stage_name: str):
+    """
+    Log the wall-clock time spent in the block, as the duration of <stage_name>.
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info(f"{stage_name} took {time.perf_counter() - start_time:.2f} s")